@@ -0,0 +1,199 @@
+"""
+🧠 ADAPTIVE SCRAPE SCHEDULE
+Learns how often the rate actually changes in each (weekday, IST hour) slot and spaces scrapes to match.
+
+Each pair of consecutive samples adds its time gap as "exposure" to the hour slots
+it spans. If the rate differed, it also adds one change, split across those slots
+in the same proportion. A slot's change rate λ is smoothed towards the weekly
+mean, so slots with little data behave like an average hour.
+
+For a fixed number of scrapes per week, the interval that minimises the average
+delay between a change and its detection is proportional to 1/√λ (the
+square-root rule). Busy AKGSMA hours are therefore polled every few minutes and
+dead hours every few hours. The state is persisted and updated one sample at a
+time, like the running stats.
+"""
+
+import json
+import math
+import os
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from aggregates import IST_OFFSET_SECONDS
+from atomic_output import write_json
+
+IST = ZoneInfo("Asia/Kolkata")
+
+SCHEDULE_STATE_FILE = 'data/history/schedule_state.json'
+SLOTS = 7 * 24                  # (weekday, hour) slots
+DAILY_SCRAPE_BUDGET = 36        # Average scrapes per day to spend (the fixed workflow uses ~33 on weekdays)
+MIN_INTERVAL_MINUTES = 10
+MAX_INTERVAL_MINUTES = 240
+MAX_GAP_HOURS = 6               # Longer gaps are downtime, not observation
+PRIOR_HOURS = 2.0               # Smoothing weight (hours) pulling each slot towards the weekly mean
+MIN_OBSERVED_HOURS = 48         # Below this the model defers to the fixed schedule
+FASTER_SLOT_FACTOR = 0.75       # Jump to an upcoming slot's start only if it polls clearly faster
+
+
+def slot_of(moment):
+    """(weekday, IST hour) slot index of an epoch or datetime"""
+    if isinstance(moment, datetime):
+        local = moment.astimezone(IST)
+        return local.weekday() * 24 + local.hour
+    local_seconds = int(moment) + IST_OFFSET_SECONDS
+    weekday = (local_seconds // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+    return weekday * 24 + local_seconds % 86400 // 3600
+
+
+class ChangeModel:
+    """Per-slot change counts and observed hours, with the polling intervals they imply"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.changes = state.get('changes', [0.0] * SLOTS)
+        self.exposure = state.get('exposure_hours', [0.0] * SLOTS)
+        self.last_epoch = state.get('last_epoch')
+        self.last_rate = state.get('last_rate')
+        self._intervals = None
+
+    @classmethod
+    def load(cls, path=SCHEDULE_STATE_FILE):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                return cls(json.load(f))
+        except Exception as e:
+            print(f"⚠️ Schedule state unreadable, relearning: {e}")
+            return cls()
+
+    def save(self, path=SCHEDULE_STATE_FILE):
+        state = {
+            'changes': [round(value, 4) for value in self.changes],
+            'exposure_hours': [round(value, 4) for value in self.exposure],
+            'last_epoch': self.last_epoch,
+            'last_rate': self.last_rate
+        }
+        write_json(path, state, compact=True)
+
+    # ------------------------------------------------------------------ learning
+
+    def update(self, epoch, rate):
+        """Fold one sample in: spread the gap since the previous sample over the hour slots it covers"""
+        if not isinstance(rate, (int, float)) or math.isnan(rate):
+            return
+        previous_epoch, previous_rate = self.last_epoch, self.last_rate
+        self.last_epoch, self.last_rate = epoch, rate
+        if previous_epoch is None or previous_rate is None:
+            return
+        gap = epoch - previous_epoch
+        if gap <= 0 or gap > MAX_GAP_HOURS * 3600:
+            return
+
+        changed = rate != previous_rate
+        start = previous_epoch
+        while start < epoch:
+            hour_end = ((int(start) + IST_OFFSET_SECONDS) // 3600 + 1) * 3600 - IST_OFFSET_SECONDS
+            end = min(hour_end, epoch)
+            share = (end - start) / gap
+            slot = slot_of(start)
+            self.exposure[slot] += (end - start) / 3600
+            if changed:
+                self.changes[slot] += share
+            start = end
+        self._intervals = None
+
+    def ingest(self, epochs, rates):
+        """Feed samples newer than the last one seen (bisect to the start)"""
+        start = 0 if self.last_epoch is None else bisect_right(epochs, self.last_epoch)
+        for i in range(start, len(epochs)):
+            self.update(epochs[i], rates[i])
+        return len(epochs) - start
+
+    # ------------------------------------------------------------------ model
+
+    def observed_hours(self):
+        return sum(self.exposure)
+
+    def is_trained(self):
+        return self.observed_hours() >= MIN_OBSERVED_HOURS
+
+    def change_rates(self):
+        """Smoothed changes per hour for every slot"""
+        mean = (sum(self.changes) + 1.0) / (self.observed_hours() + 1.0)
+        return [(self.changes[s] + PRIOR_HOURS * mean) / (self.exposure[s] + PRIOR_HOURS) for s in range(SLOTS)]
+
+    def intervals(self):
+        """Polling interval (minutes) per slot under the square-root rule and the weekly budget"""
+        if self._intervals is None:
+            roots = [math.sqrt(rate) for rate in self.change_rates()]
+            scale = sum(roots) / (DAILY_SCRAPE_BUDGET * 7)  # hours * sqrt(changes/hour)
+            self._intervals = [
+                min(MAX_INTERVAL_MINUTES, max(MIN_INTERVAL_MINUTES, 60 * scale / root if root else MAX_INTERVAL_MINUTES))
+                for root in roots
+            ]
+        return self._intervals
+
+    def interval_at(self, moment):
+        return self.intervals()[slot_of(moment)]
+
+    def next_poll(self, now):
+        """When to scrape next: one interval ahead, or earlier if a clearly busier hour starts first"""
+        now = now.astimezone(IST)
+        interval = self.interval_at(now)
+        target = now + timedelta(minutes=interval)
+        boundary = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        while boundary < target:
+            if self.interval_at(boundary) < interval * FASTER_SLOT_FACTOR:
+                return boundary
+            boundary += timedelta(hours=1)
+        return target
+
+    def change_forecast(self, now, next_update_minutes):
+        """
+        Advisory change outlook for latest.json. It is not a schedule: the site's
+        updates follow the fixed workflow cadence (next_update_minutes). Only
+        tracker_daemon.py polls by the learned intervals.
+        """
+        if not self.is_trained():
+            return {
+                'advisory': True,
+                'method': 'learning',
+                'reason': f'{self.observed_hours():.0f}/{MIN_OBSERVED_HOURS} observed hours'
+            }
+        rates = self.change_rates()
+        now = now.astimezone(IST)
+        # Walk the hour slots until the expected number of changes reaches ln 2 (the median wait)
+        expected, moment, predicted = 0.0, now, None
+        horizon = now + timedelta(days=7)
+        while moment < horizon:
+            slot_end = moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            rate = rates[slot_of(moment)]
+            hours = (slot_end - moment).total_seconds() / 3600
+            if rate > 0 and expected + rate * hours >= math.log(2):
+                predicted = moment + timedelta(hours=(math.log(2) - expected) / rate)
+                break
+            expected += rate * hours
+            moment = slot_end
+        return {
+            'advisory': True,
+            'method': 'learned_change_rate',
+            'predicted_change_at': predicted.isoformat() if predicted else None,
+            'changes_per_hour_now': round(rates[slot_of(now)], 3),
+            'change_probability_before_next_update': round(self.change_probability(now, next_update_minutes), 3),
+            'observed_hours': round(self.observed_hours(), 1)
+        }
+
+    def change_probability(self, now, minutes):
+        """Chance of at least one change in the next `minutes`, integrating the slot rates"""
+        rates = self.change_rates()
+        now = now.astimezone(IST)
+        end = now + timedelta(minutes=max(0.0, minutes))
+        expected, moment = 0.0, now
+        while moment < end:
+            slot_end = min(end, moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+            expected += rates[slot_of(moment)] * (slot_end - moment).total_seconds() / 3600
+            moment = slot_end
+        return 1 - math.exp(-expected)
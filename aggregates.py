@@ -0,0 +1,310 @@
+"""
+📊 INCREMENTAL AGGREGATES
+Running statistics and OHLC rollups, updated one sample at a time and persisted next to the history.
+
+Each new sample costs O(1) for count/sum/min/max and the current 15-minute /
+hourly / daily OHLC buckets, and O(log k) for the rate histogram (k distinct
+rates). Rates are whole paise, so the histogram gives exact quantiles, not an
+estimate. Publishing reads the state directly: its cost depends on the number
+of distinct rates, not on history length.
+"""
+
+import json
+import math
+import os
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from atomic_output import write_json
+
+IST = ZoneInfo("Asia/Kolkata")
+
+STATS_STATE_FILE = 'data/history/stats_state.json'
+ROLLUP_STATE_FILE = 'data/history/rollups_state.json'
+TRACKED_QUANTILES = (0.25, 0.5, 0.75)
+
+# Buckets are aligned to IST wall-clock boundaries (IST is a fixed UTC+05:30)
+IST_OFFSET_SECONDS = 5 * 3600 + 30 * 60
+
+# name -> (bucket seconds, buckets kept)
+ROLLUP_INTERVALS = {
+    '15m': (15 * 60, 7 * 96),      # one week
+    '1h': (3600, 60 * 24),          # sixty days
+    '1d': (86400, 3 * 366)          # three years
+}
+OHLC_FIELDS = ('start', 'open', 'high', 'low', 'close', 'count')
+
+
+def ist_day_key(epoch):
+    """YYYY-MM-DD of an epoch in IST"""
+    return datetime.fromtimestamp(epoch, IST).strftime('%Y-%m-%d')
+
+
+def exact_quantile(values, p):
+    """Linearly interpolated quantile of a small list (median of an even list averages the middle pair)"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * p
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class RateHistogram:
+    """Exact count of every rate seen, keyed by paise; any quantile is exact"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.keys = list(state.get('paise', []))  # Sorted distinct rates in paise
+        self.counts = dict(zip(self.keys, state.get('counts', [])))
+        self.total = sum(self.counts.values())
+
+    def to_dict(self):
+        return {'paise': self.keys, 'counts': [self.counts[key] for key in self.keys]}
+
+    def add(self, rate):
+        key = round(rate * 100)
+        if key in self.counts:
+            self.counts[key] += 1
+        else:
+            insort(self.keys, key)
+            self.counts[key] = 1
+        self.total += 1
+
+    def quantiles(self, ps):
+        """{p: value} for quantiles 0-1, linearly interpolated like exact_quantile (one walk over the keys)"""
+        if not self.total:
+            return {p: None for p in ps}
+        positions = {p: (self.total - 1) * p for p in ps}
+        ranks = sorted({k for position in positions.values() for k in (math.floor(position), math.ceil(position))})
+        value_at = {}
+        seen = 0
+        wanted = iter(ranks)
+        rank = next(wanted)
+        for key in self.keys:
+            seen += self.counts[key]
+            while rank is not None and rank < seen:
+                value_at[rank] = key / 100
+                rank = next(wanted, None)
+            if rank is None:
+                break
+        result = {}
+        for p, position in positions.items():
+            lower, upper = math.floor(position), math.ceil(position)
+            result[p] = value_at[lower] + (value_at[upper] - value_at[lower]) * (position - lower)
+        return result
+
+    def std_dev(self):
+        """Population standard deviation, from exact integer sums over the keys (as analytics.RateSeries does)"""
+        if not self.total:
+            return None
+        origin = self.keys[0]
+        total = sum(count * (key - origin) for key, count in self.counts.items())
+        squares = sum(count * (key - origin) * (key - origin) for key, count in self.counts.items())
+        n = self.total
+        return math.sqrt((n * squares - total * total) / (n * n)) / 100
+
+
+class RunningStats:
+    """Persisted running aggregates over every sample ever ingested"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get('count', 0)
+        self.invalid = state.get('invalid', 0)
+        self.total = state.get('sum', 0.0)
+        self.minimum = state.get('min')
+        self.maximum = state.get('max')
+        self.first_epoch = state.get('first_epoch')
+        self.last_epoch = state.get('last_epoch')
+        self.histogram = RateHistogram(state.get('histogram'))
+
+    @classmethod
+    def load(cls, path=STATS_STATE_FILE):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Stats state unreadable, rebuilding: {e}")
+            return cls()
+        if state.get('count') and 'histogram' not in state:
+            print("📊 Stats state predates the rate histogram, rebuilding from the store")
+            return cls()
+        return cls(state)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'invalid': self.invalid,
+            'sum': self.total,
+            'min': self.minimum,
+            'max': self.maximum,
+            'first_epoch': self.first_epoch,
+            'last_epoch': self.last_epoch,
+            'histogram': self.histogram.to_dict()
+        }
+
+    def save(self, path=STATS_STATE_FILE):
+        write_json(path, self.to_dict(), compact=True)
+
+    def update(self, epoch, rate):
+        """Fold one sample into every aggregate"""
+        if self.first_epoch is None:
+            self.first_epoch = epoch
+        self.last_epoch = epoch
+
+        if not isinstance(rate, (int, float)) or math.isnan(rate):
+            self.invalid += 1
+            return
+
+        self.count += 1
+        self.total += rate
+        self.minimum = rate if self.minimum is None else min(self.minimum, rate)
+        self.maximum = rate if self.maximum is None else max(self.maximum, rate)
+        self.histogram.add(rate)
+
+    def ingest(self, epochs, rates):
+        """Feed samples newer than the last one seen; `epochs` is sorted, so the start is a bisect"""
+        start = 0 if self.last_epoch is None else bisect_right(epochs, self.last_epoch)
+        for i in range(start, len(epochs)):
+            self.update(epochs[i], rates[i])
+        return len(epochs) - start
+
+    def __len__(self):
+        return self.count
+
+    def percentiles(self, ps):
+        """{p: value} for percentiles 0-100 over every sample ever ingested (same interface as RateSeries)"""
+        quantiles = self.histogram.quantiles([p / 100 for p in ps])
+        return {p: quantiles[p / 100] for p in ps}
+
+    def std_dev(self):
+        return self.histogram.std_dev()
+
+    def summary(self):
+        """Headline statistics, read straight from the running state"""
+        if not self.count:
+            return None
+        quartiles = self.histogram.quantiles(TRACKED_QUANTILES)
+        return {
+            'highest': self.maximum,
+            'lowest': self.minimum,
+            'average': round(self.total / self.count, 2),
+            'median': round(quartiles[0.5], 2),
+            'p25': round(quartiles[0.25], 2),
+            'p75': round(quartiles[0.75], 2),
+            'volatility': round(self.maximum - self.minimum, 2)
+        }
+
+
+class OhlcRollup:
+    """Fixed-interval OHLC + count buckets, oldest first, trimmed to a bounded length"""
+
+    def __init__(self, name, seconds, keep, buckets=None):
+        self.name = name
+        self.seconds = seconds
+        self.keep = keep
+        self.buckets = buckets or []  # [start_epoch, open, high, low, close, count]
+
+    def bucket_start(self, epoch):
+        return (int(epoch) + IST_OFFSET_SECONDS) // self.seconds * self.seconds - IST_OFFSET_SECONDS
+
+    def add(self, epoch, rate):
+        """O(1) for in-order samples (the normal case); O(log n) lookup for a late one"""
+        start = self.bucket_start(epoch)
+        buckets = self.buckets
+
+        if buckets and buckets[-1][0] == start:
+            bucket = buckets[-1]
+        elif not buckets or buckets[-1][0] < start:
+            buckets.append([start, rate, rate, rate, rate, 1])
+            if len(buckets) > self.keep + self.keep // 10:
+                del buckets[:len(buckets) - self.keep]
+            return
+        else:
+            index = bisect_left(buckets, start, key=lambda b: b[0])
+            if index == len(buckets) or buckets[index][0] != start:
+                buckets.insert(index, [start, rate, rate, rate, rate, 1])
+                return
+            bucket = buckets[index]
+
+        bucket[2] = max(bucket[2], rate)
+        bucket[3] = min(bucket[3], rate)
+        bucket[4] = rate
+        bucket[5] += 1
+
+    def get(self, epoch):
+        """Bucket containing `epoch` as a dict, or None"""
+        start = self.bucket_start(epoch)
+        index = bisect_left(self.buckets, start, key=lambda b: b[0])
+        if index < len(self.buckets) and self.buckets[index][0] == start:
+            return dict(zip(OHLC_FIELDS, self.buckets[index]))
+        return None
+
+    def rows(self):
+        return self.buckets[-self.keep:]
+
+
+class Rollups:
+    """The set of OHLC rollups published under api/ohlc/, persisted as one state file"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.last_epoch = state.get('last_epoch')
+        saved = state.get('rollups', {})
+        self.rollups = {
+            name: OhlcRollup(name, seconds, keep, saved.get(name))
+            for name, (seconds, keep) in ROLLUP_INTERVALS.items()
+        }
+
+    @classmethod
+    def load(cls, path=ROLLUP_STATE_FILE):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                return cls(json.load(f))
+        except Exception as e:
+            print(f"⚠️ Rollup state unreadable, rebuilding: {e}")
+            return cls()
+
+    def save(self, path=ROLLUP_STATE_FILE):
+        state = {
+            'last_epoch': self.last_epoch,
+            'rollups': {name: rollup.buckets for name, rollup in self.rollups.items()}
+        }
+        write_json(path, state, compact=True)
+
+    def __getitem__(self, name):
+        return self.rollups[name]
+
+    def update(self, epoch, rate):
+        self.last_epoch = epoch if self.last_epoch is None else max(self.last_epoch, epoch)
+        if not isinstance(rate, (int, float)) or math.isnan(rate):
+            return
+        for rollup in self.rollups.values():
+            rollup.add(epoch, rate)
+
+    def ingest(self, epochs, rates):
+        """Feed samples newer than the last one seen (bisect to the start)"""
+        start = 0 if self.last_epoch is None else bisect_right(epochs, self.last_epoch)
+        for i in range(start, len(epochs)):
+            self.update(epochs[i], rates[i])
+        return len(epochs) - start
+
+    def document(self, name):
+        """JSON document for one rollup endpoint (rows are compact arrays; no run timestamp, so unchanged rollups are not rewritten)"""
+        rollup = self.rollups[name]
+        return {
+            'interval': name,
+            'interval_seconds': rollup.seconds,
+            'timezone': 'Asia/Kolkata',
+            'fields': list(OHLC_FIELDS),
+            'start_format': 'epoch_seconds',
+            'data': rollup.rows(),
+            'last_sample_epoch': self.last_epoch
+        }
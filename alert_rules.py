@@ -0,0 +1,151 @@
+"""
+🚦 ALERT RULES
+The tracker's alert decision as a pure function, evaluate(sample, state,
+config). It takes no clock, files or senders, and the live tracker and
+backtest.py run the same code.
+
+  Sample       one observation: epoch, rate, IST hour, weekend flag
+  RuleState    what the rules remember: the previous sample, plus the reversal
+               detector's verdict on the current one
+  RuleConfig   the settings compiled once from alert_config() in
+               scrape_with_notifications.py: per-hour limits for weekdays and
+               weekends, so evaluating is a few attribute reads
+  Alert        what fired (kind, priority and the numbers behind it)
+
+Rules are checked in order and the first match wins: main threshold, micro,
+rapid movement, trend reversal, stability. The frozen types are named tuples
+and RuleState is a slotted class (dataclasses would pull inspect into every
+startup). evaluate() builds nothing except the Alert it returns, and when
+nothing fires it returns the shared empty tuple.
+"""
+
+from collections import namedtuple
+
+PERIODS = ('AKGSMA_MORNING_RUSH', 'ACTIVE_TRADING', 'EVENING_UPDATE', 'OFF_HOURS')
+MICRO_PERIODS = ('AKGSMA_MORNING_RUSH', 'EVENING_UPDATE')
+STABILITY_PERIODS = ('AKGSMA_MORNING_RUSH', 'EVENING_UPDATE')
+ALERT_KINDS = ('main', 'micro', 'rapid', 'trend', 'stability')
+DISABLED_THRESHOLD = 999  # Micro level outside AKGSMA/evening (never reached)
+NO_ALERTS = ()
+
+
+class Sample(namedtuple('Sample', 'epoch rate hour is_weekend')):  # hour: IST hour, 0-23
+    __slots__ = ()
+
+    @classmethod
+    def at(cls, moment, rate):
+        """Sample for an IST datetime"""
+        return cls(moment.timestamp(), rate, moment.hour, moment.weekday() >= 5)
+
+
+class RuleState:
+    __slots__ = ('previous_epoch', 'previous_rate', 'reversal')
+
+    def __init__(self, previous_epoch=None, previous_rate=None, reversal=None):
+        self.previous_epoch = previous_epoch
+        self.previous_rate = previous_rate
+        self.reversal = reversal  # Reversal the detector confirmed on the sample being evaluated, e.g. "up → down"
+
+    def __repr__(self):
+        return f"RuleState({self.previous_epoch!r}, {self.previous_rate!r}, {self.reversal!r})"
+
+    def advance(self, sample):
+        """Make `sample` the previous one (the only mutation; evaluate() never changes state)"""
+        self.previous_epoch, self.previous_rate, self.reversal = sample.epoch, sample.rate, None
+
+
+PeriodLimits = namedtuple('PeriodLimits', 'period rupees percent micro_rupees')
+
+
+class RuleConfig(namedtuple('RuleConfig', (
+        'weekday weekend '  # PeriodLimits for each IST hour
+        'enable_micro enable_rapid rapid_rupees rapid_window_minutes enable_trend trend_rupees '
+        'enable_stability stability_minutes high_priority_rupees high_priority_percent'))):
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, config):
+        """Compile an alert_config() dict"""
+        def hourly(is_weekend):
+            limits = {period: PeriodLimits(period, **thresholds_for(period, is_weekend, config)) for period in PERIODS}
+            return tuple(limits[market_period(hour, config)] for hour in range(24))
+
+        return cls(
+            weekday=hourly(False),
+            weekend=hourly(True),
+            enable_micro=config['enable_micro'],
+            enable_rapid=config['enable_rapid'],
+            rapid_rupees=config['rapid_rupees'],
+            rapid_window_minutes=config['rapid_window_minutes'],
+            enable_trend=config['enable_trend'],
+            trend_rupees=config['trend_rupees'],
+            enable_stability=config['enable_stability'],
+            stability_minutes=config['stability_minutes'],
+            high_priority_rupees=config['high_priority_rupees'],
+            high_priority_percent=config['high_priority_percent']
+        )
+
+
+# kind: one of ALERT_KINDS; priority: 'high' / 'normal' / 'low'; threshold: main rupee threshold in force
+Alert = namedtuple('Alert', 'kind priority period change change_percent minutes_since threshold reversal',
+                   defaults=(None,))
+
+
+def market_period(hour, config):
+    """Market period of an IST hour"""
+    for period in ('AKGSMA_MORNING_RUSH', 'ACTIVE_TRADING', 'EVENING_UPDATE'):
+        start, end = config['period_hours'][period]
+        if start <= hour < end:
+            return period
+    return 'OFF_HOURS'
+
+
+def thresholds_for(period, is_weekend, config):
+    """{'rupees', 'percent', 'micro_rupees'} in force for a period (weekend sensitivity applied)"""
+    multiplier = config['weekend_multiplier'] if is_weekend and config['weekend_reduced_sensitivity'] else 1.0
+    levels = config['thresholds'][period]
+    micro = config['micro_rupees'] if config['enable_micro'] and period in MICRO_PERIODS else DISABLED_THRESHOLD
+    return {
+        'rupees': levels['rupees'] * multiplier,
+        'percent': levels['percent'] * multiplier,
+        'micro_rupees': micro
+    }
+
+
+def detector_settings(config):
+    """Keyword arguments for reversal_detector.ReversalDetector"""
+    return {
+        'rule': config['trend_rule'],
+        'window': config['trend_window'],
+        'min_rupees': config['trend_zigzag_rupees'],
+        'min_percent': config['trend_zigzag_percent']
+    }
+
+
+def evaluate(sample, state, config):
+    """Alerts `sample` raises after state's previous sample: NO_ALERTS or a 1-tuple"""
+    previous = state.previous_rate
+    if previous is None:
+        return NO_ALERTS
+    change = sample.rate - previous
+    change_percent = change / previous * 100 if previous > 0 else 0
+    minutes = (sample.epoch - state.previous_epoch) / 60
+    limits = (config.weekend if sample.is_weekend else config.weekday)[sample.hour]
+    size = change if change >= 0 else -change
+    size_percent = change_percent if change_percent >= 0 else -change_percent
+
+    if size >= limits.rupees or size_percent >= limits.percent:
+        high = size >= config.high_priority_rupees or size_percent >= config.high_priority_percent
+        kind, priority = 'main', 'high' if high else 'normal'
+    elif config.enable_micro and size >= limits.micro_rupees:
+        kind, priority = 'micro', 'low'
+    elif config.enable_rapid and minutes <= config.rapid_window_minutes and size >= config.rapid_rupees:
+        kind, priority = 'rapid', 'high'
+    elif config.enable_trend and state.reversal and size >= config.trend_rupees:
+        kind, priority = 'trend', 'normal'
+    elif (config.enable_stability and change == 0 and minutes >= config.stability_minutes
+          and limits.period in STABILITY_PERIODS):
+        kind, priority = 'stability', 'low'
+    else:
+        return NO_ALERTS
+    return (Alert(kind, priority, limits.period, change, change_percent, minutes, limits.rupees, state.reversal),)
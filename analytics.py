@@ -0,0 +1,270 @@
+"""
+🧮 RATE ANALYTICS
+History metrics over two aligned columns: int64 epoch microseconds and float64
+rates (the store's ts.i64 and rate.f64, so loading costs no parsing).
+
+With NumPy installed every metric is vectorized. Without it the same
+arithmetic runs in plain Python, and both backends give identical results.
+Sums are taken over integer paise rather than floats, so they are exact and do
+not depend on summation order. Each result then comes from one final
+division or square root, which IEEE rounds the same way everywhere.
+
+  mean / std_dev / percentiles / summary   statistics over the series (exact quantiles)
+  moving_average(w)                        mean of every w consecutive samples
+  rolling_volatility(w)                    std dev of the rupee change over every w consecutive changes
+  change_since / high_low / trend          time-window metrics via binary search on the epochs
+
+Samples with no rate (NaN) are dropped. Exactness holds while window sums stay
+below 2**53 paise, i.e. for any realistic rate and window.
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the pure-Python backend computes the same results
+    np = None
+
+BACKEND = 'numpy' if np is not None else 'python'
+ANALYTICS_WINDOWS = (12, 48)        # Sample windows for the published moving average and volatility
+PUBLISHED_PERCENTILES = (5, 10, 90, 95)
+_SQUARES_CHUNK = 1 << 16            # Rows per int64 dot product (keeps squared paise deviations from overflowing)
+
+
+class RateSeries:
+    """Valid samples in time order, with metrics computed by the chosen backend"""
+
+    def __init__(self, epochs_us, rates, backend=BACKEND):
+        if backend == 'numpy' and np is None:
+            raise ImportError("NumPy is not installed; use backend='python'")
+        self.backend = backend
+
+        if backend == 'numpy':
+            epochs = np.asarray(epochs_us, dtype=np.int64)
+            values = np.asarray(rates, dtype=np.float64)
+            valid = ~np.isnan(values)
+            if not valid.all():
+                epochs, values = epochs[valid], values[valid]
+            if len(epochs) > 1 and bool((epochs[1:] < epochs[:-1]).any()):
+                order = np.argsort(epochs, kind='stable')
+                epochs, values = epochs[order], values[order]
+            self.epochs, self.rates = epochs, values
+            self.paise = np.rint(values * 100).astype(np.int64)
+        else:
+            pairs = [(int(epoch), float(rate)) for epoch, rate in zip(epochs_us, rates)
+                     if isinstance(rate, (int, float)) and rate == rate]
+            if any(pairs[i + 1][0] < pairs[i][0] for i in range(len(pairs) - 1)):
+                pairs.sort(key=lambda pair: pair[0])
+            self.epochs = [epoch for epoch, _ in pairs]
+            self.rates = [rate for _, rate in pairs]
+            self.paise = [round(rate * 100) for rate in self.rates]
+
+    @classmethod
+    def from_store(cls, store, last=None, backend=BACKEND):
+        """Newest `last` rows (or all) straight from the store's binary columns"""
+        epochs_us, rates, _ = store.read_columns(last)
+        return cls(epochs_us, rates, backend)
+
+    @classmethod
+    def from_snapshot(cls, history, backend=BACKEND):
+        """The rows of a HistorySnapshot (including entries added but not yet flushed)"""
+        epochs_us = [round(epoch * 1_000_000) for epoch in history.epochs]
+        rates = [entry.get('rate') if isinstance(entry.get('rate'), (int, float)) else float('nan')
+                 for entry in history.entries]
+        return cls(epochs_us, rates, backend)
+
+    def __len__(self):
+        return len(self.epochs)
+
+    def tail(self, count):
+        """The newest `count` samples as a series (a view, not a copy, with NumPy)"""
+        view = RateSeries.__new__(RateSeries)
+        view.backend = self.backend
+        start = max(0, len(self) - count)
+        view.epochs, view.rates, view.paise = self.epochs[start:], self.rates[start:], self.paise[start:]
+        return view
+
+    # ------------------------------------------------------------------ time windows
+
+    def _bisect(self, epoch_us, side):
+        if self.backend == 'numpy':
+            return int(np.searchsorted(self.epochs, epoch_us, side=side))
+        return (bisect_left if side == 'left' else bisect_right)(self.epochs, epoch_us)
+
+    def _window(self, start_us, end_us=None):
+        """(lo, hi) index range of samples with start <= time <= end"""
+        hi = len(self) if end_us is None else self._bisect(end_us, 'right')
+        return self._bisect(start_us, 'left'), hi
+
+    def avg_interval_minutes(self):
+        """Average gap between samples (the mean of consecutive gaps telescopes to span / gaps)"""
+        if len(self) < 2:
+            return None
+        return round((int(self.epochs[-1]) - int(self.epochs[0])) / 60_000_000 / (len(self) - 1), 1)
+
+    def change_since(self, now_us, hours):
+        """Newest rate minus the newest earlier one at least `hours` old (0 when there is none)"""
+        if len(self) < 2:
+            return 0
+        index = min(self._bisect(now_us - round(hours * 3_600_000_000), 'right'), len(self) - 1) - 1
+        if index < 0:
+            return 0
+        return round(float(self.rates[-1]) - float(self.rates[index]), 2)
+
+    def high_low(self, start_us, end_us=None):
+        """(highest, lowest) rate in the window, or (None, None)"""
+        lo, hi = self._window(start_us, end_us)
+        if lo >= hi:
+            return None, None
+        window = self.rates[lo:hi]
+        return float(max(window) if self.backend == 'python' else window.max()), \
+            float(min(window) if self.backend == 'python' else window.min())
+
+    def trend(self, start_us, end_us=None):
+        """Opening, current, high, low and change over a window (e.g. the last hour), or None"""
+        lo, hi = self._window(start_us, end_us)
+        if lo >= hi:
+            return None
+        high, low = self.high_low(start_us, end_us)
+        opening, current = float(self.rates[lo]), float(self.rates[hi - 1])
+        return {
+            'count': hi - lo,
+            'opening': opening,
+            'current': current,
+            'high': high,
+            'low': low,
+            'change': round(current - opening, 2),
+            'change_percent': round((current - opening) / opening * 100, 3) if opening else 0,
+            'range': round(high - low, 2)
+        }
+
+    # ------------------------------------------------------------------ distribution
+
+    def _sum_paise(self):
+        return int(self.paise.sum()) if self.backend == 'numpy' else sum(self.paise)
+
+    def _sum_squared_deviations(self, origin):
+        """Σ (paise - origin)² as an exact integer"""
+        if self.backend == 'numpy':
+            total = 0
+            for start in range(0, len(self.paise), _SQUARES_CHUNK):
+                deviations = self.paise[start:start + _SQUARES_CHUNK] - origin
+                total += int(np.dot(deviations, deviations))
+            return total
+        return sum((value - origin) * (value - origin) for value in self.paise)
+
+    def mean(self):
+        if not len(self):
+            return None
+        return self._sum_paise() / (len(self) * 100)
+
+    def std_dev(self):
+        """Population standard deviation of the rate"""
+        n = len(self)
+        if not n:
+            return None
+        origin = int(self.paise[0])  # Shifting keeps the squares small; the variance is unchanged
+        total = self._sum_paise() - n * origin
+        squares = self._sum_squared_deviations(origin)
+        return math.sqrt((n * squares - total * total) / (n * n)) / 100
+
+    def percentiles(self, ps):
+        """{p: value} for percentiles 0-100, linearly interpolated like aggregates.exact_quantile"""
+        n = len(self)
+        if not n:
+            return {p: None for p in ps}
+        positions = {p: (n - 1) * p / 100 for p in ps}
+        ranks = sorted({k for position in positions.values() for k in (math.floor(position), math.ceil(position))})
+        if self.backend == 'numpy':
+            selected = np.partition(self.rates, ranks)  # O(n) selection instead of a full sort
+            value_at = {k: float(selected[k]) for k in ranks}
+        else:
+            ordered = sorted(self.rates)
+            value_at = {k: ordered[k] for k in ranks}
+        result = {}
+        for p, position in positions.items():
+            lower, upper = math.floor(position), math.ceil(position)
+            result[p] = value_at[lower] + (value_at[upper] - value_at[lower]) * (position - lower)
+        return result
+
+    def summary(self):
+        """Whole-history statistics in the shape of RunningStats.summary(), with exact quantiles"""
+        if not len(self):
+            return None
+        quartiles = self.percentiles((25, 50, 75))
+        highest = float(max(self.rates) if self.backend == 'python' else self.rates.max())
+        lowest = float(min(self.rates) if self.backend == 'python' else self.rates.min())
+        return {
+            'highest': highest,
+            'lowest': lowest,
+            'average': round(self.mean(), 2),
+            'median': round(quartiles[50], 2),
+            'p25': round(quartiles[25], 2),
+            'p75': round(quartiles[75], 2),
+            'volatility': round(highest - lowest, 2),
+            'std_dev': round(self.std_dev(), 2)
+        }
+
+    # ------------------------------------------------------------------ rolling windows
+
+    def _windowed_sums(self, values, window):
+        """Sums of every `window` consecutive values (exact integers)"""
+        if self.backend == 'numpy':
+            cumulative = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(values, dtype=np.int64)))
+            return cumulative[window:] - cumulative[:-window]
+        cumulative = [0] + list(accumulate(values))
+        return [cumulative[i + window] - cumulative[i] for i in range(len(cumulative) - window)]
+
+    def moving_average(self, window):
+        """Mean rate of every `window` consecutive samples (len - window + 1 values, oldest first)"""
+        if window < 1 or len(self) < window:
+            return []
+        sums = self._windowed_sums(self.paise, window)
+        if self.backend == 'numpy':
+            return sums / (window * 100)
+        return [total / (window * 100) for total in sums]
+
+    def rolling_volatility(self, window):
+        """Std dev of the sample-to-sample rupee change over every `window` consecutive changes"""
+        if window < 2 or len(self) <= window:
+            return []
+        if self.backend == 'numpy':
+            changes = np.diff(self.paise)
+            sums = self._windowed_sums(changes, window)
+            squares = self._windowed_sums(changes * changes, window)
+            return np.sqrt((window * squares - sums * sums) / (window * window)) / 100
+        changes = [self.paise[i + 1] - self.paise[i] for i in range(len(self.paise) - 1)]
+        sums = self._windowed_sums(changes, window)
+        squares = self._windowed_sums([change * change for change in changes], window)
+        return [math.sqrt((window * s2 - s1 * s1) / (window * window)) / 100 for s1, s2 in zip(sums, squares)]
+
+
+def analytics_summary(series, windows=ANALYTICS_WINDOWS, distribution=None):
+    """
+    The 'analytics' block of stats.json: spread, tail percentiles and the latest rolling values.
+
+    Rolling values only need the newest samples of `series`. Spread and
+    percentiles come from `distribution` when given: anything with len(),
+    std_dev() and percentiles(), e.g. aggregates.RunningStats. That way they
+    agree with the headline quartiles instead of covering another sample set.
+    """
+    distribution = distribution if distribution is not None else series
+    if not len(series) or not len(distribution):
+        return None
+    percentiles = distribution.percentiles(PUBLISHED_PERCENTILES)
+    block = {
+        'samples': len(distribution),
+        'std_dev': round(distribution.std_dev(), 2),
+        'percentiles': {f'p{p}': round(value, 2) for p, value in percentiles.items()},
+        'moving_average': {},
+        'rolling_volatility': {}
+    }
+    for window in windows:
+        recent = series.tail(window + 1)  # Only the newest value of each rolling series is published
+        averages = recent.moving_average(window)
+        volatility = recent.rolling_volatility(window)
+        block['moving_average'][f'last_{window}'] = round(float(averages[-1]), 2) if len(averages) else None
+        block['rolling_volatility'][f'last_{window}'] = round(float(volatility[-1]), 2) if len(volatility) else None
+    return block
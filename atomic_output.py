@@ -0,0 +1,189 @@
+"""
+💾 ATOMIC OUTPUT
+Shared writer for every JSON / HTML / binary file the tracker and site generator publish.
+
+Each write goes to a temp file in the target directory, is fsynced and then
+os.replace()d over the target, so readers (the site, git, a concurrent run)
+see either the old file or the new one, never a truncated one. When the new
+bytes equal what is already on disk the target is left untouched: no write,
+no mtime change, no git churn.
+
+Large arrays can be streamed entry by entry with write_json_streaming(); the
+output is byte-identical to json.dump with the same indent.
+
+Rolling logs (run metrics, scrape attempts) are NDJSON files: append_ndjson()
+appends compact lines and, past a size limit, atomically cuts the file back to
+its newest lines; read_ndjson() returns the newest records.
+"""
+
+import filecmp
+import json
+import os
+import tempfile
+
+# Per-process counters, reported by output_stats_summary()
+OUTPUT_STATS = {'written': 0, 'unchanged': 0, 'bytes_written': 0}
+
+STREAM_PLACEHOLDER = '__atomic_output_stream__'
+STREAM_CHUNK_ENTRIES = 256
+
+
+def output_stats_summary():
+    """One-line summary of files written / skipped by this process"""
+    return (f"{OUTPUT_STATS['written']} written, {OUTPUT_STATS['unchanged']} unchanged, "
+            f"{OUTPUT_STATS['bytes_written']:,} bytes")
+
+
+def fsync_dir(directory):
+    """Persist a directory's entries (renames, new files); no-op where directories cannot be opened"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class _TempFile:
+    """Binary temp file next to `path`, renamed over it by commit()"""
+
+    def __init__(self, path):
+        self.path = path
+        self.directory = os.path.dirname(path) or '.'
+        os.makedirs(self.directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=self.directory)
+        self.file = os.fdopen(fd, 'wb')
+        self.size = 0
+
+    def write(self, data):
+        self.file.write(data)
+        self.size += len(data)
+
+    def commit(self):
+        """fsync and move into place, unless the bytes match the current file; returns True if replaced"""
+        self.file.flush()
+        if (os.path.exists(self.path) and os.path.getsize(self.path) == self.size
+                and filecmp.cmp(self.temp_path, self.path, shallow=False)):
+            self.discard()
+            OUTPUT_STATS['unchanged'] += 1
+            return False
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+        # mkstemp creates 0600 files; publish with the old file's mode or the usual 0644
+        mode = os.stat(self.path).st_mode & 0o777 if os.path.exists(self.path) else 0o644
+        os.chmod(self.temp_path, mode)
+        os.replace(self.temp_path, self.path)
+        fsync_dir(self.directory)
+        OUTPUT_STATS['written'] += 1
+        OUTPUT_STATS['bytes_written'] += self.size
+        return True
+
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()
+        return False
+
+
+def write_bytes(path, data):
+    """Atomically replace `path` with `data` unless it already holds exactly those bytes"""
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                OUTPUT_STATS['unchanged'] += 1
+                return False
+    with _TempFile(path) as temp:
+        temp.write(data)
+        return temp.commit()
+
+
+def write_text(path, text):
+    return write_bytes(path, text.encode('utf-8'))
+
+
+def write_json(path, document, indent=2, compact=False):
+    """json.dump equivalent; compact=True drops all optional whitespace"""
+    if compact:
+        text = json.dumps(document, separators=(',', ':'))
+    else:
+        text = json.dumps(document, indent=indent)
+    return write_text(path, text)
+
+
+def append_ndjson(path, records, max_bytes=None, keep=None):
+    """Append each record as one compact JSON line; past max_bytes, keep only the newest `keep` lines"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(''.join(json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n' for record in records))
+    if max_bytes is not None and os.path.getsize(path) > max_bytes:
+        write_text(path, ''.join(_tail_lines(path, keep)))
+
+
+def read_ndjson(path, last=None):
+    """The newest `last` records of an NDJSON file (all when None; unreadable lines skipped)"""
+    if not os.path.exists(path):
+        return []
+    records = []
+    for line in _tail_lines(path, last):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def _tail_lines(path, count):
+    with open(path, 'r') as f:
+        lines = f.readlines()
+    return lines if count is None else lines[-count:]
+
+
+def write_json_streaming(path, document, stream_key, items, indent=2):
+    """
+    Write `document` with document[stream_key] taken from the iterable `items`,
+    serialized one entry at a time instead of as one in-memory string.
+    """
+    shell = dict(document)
+    shell[stream_key] = STREAM_PLACEHOLDER
+    if indent is None:
+        head, tail = json.dumps(shell, separators=(',', ':')).split(json.dumps(STREAM_PLACEHOLDER), 1)
+        first, joiner, close = '[', ',', ']'
+
+        def encode(item):
+            return json.dumps(item, separators=(',', ':'))
+    else:
+        head, tail = json.dumps(shell, indent=indent).split(json.dumps(STREAM_PLACEHOLDER), 1)
+        # The array sits one level deep, so its entries are indented two levels
+        item_prefix = '\n' + ' ' * (indent * 2)
+        first, joiner, close = '[' + item_prefix, ',' + item_prefix, '\n' + ' ' * indent + ']'
+
+        def encode(item):
+            return json.dumps(item, indent=indent).replace('\n', item_prefix)
+
+    with _TempFile(path) as temp:
+        temp.write(head.encode('utf-8'))
+        chunk = []
+        count = 0
+        for item in items:
+            chunk.append((first if count == 0 else joiner) + encode(item))
+            count += 1
+            if len(chunk) >= STREAM_CHUNK_ENTRIES:
+                temp.write(''.join(chunk).encode('utf-8'))
+                chunk = []
+        if chunk:
+            temp.write(''.join(chunk).encode('utf-8'))
+        temp.write(((close if count else '[]') + tail).encode('utf-8'))
+        return temp.commit()
@@ -0,0 +1,269 @@
+"""
+🧪 ALERT BACKTEST
+Replays archived history through the live alert rules (alert_rules.evaluate and
+the reversal detector) to show how a set of thresholds would have behaved.
+
+The clock is each sample's own timestamp, and alerts go to a NullSender that
+only records them. No wall clock, files or notification APIs are involved.
+Everything that does not depend on the settings (the Sample objects, reversal
+events per detector setting, reference moves) is computed once and shared by
+every configuration. A sweep fans configurations out over worker processes.
+
+Scoring against "reference moves": a move is recorded each time the rate ends
+up at least --move-rupees away from the rate at the previous move.
+
+  recall     moves followed by an alert within --horizon-hours (before the next move)
+  latency    minutes from the move to that first alert (p50/p95)
+  noise      share of alerts that did not detect a new move (stability alerts excluded)
+
+Usage: python backtest.py [--input docs/api/history_bin] [--grid main_rupees=5,10,15 micro_rupees=3,5,off ...]
+"""
+
+import argparse
+import copy
+import itertools
+import math
+import os
+import time
+from bisect import bisect_left
+from multiprocessing import Pool
+
+from aggregates import IST_OFFSET_SECONDS
+from atomic_output import write_json
+from alert_rules import ALERT_KINDS, PERIODS, RuleConfig, RuleState, Sample, detector_settings, evaluate
+from reversal_detector import ReversalDetector
+
+DEFAULT_MOVE_RUPEES = 25      # Size of a move worth being told about
+DEFAULT_HORIZON_HOURS = 3     # Alerts later than this after a move don't count as detecting it
+PERIOD_ALIASES = {
+    'akgsma': ('AKGSMA_MORNING_RUSH',),
+    'trading': ('ACTIVE_TRADING',),
+    'evening': ('EVENING_UPDATE',),
+    'offhours': ('OFF_HOURS',),
+    'main': PERIODS
+}
+SWITCHES = {'micro_rupees': 'enable_micro', 'rapid_rupees': 'enable_rapid', 'trend_rupees': 'enable_trend',
+            'stability_minutes': 'enable_stability'}
+
+
+class NullSender:
+    """Stands in for the notification channels: records what would have been sent"""
+
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, index, kind, priority):
+        self.alerts.append((index, kind, priority))
+
+
+class ReplaySamples:
+    """Valid samples with everything the rules need that does not depend on the settings"""
+
+    def __init__(self, epochs, rates):
+        rows = sorted((epoch, rate) for epoch, rate in zip(epochs, rates)
+                      if isinstance(rate, (int, float)) and not math.isnan(rate))
+        self.epochs = [epoch for epoch, _ in rows]
+        self.rates = [rate for _, rate in rows]
+        self.samples = []
+        for epoch, rate in rows:
+            seconds = int(epoch) + IST_OFFSET_SECONDS
+            # 1970-01-01 was a Thursday
+            self.samples.append(Sample(epoch, rate, seconds % 86400 // 3600, (seconds // 86400 + 3) % 7 >= 5))
+        self._reversals = {}
+
+    def __len__(self):
+        return len(self.epochs)
+
+    @classmethod
+    def from_store(cls):
+        from history_store import HistoryStore
+        epochs_us, rates, _ = HistoryStore(retention=None).read_columns()
+        return cls([value / 1_000_000 for value in epochs_us], rates)
+
+    @classmethod
+    def from_columnar(cls, path):
+        from columnar_export import load_columnar, load_columnar_shards
+        history = load_columnar_shards(path) if os.path.isdir(path) else load_columnar(path)
+        return cls(history.epochs(), [rate if rate is not None else float('nan') for rate in history.rates()])
+
+    def days(self):
+        return max(1.0, (self.epochs[-1] - self.epochs[0]) / 86400) if self.epochs else 1.0
+
+    def reversals(self, config):
+        """{sample index: "up → down"} confirmed by the detector (cached per detector setting)"""
+        settings = detector_settings(config)
+        key = tuple(sorted(settings.items()))
+        if key not in self._reversals:
+            events = ReversalDetector(**settings).ingest(self.epochs, self.rates)
+            self._reversals[key] = {bisect_left(self.epochs, event['epoch']): event['label'] for event in events}
+        return self._reversals[key]
+
+    def reference_moves(self, move_rupees):
+        """Indexes where the rate has moved at least `move_rupees` since the previous move"""
+        moves = []
+        anchor = self.rates[0] if self.rates else None
+        for i in range(1, len(self.rates)):
+            if abs(self.rates[i] - anchor) >= move_rupees:
+                moves.append(i)
+                anchor = self.rates[i]
+        return moves
+
+
+def replay(samples, config, sender=None):
+    """Run the live rules over every sample; returns the sender's [(index, kind, priority)]"""
+    sender = sender if sender is not None else NullSender()
+    rules = RuleConfig.from_dict(config)
+    reversals = samples.reversals(config) if config['enable_trend'] else {}
+    state = RuleState()
+
+    for i, sample in enumerate(samples.samples):
+        state.reversal = reversals.get(i)
+        for alert in evaluate(sample, state, rules):
+            sender.send(i, alert.kind, alert.priority)
+        state.advance(sample)
+    return sender.alerts
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))] if ordered else None
+
+
+def score(samples, alerts, moves, horizon_hours=DEFAULT_HORIZON_HOURS):
+    """Alert counts, move recall, detection latency and noise for one replay"""
+    epochs = samples.epochs
+    by_kind = dict.fromkeys(ALERT_KINDS, 0)
+    for _, kind, _ in alerts:
+        by_kind[kind] += 1
+    signal = [index for index, kind, _ in alerts if kind != 'stability']
+
+    latencies, used = [], 0
+    for position, move in enumerate(moves):
+        limit = moves[position + 1] if position + 1 < len(moves) else len(epochs)
+        j = bisect_left(signal, move)
+        if j < len(signal) and signal[j] < limit and epochs[signal[j]] - epochs[move] <= horizon_hours * 3600:
+            latencies.append((epochs[signal[j]] - epochs[move]) / 60)
+            used += 1
+
+    recall = len(latencies) / len(moves) if moves else None
+    noise = 1 - used / len(signal) if signal else 0.0
+    precision = 1 - noise
+    f1 = 2 * precision * recall / (precision + recall) if recall and precision else 0.0
+    return {
+        'alerts': len(alerts),
+        'by_kind': by_kind,
+        'alerts_per_day': round(len(alerts) / samples.days(), 2),
+        'moves': len(moves),
+        'recall': round(recall, 3) if recall is not None else None,
+        'latency_p50_minutes': round(_percentile(latencies, 0.5), 1) if latencies else None,
+        'latency_p95_minutes': round(_percentile(latencies, 0.95), 1) if latencies else None,
+        'noise': round(noise, 3),
+        'f1': round(f1, 3)
+    }
+
+
+# ---------------------------------------------------------------------- sweeps
+
+def apply_setting(config, key, value):
+    """Set one grid axis (e.g. main_rupees, akgsma_percent, micro_rupees, rapid_window_minutes) on a config"""
+    prefix, _, unit = key.rpartition('_')
+    if prefix in PERIOD_ALIASES and unit in ('rupees', 'percent'):
+        for period in PERIOD_ALIASES[prefix]:
+            config['thresholds'][period][unit] = value
+    elif key in SWITCHES and value == 'off':
+        config[SWITCHES[key]] = False
+    elif key in config and value != 'off':
+        config[key] = value
+    else:
+        raise ValueError(f"unknown or invalid grid setting: {key}={value}")
+
+
+def grid(base_config, axes):
+    """[(overrides, config)] for every combination of {key: [values]}"""
+    keys = list(axes)
+    combos = []
+    for values in itertools.product(*(axes[key] for key in keys)):
+        config = copy.deepcopy(base_config)
+        overrides = dict(zip(keys, values))
+        for key, value in overrides.items():
+            apply_setting(config, key, value)
+        combos.append((overrides, config))
+    return combos
+
+
+_WORKER = {}
+
+
+def _init_worker(samples, moves, horizon_hours):
+    _WORKER.update(samples=samples, moves=moves, horizon_hours=horizon_hours)
+
+
+def _evaluate(config):
+    samples = _WORKER['samples']
+    return score(samples, replay(samples, config), _WORKER['moves'], _WORKER['horizon_hours'])
+
+
+def sweep(samples, configs, processes=None, move_rupees=DEFAULT_MOVE_RUPEES, horizon_hours=DEFAULT_HORIZON_HOURS):
+    """Score every config, in parallel across processes; results are in config order"""
+    moves = samples.reference_moves(move_rupees)
+    processes = min(processes or os.cpu_count() or 1, len(configs))
+    if processes <= 1:
+        _init_worker(samples, moves, horizon_hours)
+        return [_evaluate(config) for config in configs]
+    with Pool(processes, initializer=_init_worker, initargs=(samples, moves, horizon_hours)) as pool:
+        return pool.map(_evaluate, configs, chunksize=max(1, len(configs) // (processes * 8)))
+
+
+def _parse_axis(text):
+    key, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected key=v1,v2,...: {text}")
+    return key, [value if value == 'off' else float(value) for value in values.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', help='columnar shard directory (docs/api/history_bin) or one .bin shard to replay '
+                                        '(default: the local history store)')
+    parser.add_argument('--grid', nargs='*', type=_parse_axis, default=[], metavar='KEY=V1,V2',
+                        help='axes to sweep: main_/akgsma_/trading_/evening_/offhours_rupees|percent, micro_rupees, '
+                             'rapid_rupees, rapid_window_minutes, trend_rupees, stability_minutes, high_priority_rupees '
+                             "('off' disables micro/rapid/trend/stability)")
+    parser.add_argument('--move-rupees', type=float, default=DEFAULT_MOVE_RUPEES)
+    parser.add_argument('--horizon-hours', type=float, default=DEFAULT_HORIZON_HOURS)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help='write every configuration and its scores as JSON')
+    args = parser.parse_args()
+
+    from scrape_with_notifications import alert_config
+
+    samples = ReplaySamples.from_columnar(args.input) if args.input else ReplaySamples.from_store()
+    if len(samples) < 2:
+        print("📂 Not enough history to replay")
+        return
+    print(f"🧪 Replaying {len(samples):,} samples over {samples.days():.0f} days")
+
+    base = alert_config()
+    combos = [({}, base)] + grid(base, dict(args.grid)) if args.grid else [({}, base)]
+    started = time.perf_counter()
+    results = sweep(samples, [config for _, config in combos], args.processes, args.move_rupees, args.horizon_hours)
+    elapsed = time.perf_counter() - started
+    print(f"⏱️ {len(combos):,} configuration(s) in {elapsed:.2f}s ({len(combos) / elapsed:,.0f}/s)")
+
+    rows = [(overrides, result) for (overrides, _), result in zip(combos, results)]
+    ranked = [rows[0]] + sorted(rows[1:], key=lambda row: (-row[1]['f1'], row[1]['alerts_per_day']))[:args.top]
+    print(f"{'configuration':<44} │ {'alerts/day':>10} │ {'recall':>6} │ {'p50 min':>7} │ {'p95 min':>7} │ {'noise':>5} │ {'f1':>5}")
+    for overrides, result in ranked:
+        label = ' '.join(f"{key}={value:g}" if value != 'off' else f"{key}=off" for key, value in overrides.items())
+        print(f"{label or '(current settings)':<44} │ {result['alerts_per_day']:>10} │ {str(result['recall']):>6} │ "
+              f"{str(result['latency_p50_minutes']):>7} │ {str(result['latency_p95_minutes']):>7} │ "
+              f"{result['noise']:>5} │ {result['f1']:>5}")
+
+    if args.output:
+        write_json(args.output, [{'settings': overrides, **result} for overrides, result in rows])
+        print(f"💾 Wrote {len(rows)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+⏱️ SUBSCRIBER ALERT ENGINE BENCHMARK
+Time to decide which subscribers one sample alerts. The indexed engine is
+compared with checking every subscriber's thresholds in turn, and both must
+pick the same subscribers at the same priority.
+
+Subscribers get random thresholds around the tracker defaults, and some of
+them have no percent or micro rule. Samples follow a typical scrape mix: most
+find the rate unchanged or moved by a few rupees, and a few see ₹25-60 moves.
+The work left after the index lookup is one alert per fired subscriber, so the
+gain is largest on the quiet samples that make up most scrapes.
+
+Usage: python benchmarks/bench_alert_engine.py [--subscribers 1000 10000 100000] [--samples 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from subscriptions import MICRO_PERIODS, PERIODS, AlertEngine, resolve  # noqa: E402
+
+DEFAULTS = {
+    'thresholds': {
+        'AKGSMA_MORNING_RUSH': {'rupees': 10, 'percent': 0.1},
+        'ACTIVE_TRADING': {'rupees': 15, 'percent': 0.15},
+        'EVENING_UPDATE': {'rupees': 10, 'percent': 0.1},
+        'OFF_HOURS': {'rupees': 20, 'percent': 0.2}
+    },
+    'micro_rupees': 5,
+    'high_priority': {'rupees': 25, 'percent': 0.5},
+    'gram_quantities': [2, 5, 8, 10],
+    'weekend_reduced_sensitivity': True,
+    'weekend_multiplier': 2.0
+}
+
+
+MOVES = [0, 1, 2, 5, 8, 10, 15, 25, 40, 60]
+MOVE_WEIGHTS = [60, 8, 8, 8, 5, 4, 3, 2, 1, 1]
+
+
+def random_subscribers(count, rng):
+    subscribers = []
+    for i in range(count):
+        thresholds = {period: {'rupees': rng.randint(3, 60),
+                               'percent': None if rng.random() < 0.3 else round(rng.uniform(0.05, 0.6), 2)}
+                      for period in PERIODS if rng.random() < 0.7}
+        subscribers.append({
+            'id': f"user{i}",
+            'channels': {'ntfy': f"topic{i}"},
+            'thresholds': thresholds,
+            'micro_rupees': None if rng.random() < 0.5 else rng.randint(1, 10),
+            'weekend_reduced_sensitivity': rng.random() < 0.8
+        })
+    return subscribers
+
+
+def brute_force(resolved, change, change_percent, period, weekend, multiplier):
+    """The per-subscriber loop the engine replaces"""
+    change, change_percent = abs(change), abs(change_percent)
+    fired = {}
+    for subscriber in resolved:
+        scale = multiplier if weekend and subscriber['weekend_reduced_sensitivity'] else 1.0
+        levels = subscriber['thresholds'][period]
+        rupees, percent = levels.get('rupees'), levels.get('percent')
+        if (rupees is not None and change >= rupees * scale) or (percent is not None and change_percent >= percent * scale):
+            high = subscriber['high_priority']
+            fired[subscriber['id']] = 'high' if change >= high['rupees'] or change_percent >= high['percent'] else 'normal'
+        elif period in MICRO_PERIODS and subscriber['micro_rupees'] is not None and change >= subscriber['micro_rupees']:
+            fired[subscriber['id']] = 'low'
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    samples = []
+    for _ in range(args.samples):
+        change = rng.choice([-1, 1]) * rng.choices(MOVES, MOVE_WEIGHTS)[0]
+        samples.append((change, change / 97.42, rng.choice(PERIODS), rng.random() < 2 / 7))
+
+    print(f"{'subscribers':>11} │ {'build ms':>8} │ {'loop µs/sample':>14} │ {'index µs/sample':>15} │ "
+          f"{'avg fired':>9} │ {'speed-up':>8}")
+    for count in args.subscribers:
+        subscribers = random_subscribers(count, rng)
+        resolved = [resolve(subscriber, DEFAULTS) for subscriber in subscribers]
+
+        started = time.perf_counter()
+        engine = AlertEngine(subscribers, DEFAULTS)
+        for period in PERIODS:
+            for weekend in (False, True):
+                engine._indexes(period, weekend)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = [brute_force(resolved, *sample, DEFAULTS['weekend_multiplier']) for sample in samples]
+        loop = (time.perf_counter() - started) / len(samples)
+
+        started = time.perf_counter()
+        results = [engine.evaluate(*sample) for sample in samples]
+        indexed = (time.perf_counter() - started) / len(samples)
+
+        for want, alerts in zip(expected, results):
+            got = {alert['subscriber']['id']: alert['priority'] for alert in alerts}
+            assert got == want, "engine and loop disagree"
+        fired = sum(len(alerts) for alerts in results) / len(results)
+        print(f"{count:>11,} │ {build * 1000:>8.0f} │ {loop * 1e6:>14,.0f} │ {indexed * 1e6:>15,.0f} │ "
+              f"{fired:>9,.0f} │ {loop / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
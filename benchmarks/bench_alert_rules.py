@@ -0,0 +1,80 @@
+"""
+⏱️ ALERT RULES BENCHMARK
+Evaluations per second (and per minute) of alert_rules.evaluate() over a
+stream of samples, with the state advanced after each one, which is the
+same loop that replay, multi-user routing and daemon mode run.
+
+Samples follow a typical scrape mix: most find the rate unchanged or moved by a
+few rupees, a few see ₹25-60 moves, and one in twenty is flagged as a
+confirmed reversal. Settings are the tracker's own (alert_config()).
+
+Usage: python benchmarks/bench_alert_rules.py [--samples 1000000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from aggregates import IST_OFFSET_SECONDS  # noqa: E402
+from alert_rules import RuleConfig, RuleState, Sample, evaluate  # noqa: E402
+from scrape_with_notifications import alert_config  # noqa: E402
+
+START_EPOCH = 1_700_000_000
+MOVES = [0, 1, 2, 5, 8, 10, 15, 25, 40, 60]
+MOVE_WEIGHTS = [60, 8, 8, 8, 5, 4, 3, 2, 1, 1]
+GAPS_MINUTES = [5, 15, 30, 180]
+
+
+def random_stream(count, rng):
+    """[(Sample, reversal label or None)] on a random walk"""
+    stream, epoch, rate = [], START_EPOCH, 9500.0
+    for _ in range(count):
+        epoch += rng.choice(GAPS_MINUTES) * 60
+        rate = max(1000.0, rate + rng.choice((-1, 1)) * rng.choices(MOVES, MOVE_WEIGHTS)[0])
+        local = epoch + IST_OFFSET_SECONDS
+        sample = Sample(epoch, rate, local % 86400 // 3600, (local // 86400 + 3) % 7 >= 5)
+        stream.append((sample, 'up → down' if rng.random() < 0.05 else None))
+    return stream
+
+
+def run(stream, config):
+    state = RuleState()
+    fired = Counter()
+    for sample, reversal in stream:
+        state.reversal = reversal
+        for alert in evaluate(sample, state, config):
+            fired[alert.kind] += 1
+        state.advance(sample)
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    stream = random_stream(args.samples, random.Random(7))
+    config = RuleConfig.from_dict(alert_config())
+
+    best, fired = None, None
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        fired = run(stream, config)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    rate = args.samples / best
+    print(f"🚦 {args.samples:,} evaluations in {best:.2f}s (best of {args.repeat}): "
+          f"{rate / 1e6:.2f}M/s, {rate * 60 / 1e6:,.0f}M/min, {best / args.samples * 1e9:.0f} ns each")
+    print(f"📊 Alerts: {dict(fired)} ({sum(fired.values()) / args.samples:.1%} of samples)")
+
+
+if __name__ == "__main__":
+    main()
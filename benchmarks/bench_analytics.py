@@ -0,0 +1,112 @@
+"""
+⏱️ ANALYTICS BACKEND BENCHMARK
+Time to compute the stats.json analytics (summary, tail percentiles, moving
+averages, rolling volatility) and the time-window metrics (24h change, daily
+high/low, last-hour trend), with the NumPy backend and the pure-Python
+fallback. Both run on the same synthetic columns, and every result must match
+exactly.
+
+  load      build the RateSeries from int64/float64 columns
+  summary   summary() + analytics_summary()
+  windows   change_since(24h), high_low(today), trend(last hour)
+  rolling   full moving_average(48) and rolling_volatility(48) series
+
+The pure-Python backend is skipped above --python-max rows (10M rows of Python
+ints need several GB).
+
+Usage: python benchmarks/bench_analytics.py [--sizes 10000,100000,1000000,10000000] [--python-max 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from analytics import RateSeries, analytics_summary, np  # noqa: E402
+
+START_EPOCH = 1_700_000_000
+
+
+def synthetic_columns(rows, seed=11):
+    """Random-walk rates (some missing) scraped every 15-180 minutes"""
+    rng = random.Random(seed)
+    epochs_us, rates = array('q'), array('d')
+    epoch, rate = START_EPOCH, 9500.0
+    for _ in range(rows):
+        epoch += rng.choice((900, 1800, 10800))
+        rate = max(1000.0, rate + rng.choice((-15, -5, -0.5, 0, 0, 0, 0.5, 5, 15)))
+        epochs_us.append(epoch * 1_000_000)
+        rates.append(float('nan') if rng.random() < 0.001 else rate)
+    return epochs_us, rates
+
+
+def run(columns, backend):
+    timings, results = {}, {}
+    started = time.perf_counter()
+    series = RateSeries(*columns, backend=backend)
+    timings['load'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results['summary'] = series.summary()
+    results['analytics'] = analytics_summary(series)
+    timings['summary'] = time.perf_counter() - started
+
+    now_us = int(series.epochs[-1]) + 600_000_000
+    started = time.perf_counter()
+    results['change_24h'] = series.change_since(now_us, 24)
+    results['today'] = series.high_low(now_us - 86_400_000_000)
+    results['hour'] = series.trend(now_us - 3_600_000_000)
+    timings['windows'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    averages = series.moving_average(48)
+    volatility = series.rolling_volatility(48)
+    timings['rolling'] = time.perf_counter() - started
+    results['rolling'] = (averages, volatility)
+    return timings, results
+
+
+def same_rolling(a, b):
+    """Element-for-element equality of two series (NumPy arrays or lists)"""
+    return all(len(x) == len(y) and all(float(p) == float(q) for p, q in zip(x, y)) for x, y in zip(a, b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000,10000000')
+    parser.add_argument('--python-max', type=int, default=1_000_000)
+    args = parser.parse_args()
+    if np is None:
+        print("⚠️ NumPy is not installed - only the pure-Python backend will run")
+
+    phases = ('load', 'summary', 'windows', 'rolling')
+    print(f"{'rows':>10} │ {'backend':<7} │ " + " │ ".join(f"{phase + ' ms':>11}" for phase in phases) + " │ identical")
+    for rows in (int(size) for size in args.sizes.split(',')):
+        columns = synthetic_columns(rows)
+        runs = {}
+        if np is not None:
+            runs['numpy'] = run(columns, 'numpy')
+        if rows <= args.python_max:
+            runs['python'] = run(columns, 'python')
+
+        identical = '-'
+        if len(runs) == 2:
+            a, b = runs['numpy'][1], runs['python'][1]
+            identical = all(a[key] == b[key] for key in ('summary', 'analytics', 'change_24h', 'today', 'hour'))
+            identical = '✅' if identical and same_rolling(a['rolling'], b['rolling']) else '❌'
+        for backend, (timings, _) in runs.items():
+            print(f"{rows:>10,} │ {backend:<7} │ " + " │ ".join(f"{timings[phase] * 1000:>11,.1f}" for phase in phases)
+                  + f" │ {identical}")
+        if len(runs) == 2:
+            python_total = sum(runs['python'][0].values()) - runs['python'][0]['load']
+            numpy_total = sum(runs['numpy'][0].values()) - runs['numpy'][0]['load']
+            print(f"{'':>10} │ {'':<7} │ compute speed-up (excl. load): {python_total / numpy_total:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
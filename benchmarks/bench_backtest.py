@@ -0,0 +1,80 @@
+"""
+⏱️ BACKTEST SWEEP BENCHMARK
+Configurations replayed per second by backtest.sweep() over a synthetic
+history scraped on the live cadence (every 15 min in AKGSMA/evening hours,
+30 min in trading hours, 3 h off hours).
+
+The grid crosses main thresholds, micro, rapid and trend settings. The run
+is repeated with 1 process and with every CPU to show the multiprocessing
+speed-up.
+
+Usage: python benchmarks/bench_backtest.py [--days 365] [--processes 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from aggregates import IST_OFFSET_SECONDS  # noqa: E402
+from backtest import ReplaySamples, grid, sweep  # noqa: E402
+from scrape_with_notifications import alert_config  # noqa: E402
+
+START_EPOCH = 1_700_000_000 - (1_700_000_000 + IST_OFFSET_SECONDS) % 86400  # IST midnight
+
+GRID = {
+    'main_rupees': [5, 10, 15, 20, 25, 30],
+    'main_percent': [0.1, 0.2, 0.5],
+    'micro_rupees': [3, 5, 8, 'off'],
+    'rapid_rupees': [5, 10, 'off'],
+    'trend_rupees': [5, 10, 'off']
+}
+
+
+def synthetic_samples(days, seed=5):
+    """Random-walk rates on the live scrape cadence, with flat stretches"""
+    rng = random.Random(seed)
+    epochs, rates = [], []
+    epoch, rate, end = START_EPOCH, 9500.0, START_EPOCH + days * 86400
+    while epoch < end:
+        hour = (epoch + IST_OFFSET_SECONDS) % 86400 // 3600
+        step = 900 if 9 <= hour < 11 or 18 <= hour < 19 else 1800 if 11 <= hour < 18 else 10800
+        epoch += step
+        if rng.random() < 0.35:
+            rate = max(1000.0, rate + rng.choice((-40, -25, -15, -10, -5, 5, 10, 15, 25, 40)))
+        epochs.append(epoch)
+        rates.append(rate)
+    return ReplaySamples(epochs, rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    samples = synthetic_samples(args.days)
+    prepare = time.perf_counter() - started
+    configs = [config for _, config in grid(alert_config(), GRID)]
+    print(f"🧪 {len(samples):,} samples ({args.days} days), {len(configs):,} configurations, "
+          f"prepared in {prepare * 1000:.0f} ms")
+
+    baseline = None
+    for processes in sorted({1, args.processes}):
+        started = time.perf_counter()
+        results = sweep(samples, configs, processes)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or results
+        assert results == baseline, "parallel sweep disagrees with the single-process run"
+        best = max(results, key=lambda result: result['f1'])
+        print(f"⚙️ {processes} process(es): {elapsed:.2f}s, {len(configs) / elapsed:,.0f} configs/s, "
+              f"{len(samples) * len(configs) / elapsed / 1e6:.1f}M sample evaluations/s (best f1 {best['f1']})")
+
+
+if __name__ == "__main__":
+    main()
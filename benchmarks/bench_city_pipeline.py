@@ -0,0 +1,167 @@
+"""
+⏱️ CITY PIPELINE BENCHMARK
+Wall time to collect 24K/22K/18K and silver rates for --cities cities from
+two sources on the pipeline's real per-host schedule (PER_HOST_CONCURRENCY
+requests in flight, starts HOST_MIN_INTERVAL_SECONDS apart, nothing
+overridden). The table pages (SOURCES: one page per source and page kind)
+are compared with one page per city (CITY_PAGE_SOURCES).
+
+Two local stub servers stand in for the two sources, so they count as two
+hosts. Each answers after --latency seconds with a city rate table
+(fixtures/city_table_*.html), or for a city page the saved Kerala page (or a
+small silver page), and sends an ETag. The cold run fetches every page. The
+warm run repeats it with the stored validators, so every page comes back as a
+304 with the same rates (it starts by waiting out the gap the cold run left
+on each host). The table rates must equal fixtures/city_tables_expected.json.
+
+The per-city layout is only run for --per-city-cities cities (at one page a
+gap per host it takes minutes otherwise); its scheduled minimum for all
+--cities cities is printed next to it.
+
+Usage: python benchmarks/bench_city_pipeline.py [--latency 0.5] [--cities 30] [--per-city-cities 3]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(REPO_ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, REPO_ROOT)
+
+from city_pipeline import (CITIES, HOST_MIN_INTERVAL_SECONDS, MAX_PARALLEL_FETCHES, PER_HOST_CONCURRENCY,  # noqa: E402
+                           CityPipeline, build_jobs)
+from fetch_engine import HttpFetchEngine  # noqa: E402
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+PAGES = {
+    '/gold-rates/': read_fixture('city_table_gold.html'),
+    '/silver-rates/': read_fixture('city_table_silver.html'),
+    '/gold-rate-india.html': read_fixture('city_table_gold.html')
+}
+GOLD_PAGE = read_fixture('kerala_static.html')
+SILVER_PAGE = b'<html><body><p>Silver <span>/g</span></p><p><span>&#x20b9;128.50</span></p></body></html>'
+LATENCY = [0.5]
+
+
+class StubSourceHandler(BaseHTTPRequestHandler):
+    """Serves the table and city pages after a fixed delay, with an ETag for conditional GETs"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(LATENCY[0])
+        body = PAGES.get(self.path) or (SILVER_PAGE if 'silver' in self.path else GOLD_PAGE)
+        etag = f'"{len(body)}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubSourceHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def scheduled_minimum(jobs, latency):
+    """Least wall time the per-host gates allow: the busiest host's last start plus one page"""
+    busiest = max(Counter(urlsplit(job['url']).netloc for job in jobs).values())
+    return (busiest - 1) // PER_HOST_CONCURRENCY * HOST_MIN_INTERVAL_SECONDS + latency
+
+
+def run_layout(jobs):
+    """(cold seconds, warm seconds, cold results, warm results) on a fresh engine with the default schedule"""
+    pipeline = CityPipeline(HttpFetchEngine(cache_file=None))
+    with contextlib.redirect_stdout(io.StringIO()):  # HttpFetchEngine logs every page
+        started = time.perf_counter()
+        cold = pipeline.run(jobs)
+        middle = time.perf_counter()
+        warm = pipeline.run(jobs)
+        ended = time.perf_counter()
+    assert [result['rates'] for result in warm] == [result['rates'] for result in cold], \
+        "304 path returned different rates"
+    assert all(result['status'] == 'not_modified' for result in warm), "warm run refetched a page"
+    return middle - started, ended - middle, cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds per page')
+    parser.add_argument('--cities', type=int, default=len(CITIES))
+    parser.add_argument('--per-city-cities', type=int, default=3, help='cities fetched with one page per city')
+    args = parser.parse_args()
+    LATENCY[0] = args.latency
+
+    first, second = start_server(), start_server()
+    first_host, second_host = (f'http://127.0.0.1:{server.server_port}' for server in (first, second))
+    tables = {
+        'first': {'gold': f'{first_host}/gold-rates/', 'silver': f'{first_host}/silver-rates/'},
+        'second': {'gold': f'{second_host}/gold-rate-india.html'}
+    }
+    city_pages = {
+        'first': {'gold': f'{first_host}/gold-rates/{{city}}.html',
+                  'silver': f'{first_host}/silver-rates/{{city}}.html'},
+        'second': {'gold': f'{second_host}/gold-rate-{{city}}.html'}
+    }
+    cities = CITIES[:args.cities]
+    print(f"🏙️ {len(cities)} cities, 2 hosts, {args.latency}s per page; {MAX_PARALLEL_FETCHES} workers, "
+          f"{PER_HOST_CONCURRENCY} per host, {HOST_MIN_INTERVAL_SECONDS * 1000:.0f} ms between starts")
+
+    with open(os.path.join(FIXTURES, 'city_tables_expected.json')) as f:
+        expected = json.load(f)
+    table_jobs = build_jobs(cities, tables)
+    cold, warm, results, _ = run_layout(table_jobs)
+    for result in results:
+        assert result['status'] == 'ok', f"{result['url']}: {result['status']} {result['error']}"
+        assert result['rates'] == {city: expected[result['kind']][city] for city in cities}, \
+            f"{result['url']}: rates differ from city_tables_expected.json"
+
+    per_city_jobs = build_jobs(cities[:args.per_city_cities], city_pages)
+    city_cold, city_warm, _, _ = run_layout(per_city_jobs)
+    all_city_jobs = build_jobs(cities, city_pages)
+
+    print(f"{'layout':<30} │ {'pages':>5} │ {'cold s':>7} │ {'warm s':>7} │ {'schedule min s':>14}")
+    rows = (
+        ('table pages', len(table_jobs), f"{cold:>7.2f}", f"{warm:>7.2f}", scheduled_minimum(table_jobs, args.latency)),
+        (f'one page per city ({args.per_city_cities} cities)', len(per_city_jobs), f"{city_cold:>7.2f}",
+         f"{city_warm:>7.2f}", scheduled_minimum(per_city_jobs, args.latency)),
+        (f'one page per city ({len(cities)} cities)', len(all_city_jobs), f"{'-':>7}", f"{'-':>7}",
+         scheduled_minimum(all_city_jobs, args.latency))
+    )
+    for label, pages, cold_text, warm_text, minimum in rows:
+        print(f"{label:<30} │ {pages:>5} │ {cold_text} │ {warm_text} │ {minimum:>14.2f}")
+
+    first.shutdown()
+    second.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+⏱️ COLUMNAR EXPORT BENCHMARK
+File size and load time of the columnar .bin format (columnar_export.py) vs the
+pretty-printed history.json, on synthetic history at several sizes.
+
+  json load      json.load of the file
+  json columns   json.load plus turning entries into epoch/rate lists (what analytics jobs do)
+  bin view       read the file and map its columns (zero-copy memoryviews)
+  bin columns    bin view plus decoding epoch/rate lists
+
+Usage: python benchmarks/bench_columnar_export.py [--sizes 500,50000,1000000] [--reps 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from columnar_export import encode_columnar, load_columnar  # noqa: E402
+from history_store import IST, PERIOD_CODES, unpack_entry  # noqa: E402
+
+START_EPOCH = 1_700_000_000
+
+
+def synthetic_columns(rows, seed=7):
+    """Random-walk rates scraped every 15-180 minutes"""
+    rng = random.Random(seed)
+    epochs_us, rates, periods = array('q'), array('d'), array('B')
+    epoch, rate = START_EPOCH, 9500.0
+    for _ in range(rows):
+        epoch += rng.choice((900, 1800, 10800))
+        rate = max(1000.0, rate + rng.choice((-15, -5, 0, 0, 0, 5, 15)))
+        epochs_us.append(epoch * 1_000_000)
+        rates.append(rate)
+        periods.append(rng.randrange(1, len(PERIOD_CODES)))
+    return epochs_us, rates, periods
+
+
+def write_history_json(path, columns):
+    """Stream the same rows out in history.json's shape (indent=2) without holding them all"""
+    epochs_us, rates, periods = columns
+    with open(path, 'w') as f:
+        f.write('{\n  "data": [')
+        for i in range(len(epochs_us)):
+            moment = datetime.fromtimestamp(epochs_us[i] // 1_000_000, IST).isoformat()
+            entry = unpack_entry({'rate': rates[i], 'timestamp': moment, 'market_period': PERIOD_CODES[periods[i]],
+                                  'is_weekend': False})
+            body = json.dumps(entry, indent=2).replace('\n', '\n    ')
+            f.write(('\n    ' if i == 0 else ',\n    ') + body)
+        f.write('\n  ],\n  "metadata": {\n    "total_entries": %d\n  }\n}' % len(epochs_us))
+
+
+def json_load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def json_columns(path):
+    data = json_load(path)['data']
+    epochs = [datetime.fromisoformat(entry['timestamp']).timestamp() for entry in data]
+    rates = [entry['rate'] for entry in data]
+    return epochs, rates
+
+
+def bin_view(path):
+    return load_columnar(path)
+
+
+def bin_columns(path):
+    history = load_columnar(path)
+    return history.epochs(), history.rates()
+
+
+def median_seconds(func, path, reps):
+    samples = []
+    for _ in range(reps):
+        started = time.perf_counter()
+        result = func(path)
+        samples.append(time.perf_counter() - started)
+        del result
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,50000,1000000')
+    parser.add_argument('--reps', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} │ {'json MB':>8} {'load ms':>9} {'cols ms':>9} │ {'bin MB':>7} {'view ms':>8} {'cols ms':>8} │ "
+          f"{'size':>6} {'cols':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(size) for size in args.sizes.split(',')):
+            columns = synthetic_columns(rows)
+            json_path = os.path.join(tmp, 'history.json')
+            bin_path = os.path.join(tmp, 'history.bin')
+            write_history_json(json_path, columns)
+            with open(bin_path, 'wb') as f:
+                f.write(encode_columnar(*columns))
+
+            reps = args.reps if rows <= 100_000 else 1
+            decoded = bin_columns(bin_path)
+            assert decoded[0] == [value // 1_000_000 for value in columns[0]] and decoded[1] == list(columns[1])
+
+            json_size, bin_size = os.path.getsize(json_path), os.path.getsize(bin_path)
+            timings = [median_seconds(func, path, reps) for func, path in (
+                (json_load, json_path), (json_columns, json_path), (bin_view, bin_path), (bin_columns, bin_path)
+            )]
+            print(f"{rows:>9,} │ {json_size / 1e6:>8.2f} {timings[0] * 1000:>9.1f} {timings[1] * 1000:>9.1f} │ "
+                  f"{bin_size / 1e6:>7.3f} {timings[2] * 1000:>8.2f} {timings[3] * 1000:>8.1f} │ "
+                  f"{json_size / bin_size:>5.0f}x {timings[1] / timings[3]:>5.0f}x")
+
+    print("\nsize / cols = how many times smaller and faster to columns history.bin is than history.json")
+
+
+if __name__ == "__main__":
+    main()
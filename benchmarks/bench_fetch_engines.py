@@ -0,0 +1,162 @@
+"""
+⏱️ FETCH ENGINE BENCHMARK
+Cold-start-to-rate latency for the HTTP engine vs Selenium, served from saved HTML fixtures
+
+Usage: python benchmarks/bench_fetch_engines.py [--runs 5] [--skip-selenium]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'fixtures')
+SERVER_STARTED = formatdate(time.time(), usegmt=True)
+
+# Each child process measures from interpreter start (module imports included) to a parsed rate
+HTTP_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from fetch_engine import HttpFetchEngine
+from rate_extractor import extract_24k_rate
+t_import = time.perf_counter()
+engine = HttpFetchEngine(cache_file=sys.argv[2])
+result = engine.fetch(sys.argv[1])
+t_fetch = time.perf_counter()
+rate = result['cached_rate'] if result['not_modified'] else extract_24k_rate(result['html'])
+if rate and not result['not_modified']:
+    engine.remember(result, rate)
+    engine.save_cache()
+t_done = time.perf_counter()
+print(json.dumps({'rate': rate, 'status': result['status_code'], 'import': t_import - t0,
+                  'fetch': t_fetch - t_import, 'extract': t_done - t_fetch}))
+"""
+
+SELENIUM_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import scrape_with_notifications as swn
+t_import = time.perf_counter()
+tracker = swn.ConfigurableKeralaGoldTracker()
+tracker.setup_driver()
+t_driver = time.perf_counter()
+try:
+    tracker.driver.get(sys.argv[1])
+    t_fetch = time.perf_counter()
+    rate = tracker.extract_24k_rate(tracker.driver.page_source)
+    t_done = time.perf_counter()
+finally:
+    tracker.driver.quit()
+print(json.dumps({'rate': rate, 'status': 200, 'import': t_import - t0, 'driver': t_driver - t_import,
+                  'fetch': t_fetch - t_driver, 'extract': t_done - t_fetch}))
+"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serve fixtures the way a CDN would: gzip, ETag and Last-Modified"""
+
+    def do_GET(self):
+        path = os.path.join(FIXTURES_DIR, os.path.basename(self.path))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            encoding = 'gzip'
+        else:
+            encoding = None
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', SERVER_STARTED)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_child(code, url, cache_file=''):
+    """Run one cold process and return its timings plus total wall time"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-c', code, url, cache_file],
+        cwd=REPO_ROOT, capture_output=True, text=True, timeout=120
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'child failed')
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings['wall'] = wall
+    return timings
+
+
+def summarize(label, samples):
+    """Print median timings for one engine/fixture combination"""
+    if not samples:
+        return
+    keys = [k for k in samples[0] if k not in ('rate', 'status')]
+    parts = [f"{k}={statistics.median(s[k] for s in samples) * 1000:.0f}ms" for k in keys]
+    print(f"  {label:<34} rate=₹{samples[0]['rate']}  status={samples[0]['status']}  " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--skip-selenium', action='store_true')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    print(f"📊 Cold start to rate, median of {args.runs} runs")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fixture in ('kerala_static.html', 'kerala_js_shell.html'):
+            url = base + fixture
+            print(f"\n📄 {fixture}")
+
+            cache_file = os.path.join(tmp, fixture + '.cache.json')
+            cold = [run_child(HTTP_CHILD, url) for _ in range(args.runs)]
+            summarize('http (cold, no cache)', cold)
+
+            run_child(HTTP_CHILD, url, cache_file)
+            conditional = [run_child(HTTP_CHILD, url, cache_file) for _ in range(args.runs)]
+            summarize('http (conditional GET)', conditional)
+
+            if args.skip_selenium:
+                continue
+            try:
+                summarize('selenium (cold)', [run_child(SELENIUM_CHILD, url) for _ in range(args.runs)])
+            except Exception as e:
+                print(f"  selenium (cold)                    skipped: {e}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+⏱️ MESSAGE RENDERING BENCHMARK
+Time to render one alert round: the owner's alert plus a short alert for each
+of --subscribers subscribers. Each subscriber picks one of 20 gram lists and
+a main or micro alert, over a run of --rounds consecutive rates. The same work
+is timed three ways:
+
+  uncached   every fragment rebuilt (the functions behind the LRU caches)
+  cold       caches cleared before each round
+  warm       caches kept across rounds, as in daemon mode where rates repeat
+
+All three must produce identical text.
+
+Usage: python benchmarks/bench_message_render.py [--subscribers 1000] [--rounds 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import message_render  # noqa: E402
+from message_render import MessageConfig, render_alert, render_subscriber_alert  # noqa: E402
+from scrape_with_notifications import message_config  # noqa: E402
+
+FRAGMENTS = ('gram_prices', 'gram_changes', 'selling_rates')
+
+
+def workload(subscribers, rounds, seed=7):
+    rng = random.Random(seed)
+    gram_lists = [tuple(sorted(rng.sample([1, 2, 4, 5, 8, 10, 16, 20, 50, 100], rng.randint(1, 5)))) for _ in range(20)]
+    audience = [(rng.choice(('main', 'micro')), rng.choice(gram_lists)) for _ in range(subscribers)]
+    rates = [10100.0]
+    for _ in range(rounds):
+        rates.append(rates[-1] + rng.choice((-35, -10, 0, 0, 5, 15, 40)))
+    return audience, rates
+
+
+def render_rounds(config, audience, rates, clear_each_round=False):
+    moment = datetime(2026, 10, 18, 11, 5, tzinfo=ZoneInfo("Asia/Kolkata"))
+    messages = []
+    for previous, current in zip(rates, rates[1:]):
+        if clear_each_round:
+            for name in FRAGMENTS:
+                getattr(message_render, name).cache_clear()
+        change = current - previous
+        percent = change / previous * 100
+        messages.append(render_alert(config, moment, current, previous, change, percent, 'Main',
+                                     'ACTIVE_TRADING', 30, {'rate': 10050.0, 'hours_ago': 24.1}))
+        texts = {}  # The tracker renders once per (kind, gram list) too
+        for kind, quantities in audience:
+            key = (kind, quantities)
+            if key not in texts:
+                texts[key] = render_subscriber_alert(config, moment, kind, current, previous, change, percent,
+                                                     'ACTIVE_TRADING', quantities)
+            messages.append(texts[key])
+    return messages
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    config = MessageConfig.from_dict(message_config())
+    audience, rates = workload(args.subscribers, args.rounds)
+
+    cached = {name: getattr(message_render, name) for name in FRAGMENTS}
+    for name, function in cached.items():
+        setattr(message_render, name, function.__wrapped__)
+    try:
+        uncached, expected = timed(render_rounds, config, audience, rates)
+    finally:
+        for name, function in cached.items():
+            setattr(message_render, name, function)
+
+    cold, cold_messages = timed(render_rounds, config, audience, rates, clear_each_round=True)
+    for function in cached.values():
+        function.cache_clear()
+    render_rounds(config, audience, rates)  # Fill the caches
+    warm, warm_messages = timed(render_rounds, config, audience, rates)
+    assert cold_messages == expected and warm_messages == expected, "cached rendering changed the text"
+
+    print(f"🧾 {args.rounds} alert rounds, 1 owner + {args.subscribers} subscribers, {len(expected):,} messages")
+    print(f"{'mode':<10} │ {'ms per round':>12} │ {'speed-up':>8}")
+    for label, elapsed in (('uncached', uncached), ('cold', cold), ('warm', warm)):
+        print(f"{label:<10} │ {elapsed / args.rounds * 1000:>12.3f} │ {uncached / elapsed:>7.1f}x")
+    print("cache:", ', '.join(f"{name} {info['hits']} hits / {info['misses']} misses"
+                              for name, info in message_render.cache_info().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+⏱️ NOTIFICATION DISPATCH BENCHMARK
+Wall time to deliver one alert to Telegram, Pushover and ntfy stand-ins. The
+old path made three back-to-back requests.post calls; the dispatcher sends
+concurrently over pooled sessions.
+
+A local stub server plays all three APIs. Each scenario sets how each
+channel behaves: fast, slow, flaky (503 then OK) or throttled (429 + Retry-After
+then OK).
+
+Usage: python benchmarks/bench_notify_dispatch.py [--alerts 5] [--slow-seconds 2]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from notify_dispatch import (CHANNEL_METRICS, NotificationDispatcher, NtfyChannel, PushoverChannel,  # noqa: E402
+                             TelegramChannel, metrics_summary)
+
+MESSAGE = "🥇 Kerala 24K: ₹9,742 (+₹12)\n" + "📊 Main Alert (Active Trading)\n" * 10
+
+# channel -> behaviour, set per scenario
+BEHAVIOUR = {}
+FAILURES_LEFT = {}
+SLOW_SECONDS = [2.0]
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Answers like the three notification APIs, with injectable latency and failures"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body go out in separate writes on keep-alive connections
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.endswith('/sendMessage'):
+            channel = 'telegram'
+        elif self.path.endswith('/messages.json'):
+            channel = 'pushover'
+        else:
+            channel = 'ntfy'
+
+        behaviour = BEHAVIOUR.get(channel, 'fast')
+        status, headers = 200, {}
+        if behaviour == 'slow':
+            time.sleep(SLOW_SECONDS[0])
+        elif behaviour in ('flaky', 'throttled') and FAILURES_LEFT.get(channel, 0) > 0:
+            FAILURES_LEFT[channel] -= 1
+            status = 503 if behaviour == 'flaky' else 429
+            if behaviour == 'throttled':
+                headers['Retry-After'] = '0.3'
+
+        body = b'{"ok":true}' if status == 200 else b'{"ok":false}'
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def legacy_send(base, message):
+    """The old sequential path: a fresh connection per channel, one after another"""
+    ok = 0
+    for url, kwargs in (
+        (f"{base}/botTOKEN/sendMessage", {'data': {'chat_id': '1', 'text': message, 'parse_mode': 'HTML'}}),
+        (f"{base}/1/messages.json", {'data': {'token': 't', 'user': 'u', 'message': message}}),
+        (f"{base}/topic", {'data': message.encode('utf-8')}),
+    ):
+        try:
+            ok += requests.post(url, timeout=10, **kwargs).status_code == 200
+        except requests.RequestException:
+            pass
+    return ok
+
+
+def run_scenario(name, behaviour, base, alerts):
+    BEHAVIOUR.clear()
+    BEHAVIOUR.update(behaviour)
+    CHANNEL_METRICS.clear()
+
+    legacy_times, legacy_ok = [], 0
+    for _ in range(alerts):
+        FAILURES_LEFT.update({channel: 1 for channel in behaviour})
+        started = time.perf_counter()
+        legacy_ok += legacy_send(base, MESSAGE)
+        legacy_times.append(time.perf_counter() - started)
+
+    dispatcher = NotificationDispatcher([
+        TelegramChannel('TOKEN', '1', base_url=base),
+        PushoverChannel('t', 'u', 'Bench', base_url=base),
+        NtfyChannel('topic', 'Bench', base_url=base)
+    ])
+    dispatch_times, dispatch_ok = [], 0
+    for _ in range(alerts):
+        FAILURES_LEFT.update({channel: 1 for channel in behaviour})
+        started = time.perf_counter()
+        results = dispatcher.dispatch(MESSAGE, 'high')
+        dispatch_times.append(time.perf_counter() - started)
+        dispatch_ok += sum(outcome['ok'] for outcome in results.values())
+    dispatcher.close()
+
+    total = alerts * 3
+    print(f"{name:<28} │ {statistics.median(legacy_times) * 1000:>8.0f} {legacy_ok:>3}/{total:<3} │ "
+          f"{statistics.median(dispatch_times) * 1000:>8.0f} {dispatch_ok:>3}/{total:<3}")
+    for channel, metrics in metrics_summary().items():
+        print(f"{'':<28} │ {'':>16} │   {channel:<9} p50={metrics['latency_p50_ms']}ms p95={metrics['latency_p95_ms']}ms "
+              f"retries={metrics['retries']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--alerts', type=int, default=5)
+    parser.add_argument('--slow-seconds', type=float, default=2.0)
+    args = parser.parse_args()
+    SLOW_SECONDS[0] = args.slow_seconds
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{'scenario':<28} │ {'legacy ms':>8} {'delivered':>7} │ {'dispatch ms':>8} {'delivered':>7}")
+    run_scenario('all fast', {}, base, args.alerts)
+    run_scenario(f'all slow ({args.slow_seconds:g}s each)', dict.fromkeys(('telegram', 'pushover', 'ntfy'), 'slow'),
+                 base, args.alerts)
+    run_scenario('pushover 503 once', {'pushover': 'flaky'}, base, args.alerts)
+    run_scenario('ntfy 429 + Retry-After', {'ntfy': 'throttled'}, base, args.alerts)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+⏱️ RATE EXTRACTOR MICROBENCHMARK
+Extraction time and worst-case growth per page for the single-pass extractor vs the
+old sequential DOTALL patterns, over the saved page corpus in benchmarks/fixtures.
+
+Backtracking cannot be counted inside Python's re engine, so it is measured by its
+effect: each page is also timed cut down to 1/8, 1/4, 1/2 and all of its length,
+and the reported growth exponent is ~1 for linear scans and ~3 for the cubic
+blow-up the lazy `Kerala.*?24K.*?₹` pattern hits on hostile pages.
+
+Usage: python benchmarks/bench_rate_extractor.py [--reps 50] [--legacy-timeout 5]
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import re
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, REPO_ROOT)
+
+from rate_extractor import extract_24k_rate_detailed  # noqa: E402
+
+# The patterns extract_24k_rate used to try one after another
+LEGACY_PATTERNS = [
+    r'24K\s+Gold\s*/g.*?₹\s*([\d,]+)',
+    r'Kerala.*?24K.*?₹\s*([\d,]+)',
+    r'24K.*?₹\s*([\d,]+)',
+    r'24\s*Karat.*?₹\s*([\d,]+)',
+    r'24k.*?₹\s*([\d,]+)'
+]
+
+
+def legacy_extract(page_source):
+    """Old behaviour: up to five full-page lazy DOTALL searches"""
+    for pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, page_source, re.IGNORECASE | re.DOTALL)
+        if match:
+            return float(match.group(1).replace(',', ''))
+    return None
+
+
+def new_extract(page_source):
+    return extract_24k_rate_detailed(page_source)['rate']
+
+
+def time_call(func, page_source, reps):
+    """Median seconds per call"""
+    samples = []
+    for _ in range(reps):
+        started = time.perf_counter()
+        func(page_source)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def _legacy_worker(page_source, reps, queue):
+    queue.put((legacy_extract(page_source), time_call(legacy_extract, page_source, reps)))
+
+
+def time_legacy(page_source, reps, timeout):
+    """Time the legacy patterns in a child process so a runaway page cannot hang the run"""
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_legacy_worker, args=(page_source, reps, queue))
+    proc.start()
+    proc.join(timeout)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+        return None, None
+    return queue.get()
+
+
+def growth_exponent(func_timer, page_source):
+    """log2 of the time ratio per doubling of page length, worst step over the prefix ladder"""
+    # Keep the page tail so every rung ends the way the real page does (rates often sit at the end)
+    tail = page_source[-256:]
+    sizes = [len(page_source) // 8, len(page_source) // 4, len(page_source) // 2, len(page_source)]
+    timings = []
+    for size in sizes:
+        elapsed = func_timer(page_source[:max(0, size - len(tail))] + tail)
+        if elapsed is None:
+            break
+        timings.append(max(elapsed, 1e-7))
+    if len(timings) < 2:
+        return None, len(timings)
+    worst = max(math.log2(b / a) for a, b in zip(timings, timings[1:]))
+    return worst, len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reps', type=int, default=50)
+    parser.add_argument('--legacy-timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, 'expected.json'), 'r') as f:
+        expected = json.load(f)
+
+    print(f"{'page':<28} {'KB':>6} {'rate':>9} {'ok':>3} {'new µs':>9} {'growth':>6} "
+          f"{'labels':>6} {'window':>7} │ {'ok':>3} {'legacy µs':>10} {'growth':>6}")
+    failures = 0
+    for name in sorted(expected):
+        with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+            page = f.read()
+
+        detail = extract_24k_rate_detailed(page)
+        ok = detail['rate'] == expected[name]
+        failures += 0 if ok else 1
+        new_time = time_call(new_extract, page, args.reps)
+        new_growth, _ = growth_exponent(lambda p: time_call(new_extract, p, args.reps), page)
+
+        legacy_reps = max(1, args.reps // 10)
+        legacy_rate, legacy_time = time_legacy(page, legacy_reps, args.legacy_timeout)
+        legacy_growth, steps = growth_exponent(
+            lambda p: time_legacy(p, legacy_reps, args.legacy_timeout)[1], page
+        )
+
+        legacy_ok = '⏱' if legacy_time is None else ('✅' if legacy_rate == expected[name] else '❌')
+        legacy_text = f"{legacy_time * 1e6:>10.0f}" if legacy_time is not None else f"{'>' + str(args.legacy_timeout) + 's':>10}"
+        legacy_growth_text = f"{legacy_growth:>6.2f}" if legacy_growth is not None else f"{'n/a':>6}"
+        if legacy_growth is not None and steps < 4:
+            legacy_growth_text = legacy_growth_text.strip() + '+'
+        print(f"{name:<28} {len(page) / 1024:>6.0f} {str(detail['rate']):>9} {'✅' if ok else '❌':>3} "
+              f"{new_time * 1e6:>9.0f} {new_growth:>6.2f} {detail['labels_checked']:>6} {detail['window_chars']:>7} │ "
+              f"{legacy_ok:>3} {legacy_text} {legacy_growth_text:>6}")
+
+    print("\ngrowth = worst log2(time ratio) per doubling of page size (1 ≈ linear, 3 ≈ cubic backtracking)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+⏱️ RUN METRICS OVERHEAD BENCHMARK
+Cost of one `with span(...)` block when no run is recording (metrics off) and
+when one is, next to an empty loop. A scrape opens about ten spans, so even the
+recording cost is far below a millisecond per run.
+
+Usage: python benchmarks/bench_run_metrics.py [--spans 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from run_metrics import finish_run, span, start_run  # noqa: E402
+
+
+def empty_loop(count):
+    started = time.perf_counter()
+    for _ in range(count):
+        pass
+    return time.perf_counter() - started
+
+
+def span_loop(count):
+    started = time.perf_counter()
+    for _ in range(count):
+        with span('fetch_http'):
+            pass
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--spans', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    baseline = empty_loop(args.spans)
+    disabled = span_loop(args.spans)
+    with tempfile.TemporaryDirectory() as workdir:
+        run = start_run('bench', path=os.path.join(workdir, 'metrics.ndjson'))
+        enabled = span_loop(args.spans)
+        finish_run(run)
+
+    print(f"{'mode':<22} │ {'ns per span':>11}")
+    for label, elapsed in (('empty loop', baseline), ('span, metrics off', disabled), ('span, recording', enabled)):
+        print(f"{label:<22} │ {(elapsed - (0 if label == 'empty loop' else baseline)) / args.spans * 1e9:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+⏱️ SITE BUILDER BENCHMARK
+Cost of regenerating docs/index.html with site_builder.build_site():
+
+  first build     compile the template, hash and write both assets, write the page
+  recompile       template cache cleared before each build (a fresh process per run)
+  warm            compiled template reused and assets already on disk (daemon mode)
+
+It also reports the bytes written per build when only the data age changes.
+The shell (CSS, JS, docs sections) never changes, so only the page is
+rewritten.
+
+Usage: python benchmarks/bench_site_builder.py [--builds 2000]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import site_builder  # noqa: E402
+from atomic_output import OUTPUT_STATS  # noqa: E402
+
+
+def values(i):
+    return {
+        'current_rate': 10118.0, 'freshness_class': 'fresh', 'freshness_description': 'Fresh',
+        'age_human': f"{i % 60} minutes ago", 'confidence_label': 'High', 'age_minutes': f"{i % 60:.1f}",
+        'next_update_minutes': f"{30 - i % 30:.1f}", 'updates_today': 12, 'update_frequency': 'Every 30 minutes',
+        'fetched_at': '2026-10-18T11:05:00+05:30', 'age_human_raw': f"{i % 60} minutes ago",
+        'freshness_status': 'fresh', 'confidence': 'high'
+    }
+
+
+def timed_builds(site_dir, builds, recompile=False):
+    written_before = OUTPUT_STATS['bytes_written']
+    started = time.perf_counter()
+    for i in range(builds):
+        if recompile:
+            site_builder._compiled.clear()
+        site_builder.build_site(values(i), site_dir=site_dir)
+    return time.perf_counter() - started, (OUTPUT_STATS['bytes_written'] - written_before) / builds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--builds', type=int, default=2000)
+    args = parser.parse_args()
+
+    site_dir = tempfile.mkdtemp(prefix='bench_site_')
+    try:
+        first, first_bytes = timed_builds(site_dir, 1)
+        recompile, recompile_bytes = timed_builds(site_dir, args.builds, recompile=True)
+        warm, warm_bytes = timed_builds(site_dir, args.builds)
+        page = os.path.getsize(os.path.join(site_dir, 'index.html'))
+        assets = sum(os.path.getsize(os.path.join(site_dir, 'assets', name))
+                     for name in os.listdir(os.path.join(site_dir, 'assets')))
+    finally:
+        shutil.rmtree(site_dir, ignore_errors=True)
+
+    print(f"🏗️ index.html {page:,} bytes, assets {assets:,} bytes")
+    print(f"{'build':<12} │ {'ms per build':>12} │ {'bytes written':>13}")
+    for label, elapsed, count, written in (('first build', first, 1, first_bytes),
+                                           ('recompile', recompile, args.builds, recompile_bytes),
+                                           ('warm', warm, args.builds, warm_bytes)):
+        print(f"{label:<12} │ {elapsed / count * 1000:>12.3f} │ {written:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+⏱️ STARTUP BENCHMARK
+Time to first useful work for each entry point of scrape_with_notifications.py.
+Each one runs in a fresh interpreter and is timed from process start to exit:
+
+  import          import the module (what every entry point pays)
+  analyze-only    --analyze-only report over 500 stored entries
+  dry-run         a --dry-run scrape of a local stub page: HTTP fetch, extraction, alert rules
+  eager imports   import after loading Selenium, requests and NumPy up front
+                  (the cost every run paid before they were imported lazily)
+
+The import budget comes from `python -X importtime`: the module's cumulative
+import time must stay under IMPORT_BUDGET_MS. The heavy dependencies each entry
+point actually loaded are listed next to it.
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zoneinfo import ZoneInfo
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from history_store import HistoryStore  # noqa: E402
+
+IMPORT_BUDGET_MS = 80
+HEAVY_MODULES = ('selenium', 'requests', 'numpy', 'urllib3')
+SCRIPT = os.path.join(REPO_ROOT, 'scrape_with_notifications.py')
+
+with open(os.path.join(REPO_ROOT, 'benchmarks', 'fixtures', 'kerala_static.html'), 'rb') as f:
+    PAGE = f.read()
+
+REPORT_LOADED = "print(json.dumps(sorted(m for m in {heavy!r} if m in sys.modules)))"
+ENTRY_POINTS = {
+    'import': "import scrape_with_notifications",
+    'analyze-only': ("import runpy; sys.argv = ['scrape_with_notifications.py', '--analyze-only']\n"
+                     "try:\n    runpy.run_path({script!r}, run_name='__main__')\nexcept SystemExit:\n    pass"),
+    'dry-run': ("import scrape_with_notifications as s\n"
+                "t = s.ConfigurableKeralaGoldTracker(dry_run=True); t.url = {url!r}; t.scrape_rate(); t.close()"),
+    'eager imports': "import selenium.webdriver, requests, numpy\nimport scrape_with_notifications"
+}
+
+
+class StubPageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def seed_history(workdir, entries=500):
+    """A recent history in workdir/data so --analyze-only has something to read"""
+    now = datetime.now(ZoneInfo("Asia/Kolkata"))
+    store = HistoryStore(root=os.path.join(workdir, 'data', 'history'), retention=None)
+    for i in range(entries):
+        moment = now - timedelta(minutes=15 * (entries - i))
+        store.append({'rate': 9500.0 + (i * 7) % 40, 'timestamp': moment.isoformat(), 'ist_time': moment.isoformat(),
+                      'market_period': 'ACTIVE_TRADING', 'is_weekend': False, 'success': True})
+
+
+def run_entry(code, workdir):
+    """(wall seconds, heavy modules loaded) for one fresh interpreter"""
+    env = {**os.environ, 'PYTHONPATH': REPO_ROOT}
+    for name in ('TELEGRAM_BOT_TOKEN', 'PUSHOVER_TOKEN', 'NTFY_TOPIC'):
+        env.pop(name, None)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', f"import json, sys\n{code}\n" + REPORT_LOADED.format(heavy=HEAVY_MODULES)],
+                            cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - started, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_time_ms(workdir):
+    """Cumulative `-X importtime` of scrape_with_notifications and its three costliest imports"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import scrape_with_notifications'],
+                            cwd=workdir, env={**os.environ, 'PYTHONPATH': REPO_ROOT}, capture_output=True, text=True)
+    children = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        ms, name = int(parts[1]) / 1000, parts[2].rstrip()
+        if not name.startswith('  '):  # A top-level import: everything listed since then was its children
+            if name.strip() == 'scrape_with_notifications':
+                return ms, sorted(children, reverse=True)[:3]
+            children = []
+        elif not name.startswith('    '):
+            children.append((ms, name.strip()))
+    raise RuntimeError("scrape_with_notifications missing from -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/gold-rates/kerala.html"
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        seed_history(workdir)
+        total, costliest = import_time_ms(workdir)
+        verdict = '✅ within' if total <= IMPORT_BUDGET_MS else '❌ over'
+        print(f"📦 -X importtime: scrape_with_notifications {total:.1f} ms ({verdict} the {IMPORT_BUDGET_MS} ms budget); "
+              f"costliest direct imports: " + ', '.join(f"{name} {ms:.1f} ms" for ms, name in costliest))
+
+        print(f"{'entry point':<14} │ {'median ms':>9} │ {'min ms':>7} │ heavy modules loaded")
+        for label, template in ENTRY_POINTS.items():
+            code = template.format(script=SCRIPT, url=url)
+            timings, loaded = [], None
+            for _ in range(args.runs):
+                elapsed, loaded = run_entry(code, workdir)
+                timings.append(elapsed * 1000)
+            print(f"{label:<14} │ {statistics.median(timings):>9.0f} │ {min(timings):>7.0f} │ {', '.join(loaded) or '-'}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
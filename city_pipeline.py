@@ -0,0 +1,293 @@
+"""
+🏙️ CITY RATE PIPELINE
+Gold (24K/22K/18K) and silver rates for many cities from every source,
+fetched concurrently without a browser.
+
+  jobs      one page per (source, page kind): each SOURCES page lists every
+            city in a table, so 30 cities cost 3 pages, not 90. A URL with a
+            {city} placeholder (CITY_PAGE_SOURCES) is one page per city instead
+  fetch     a bounded thread pool (never larger than the HTTP connection
+            pool) over the shared pooled session. Each host has a HostGate:
+            at most PER_HOST_CONCURRENCY requests in flight, started at least
+            HOST_MIN_INTERVAL_SECONDS apart. Validators turn unchanged pages
+            into 304s.
+  extract   extract_city_table() (or extract_rates() for a city page) turns
+            HTML into {city: {metal: rate}} for the page kind's PAGE_METALS
+  store     CityRateStore keeps the latest rates keyed "source/city" in
+            data/city_rates.json, and cross_check() compares sources city by city
+
+The per-host limits are deliberately polite: goodreturns.in also serves the
+tracker's own Kerala page, and a ban there would stop the main scrape. With
+the table pages the busiest host serves two pages, so a run takes about one
+page fetch plus one HOST_MIN_INTERVAL_SECONDS gap however many cities are asked
+for (benchmarks/bench_city_pipeline.py). Nothing starts a browser.
+
+Usage: python city_pipeline.py [--cities kerala chennai] [--sources goodreturns] [--per-city] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+from atomic_output import write_json
+from fetch_engine import HTTP_POOL_SIZE, HttpFetchEngine
+from rate_extractor import GOLD_PURITIES, extract_city_table, extract_rates
+
+IST = ZoneInfo("Asia/Kolkata")
+
+CITY_RATES_FILE = 'data/city_rates.json'
+CITY_HTTP_CACHE_FILE = 'data/city_http_cache.json'  # Separate from the tracker's cache: entries hold {metal: rate}
+MAX_PARALLEL_FETCHES = 4          # Pages in flight across all hosts (capped at fetch_engine.HTTP_POOL_SIZE)
+PER_HOST_CONCURRENCY = 1          # Pages in flight per host
+HOST_MIN_INTERVAL_SECONDS = 1.5   # Minimum gap between request starts on one host
+CROSS_CHECK_TOLERANCE_PERCENT = 0.5  # Sources disagreeing by more than this are reported
+
+# source -> {page kind: URL of a page listing every city's rates in one table}
+SOURCES = {
+    'goodreturns': {
+        'gold': 'https://www.goodreturns.in/gold-rates/',
+        'silver': 'https://www.goodreturns.in/silver-rates/'
+    },
+    'bankbazaar': {
+        'gold': 'https://www.bankbazaar.com/gold-rate-india.html'
+    }
+}
+
+# The same sources one page per city ({city} placeholder): for a city the tables do not list
+CITY_PAGE_SOURCES = {
+    'goodreturns': {
+        'gold': 'https://www.goodreturns.in/gold-rates/{city}.html',
+        'silver': 'https://www.goodreturns.in/silver-rates/{city}.html'
+    },
+    'bankbazaar': {
+        'gold': 'https://www.bankbazaar.com/gold-rate-{city}.html'
+    }
+}
+
+CITIES = [
+    'kerala', 'chennai', 'bangalore', 'hyderabad', 'mumbai', 'delhi', 'kolkata', 'pune', 'ahmedabad', 'jaipur',
+    'lucknow', 'patna', 'bhubaneswar', 'coimbatore', 'madurai', 'mangalore', 'mysore', 'nagpur', 'nashik', 'surat',
+    'vadodara', 'visakhapatnam', 'vijayawada', 'chandigarh', 'bhopal', 'indore', 'ranchi', 'guwahati', 'raipur',
+    'dehradun'
+]
+
+# page kind -> metals read from it
+PAGE_METALS = {
+    'gold': GOLD_PURITIES,
+    'silver': ('silver',)
+}
+
+
+class HostGate:
+    """Politeness for one host: bounded requests in flight, starts spaced by `interval` seconds"""
+
+    def __init__(self, concurrency=PER_HOST_CONCURRENCY, interval=HOST_MIN_INTERVAL_SECONDS):
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.interval = interval
+        self.next_start = 0.0
+
+    @contextmanager
+    def hold(self):
+        with self.slots:
+            with self.lock:
+                now = time.monotonic()
+                wait = self.next_start - now
+                self.next_start = max(now, self.next_start) + self.interval
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+def build_jobs(cities=None, sources=None):
+    """One job per (source, page kind) for table pages, or per (source, city, page kind) for {city} templates"""
+    sources = SOURCES if sources is None else sources
+    cities = CITIES if cities is None else cities
+    jobs = []
+    for source, pages in sources.items():
+        for kind, template in pages.items():
+            if '{city}' in template:
+                jobs.extend({'source': source, 'kind': kind, 'table': False, 'cities': [city],
+                             'url': template.format(city=city)} for city in cities)
+            else:
+                jobs.append({'source': source, 'kind': kind, 'table': True, 'cities': list(cities), 'url': template})
+    return jobs
+
+
+def extract_page(job, page_source):
+    """{city: {metal: rate or None}} for every one of the job's cities ({} for a city the table does not list)"""
+    metals = PAGE_METALS[job['kind']]
+    if not job['table']:
+        return {job['cities'][0]: extract_rates(page_source, metals)}
+    found = extract_city_table(page_source, job['cities'], metals)
+    return {city: found.get(city, {}) for city in job['cities']}
+
+
+class CityPipeline:
+    """Fetch and extract many pages concurrently; run() returns one result per job, in job order"""
+
+    def __init__(self, engine=None, workers=MAX_PARALLEL_FETCHES, per_host=PER_HOST_CONCURRENCY,
+                 interval=HOST_MIN_INTERVAL_SECONDS):
+        self.engine = engine or HttpFetchEngine(cache_file=CITY_HTTP_CACHE_FILE)
+        # More threads than pooled connections would make urllib3 discard connections ("Connection pool is full")
+        self.workers = min(workers, HTTP_POOL_SIZE)
+        self.per_host = min(per_host, HTTP_POOL_SIZE)
+        self.interval = interval
+        self.gates = {}
+        self.gates_lock = threading.Lock()
+
+    def gate(self, url):
+        host = urlsplit(url).netloc
+        with self.gates_lock:
+            if host not in self.gates:
+                self.gates[host] = HostGate(self.per_host, self.interval)
+            return self.gates[host]
+
+    def fetch_one(self, job):
+        result = {**job, 'rates': {}, 'status': 'error', 'error': None, 'elapsed_seconds': None,
+                  'status_code': None, 'bytes': None}
+        started = time.perf_counter()
+        try:
+            gate = self.gate(job['url'])
+            with gate.hold():
+                page = self.engine.fetch(job['url'])
+            result.update(status_code=page['status_code'], bytes=page['bytes'])
+            cached = page['cached_rate']
+            if page['not_modified'] and isinstance(cached, dict) and all(city in cached for city in job['cities']):
+                result.update(rates={city: cached[city] for city in job['cities']}, status='not_modified')
+            else:
+                if page['not_modified']:  # Cached for other cities (or an older format): read the page again
+                    with gate.hold():
+                        page = self.engine.fetch(job['url'], conditional=False)
+                    result.update(status_code=page['status_code'], bytes=page['bytes'])
+                rates = extract_page(job, page['html'])
+                if any(rate is not None for city_rates in rates.values() for rate in city_rates.values()):
+                    self.engine.remember(page, rates)
+                    result.update(rates=rates, status='ok')
+                else:
+                    result['status'] = 'no_rate'
+        except Exception as e:
+            result['error'] = str(e)
+            result['status_code'] = getattr(getattr(e, 'response', None), 'status_code', None)
+        result['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        return result
+
+    def run(self, jobs):
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs)), thread_name_prefix='city') as pool:
+            results = list(pool.map(self.fetch_one, jobs))
+        self.engine.save_cache()
+        return results
+
+
+class CityRateStore:
+    """Latest rates per "source/city" (a failed fetch keeps the previous rates)"""
+
+    def __init__(self, path=CITY_RATES_FILE):
+        self.path = path
+        self.rates = self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get('rates', {})
+        except Exception as e:
+            print(f"⚠️ City rates unreadable, starting fresh: {e}")
+            return {}
+
+    def update(self, results, timestamp):
+        for result in results:
+            for city in result['cities']:
+                key = f"{result['source']}/{city}"
+                entry = self.rates.setdefault(key, {'source': result['source'], 'city': city, 'status': {}})
+                rates = {metal: rate for metal, rate in result['rates'].get(city, {}).items() if rate is not None}
+                if result['status'] in ('ok', 'not_modified'):
+                    entry['status'][result['kind']] = result['status'] if rates else 'no_rate'  # Not in the table
+                    if rates:
+                        entry.update(rates)
+                        entry['updated_at'] = timestamp
+                else:
+                    entry['status'][result['kind']] = result['status']
+
+    def cross_check(self, tolerance_percent=CROSS_CHECK_TOLERANCE_PERCENT):
+        """[{city, metal, rates by source, spread_percent}] where sources disagree beyond the tolerance"""
+        by_city = {}
+        for entry in self.rates.values():
+            by_city.setdefault(entry['city'], []).append(entry)
+        mismatches = []
+        for city, entries in sorted(by_city.items()):
+            for metal in GOLD_PURITIES + ('silver',):
+                quotes = {entry['source']: entry[metal] for entry in entries if entry.get(metal)}
+                if len(quotes) < 2:
+                    continue
+                low, high = min(quotes.values()), max(quotes.values())
+                spread = (high - low) / low * 100
+                if spread > tolerance_percent:
+                    mismatches.append({'city': city, 'metal': metal, 'rates': quotes,
+                                       'spread_percent': round(spread, 3)})
+        return mismatches
+
+    def save(self, timestamp):
+        write_json(self.path, {
+            'updated_at': timestamp,
+            'rates': self.rates,
+            'cross_check': self.cross_check()
+        })
+
+
+def run_city_pipeline(cities=None, sources=None, workers=MAX_PARALLEL_FETCHES, timestamp=None, store=None):
+    """Fetch the rate pages, update the keyed store and save it; returns the per-page results"""
+    timestamp = timestamp or datetime.now(IST).isoformat()
+    jobs = build_jobs(cities, sources)
+    started = time.perf_counter()
+    results = CityPipeline(workers=workers).run(jobs)
+    elapsed = time.perf_counter() - started
+
+    store = store or CityRateStore()
+    store.update(results, timestamp)
+    store.save(timestamp)
+
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        if result['error']:
+            print(f"⚠️ {result['source']} {result['kind']} ({result['url']}): {result['error']}")
+    cities_found = sum(1 for entry in store.rates.values() if entry.get('updated_at') == timestamp)
+    print(f"🏙️ {len(jobs)} rate pages in {elapsed:.2f}s ({cities_found} source/city rates updated): "
+          + ', '.join(f"{n} {status}" for status, n in counts.items()))
+    for mismatch in store.cross_check():
+        print(f"⚖️ {mismatch['city']} {mismatch['metal']}: sources differ by {mismatch['spread_percent']}% "
+              f"{mismatch['rates']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch gold and silver rates for many cities and sources")
+    parser.add_argument('--cities', nargs='+', help=f"city slugs (default: all {len(CITIES)})")
+    parser.add_argument('--sources', nargs='+', choices=sorted(SOURCES), help='sources (default: all)')
+    parser.add_argument('--per-city', action='store_true', help='one page per city instead of the table pages')
+    parser.add_argument('--workers', type=int, default=MAX_PARALLEL_FETCHES)
+    args = parser.parse_args()
+
+    layout = CITY_PAGE_SOURCES if args.per_city else SOURCES
+    sources = {name: layout[name] for name in args.sources} if args.sources else layout
+    results = run_city_pipeline(args.cities, sources, args.workers)
+    for result in results:
+        for city in result['cities']:
+            rates = ', '.join(f"{metal} ₹{rate:,.2f}" for metal, rate in result['rates'].get(city, {}).items()
+                              if rate is not None)
+            print(f"  {result['source']:<12} {city:<14} {result['kind']:<6} {result['status']:<12} {rates or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+📦 COLUMNAR HISTORY EXPORT
+Full rate history as compact little-endian binary shards for bulk consumers,
+one content-hashed file per IST month plus a small manifest:
+
+  docs/api/history_bin/manifest.json              shard list: month, file, range, count, sha256
+  docs/api/history_bin/2026-10.3f9c0a1b2d4e.bin
+
+As with the JSON day shards (history_shards.py), only the newest month in the
+manifest is re-encoded, so a run rewrites one small shard and the manifest
+instead of the whole history. Closed months keep their file name and bytes
+forever. A re-encoded month's old file is listed under "superseded" and
+deleted one generation later.
+
+Layout of each shard:
+  header   32 bytes: magic b'GRH1', version u16, header size u16, row count u32,
+           base epoch seconds i64, rate scale u32, flags u32, 4 pad bytes
+  deltas   int32[count]  seconds since the previous row (the first is 0, relative to base)
+  rates    int32[count]  rate per gram * rate scale, RATE_MISSING when the scrape had no rate
+  periods  uint8[count]  market period code (see history_store.PERIOD_CODES)
+
+read_columnar() maps the columns as memoryviews over the file bytes, with no
+parsing or copying; epochs() and rates() decode them on demand.
+load_columnar_shards() joins every shard in a manifest into one history.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+from aggregates import ist_day_key
+from atomic_output import write_bytes, write_json
+
+COLUMNAR_DIR = 'docs/api/history_bin'
+LEGACY_COLUMNAR_FILE = 'docs/api/history.bin'  # The single whole-history file older versions rewrote every run
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHARS = 12
+MAGIC = b'GRH1'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHIqII4x')
+RATE_SCALE = 100  # two decimal places
+RATE_MISSING = -2 ** 31
+
+
+def encode_columnar(epochs_us, rates, periods):
+    """Pack store columns (epoch µs, float rate, period code) into the binary layout"""
+    count = len(epochs_us)
+    order = range(count)
+    if any(b < a for a, b in zip(epochs_us, epochs_us[1:])):
+        order = sorted(order, key=epochs_us.__getitem__)
+
+    seconds = [epochs_us[i] // 1_000_000 for i in order]
+    base = seconds[0] if seconds else 0
+    deltas = array('i', [0] * count)
+    for i in range(1, count):
+        deltas[i] = seconds[i] - seconds[i - 1]
+
+    fixed = array('i', [
+        RATE_MISSING if rates[i] != rates[i] else round(rates[i] * RATE_SCALE)
+        for i in order
+    ])
+    codes = array('B', [periods[i] for i in order])
+
+    if sys.byteorder != 'little':
+        deltas.byteswap()
+        fixed.byteswap()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, HEADER.size, count, base, RATE_SCALE, 0)
+    return b''.join((header, deltas.tobytes(), fixed.tobytes(), codes.tobytes()))
+
+
+class ColumnarHistory:
+    """Zero-copy view of a columnar shard buffer"""
+
+    __slots__ = ('count', 'base_epoch', 'rate_scale', 'deltas', 'fixed_rates', 'periods')
+
+    def __init__(self, count, base_epoch, rate_scale, deltas, fixed_rates, periods):
+        self.count = count
+        self.base_epoch = base_epoch
+        self.rate_scale = rate_scale
+        self.deltas = deltas
+        self.fixed_rates = fixed_rates
+        self.periods = periods
+
+    def __len__(self):
+        return self.count
+
+    def epochs(self):
+        """Epoch seconds per row (prefix sum of the deltas)"""
+        return list(accumulate(self.deltas, initial=self.base_epoch))[1:]
+
+    def rates(self):
+        """Rate per gram per row, None where the scrape had no rate"""
+        scale = self.rate_scale
+        return [None if value == RATE_MISSING else value / scale for value in self.fixed_rates]
+
+
+def read_columnar(buffer):
+    """Parse the header and expose the columns of a columnar shard buffer (bytes, bytearray or mmap)"""
+    view = memoryview(buffer)
+    if len(view) < HEADER.size:
+        raise ValueError("Columnar history truncated: no header")
+    magic, version, header_size, count, base, scale, _flags = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"Not a columnar history file (magic {magic!r})")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar history version {version}")
+    if len(view) < header_size + count * 9:
+        raise ValueError("Columnar history truncated: columns shorter than header count")
+
+    deltas_end = header_size + count * 4
+    rates_end = deltas_end + count * 4
+    if sys.byteorder == 'little':
+        deltas = view[header_size:deltas_end].cast('i')
+        fixed = view[deltas_end:rates_end].cast('i')
+    else:
+        deltas, fixed = array('i'), array('i')
+        deltas.frombytes(view[header_size:deltas_end])
+        fixed.frombytes(view[deltas_end:rates_end])
+        deltas.byteswap()
+        fixed.byteswap()
+    return ColumnarHistory(count, base, scale, deltas, fixed, view[rates_end:rates_end + count])
+
+
+def load_columnar(path):
+    with open(path, 'rb') as f:
+        return read_columnar(f.read())
+
+
+def load_manifest(shard_dir=COLUMNAR_DIR):
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Columnar manifest unreadable, re-exporting all history: {e}")
+        return {}
+
+
+def load_columnar_shards(shard_dir=COLUMNAR_DIR):
+    """Every shard in the manifest joined into one ColumnarHistory (columns copied, not mapped)"""
+    deltas, fixed, periods = array('i'), array('i'), bytearray()
+    base = last = None
+    for shard in load_manifest(shard_dir).get('shards', []):
+        part = load_columnar(os.path.join(shard_dir, shard['file']))
+        if not part.count:
+            continue
+        if base is None:
+            base = last = part.base_epoch
+        deltas.append(part.base_epoch - last)
+        deltas.extend(part.deltas[1:])
+        fixed.extend(part.fixed_rates)
+        periods.extend(part.periods)
+        last = part.base_epoch + sum(part.deltas)
+    return ColumnarHistory(len(deltas), base or 0, RATE_SCALE, deltas, fixed, memoryview(bytes(periods)))
+
+
+def _write_shard(shard_dir, month, epochs_us, rates, periods):
+    """Encode one month under its content hash (untouched if that exact file exists)"""
+    payload = encode_columnar(epochs_us, rates, periods)
+    digest = hashlib.sha256(payload).hexdigest()
+    file_name = f"{month}.{digest[:HASH_CHARS]}.bin"
+    write_bytes(os.path.join(shard_dir, file_name), payload)
+    return {
+        'month': month,
+        'file': file_name,
+        'first_epoch': epochs_us[0] // 1_000_000,
+        'last_epoch': epochs_us[-1] // 1_000_000,
+        'count': len(epochs_us),
+        'bytes': len(payload),
+        'sha256': digest
+    }
+
+
+def export_columnar(store, today_key, shard_dir=COLUMNAR_DIR, legacy_file=LEGACY_COLUMNAR_FILE):
+    """Bring the monthly shards and manifest up to date from the store; returns the manifest"""
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest = load_manifest(shard_dir)
+    shards = manifest.get('shards', []) if manifest.get('version') == MANIFEST_VERSION else []
+
+    # New rows can only land in the newest shard's month or later
+    resume_month = shards[-1]['month'] if shards else None
+    ts = store.read_column('ts')
+    start = 0 if not shards else bisect_left(ts, shards[-1]['first_epoch'] * 1_000_000)
+    epochs_us, rates, periods = store.read_columns(last=len(ts) - start)
+
+    groups = {}
+    for i, epoch_us in enumerate(epochs_us):
+        groups.setdefault(ist_day_key(epoch_us // 1_000_000)[:7], []).append(i)
+
+    kept = [shard for shard in shards if resume_month is None or shard['month'] < resume_month]
+    reopened = shards[len(kept):]
+    if not groups:
+        kept.extend(reopened)
+    for month in sorted(groups):
+        if resume_month is not None and month < resume_month:
+            continue
+        rows = groups[month]
+        kept.append(_write_shard(shard_dir, month, [epochs_us[i] for i in rows], [rates[i] for i in rows],
+                                 [periods[i] for i in rows]))
+
+    # Keep this run's superseded files for one generation; delete the ones the previous run superseded
+    current = {shard['file'] for shard in kept}
+    superseded = sorted({shard['file'] for shard in reopened} - current)
+    if superseded:
+        for file_name in set(manifest.get('superseded', [])) - current - set(superseded):
+            try:
+                os.remove(os.path.join(shard_dir, file_name))
+            except OSError:
+                pass
+    else:
+        superseded = [name for name in manifest.get('superseded', []) if name not in current]
+
+    for shard in kept:
+        shard['final'] = shard['month'] < today_key[:7]
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'granularity': 'month',
+        'timezone': 'Asia/Kolkata',
+        'format': f"{MAGIC.decode()} v{FORMAT_VERSION} (columnar_export.py)",
+        'total_entries': sum(shard['count'] for shard in kept),
+        'shards': kept,
+        'superseded': superseded
+    }
+    write_json(os.path.join(shard_dir, MANIFEST_NAME), manifest, compact=True)
+    if legacy_file and os.path.exists(legacy_file):
+        os.remove(legacy_file)
+        print(f"🧹 Removed {legacy_file} (now sharded under {shard_dir})")
+    return manifest
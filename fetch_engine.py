@@ -0,0 +1,132 @@
+"""
+🌐 HTTP FETCH ENGINE
+Browserless page fetching for the gold tracker: pooled keep-alive sessions,
+gzip transfer and conditional GET (ETag / Last-Modified) with a small on-disk cache
+"""
+
+import json
+import os
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from atomic_output import write_json
+
+HTTP_CACHE_FILE = 'data/http_cache.json'
+HTTP_TIMEOUT_SECONDS = 15
+HTTP_POOL_SIZE = 10
+HTTP_RETRIES = 2
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+]
+
+_shared_session = None
+
+
+def get_session():
+    """Return the process-wide pooled session (created on first use)"""
+    global _shared_session
+    if _shared_session is None:
+        session = requests.Session()
+        retry = Retry(
+            total=HTTP_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "HEAD"]
+        )
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            'User-Agent': random.choice(USER_AGENTS),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-IN,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+        _shared_session = session
+    return _shared_session
+
+
+class HttpFetchEngine:
+    """Fetch pages over plain HTTP, remembering validators so unchanged pages cost a 304"""
+
+    def __init__(self, cache_file=HTTP_CACHE_FILE, timeout=HTTP_TIMEOUT_SECONDS):
+        self.cache_file = cache_file
+        self.timeout = timeout
+        self.session = get_session()
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        """Load stored ETag / Last-Modified validators and the rate last seen per URL"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ HTTP cache unreadable, starting fresh: {e}")
+            return {}
+
+    def save_cache(self):
+        """Persist validators for the next run"""
+        if not self.cache_file:
+            return
+        write_json(self.cache_file, self.cache)
+
+    def fetch(self, url, conditional=True):
+        """
+        GET a page. Returns a dict with the status, decoded HTML (None on 304),
+        whether the server reported it unchanged, and the rate cached for it.
+        """
+        cached = self.cache.get(url, {})
+        headers = {}
+        # Only ask for a 304 when we still know the rate the cached page produced
+        if conditional and cached.get('rate') is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        started = time.perf_counter()
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        elapsed = time.perf_counter() - started
+
+        result = {
+            'url': url,
+            'status_code': response.status_code,
+            'html': None,
+            'not_modified': response.status_code == 304,
+            'cached_rate': cached.get('rate'),
+            'elapsed_seconds': elapsed,
+            'bytes': len(response.content),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+
+        if result['not_modified']:
+            print(f"♻️ {url} not modified ({elapsed:.2f}s)")
+            return result
+
+        response.raise_for_status()
+        if response.encoding is None or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = 'utf-8'
+        result['html'] = response.text
+        print(f"🌐 Fetched {url}: {response.status_code}, {result['bytes']:,} bytes in {elapsed:.2f}s")
+        return result
+
+    def remember(self, result, rate):
+        """Store the response validators together with the rate extracted from it"""
+        if not result.get('etag') and not result.get('last_modified'):
+            self.cache.pop(result['url'], None)
+            return
+        self.cache[result['url']] = {
+            'etag': result.get('etag'),
+            'last_modified': result.get('last_modified'),
+            'rate': rate
+        }
@@ -3,11 +3,42 @@ import os
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
+from history_store import HistoryStore, HistorySnapshot, io_stats_summary, ist_day_start
+from aggregates import RunningStats, Rollups, ROLLUP_INTERVALS, ist_day_key
+from history_shards import publish_history_shards
+from columnar_export import export_columnar
+from adaptive_schedule import ChangeModel
+from atomic_output import write_json, write_json_streaming, output_stats_summary
+from analytics import BACKEND, RateSeries, analytics_summary
+from city_pipeline import CITY_RATES_FILE
+from run_metrics import finish_run, health_summary, span, start_run
+from scrape_attempts import scraper_health
+from site_builder import build_site
+
 # Define IST timezone
 IST = ZoneInfo("Asia/Kolkata")
 
+# Number of most recent entries published in history.json
+HISTORY_API_ENTRIES = 500
+
+# Newest store rows read for the time-window and rolling metrics (over a week at the
+# adaptive schedule's 10-minute floor); whole-history figures come from RunningStats
+ANALYTICS_TAIL_ROWS = 1000
+
+# Time each stage into data/metrics.ndjson (summarized with the tracker's runs in health.json)
+RECORD_RUN_METRICS = True
+
 def generate_enhanced_api_and_site():
-    """Generate API endpoints with enhanced timing information"""
+    """Generate API endpoints with enhanced timing information (recorded as a 'site' run)"""
+    run = start_run('site') if RECORD_RUN_METRICS else None
+    status = 'failed'
+    try:
+        _generate_enhanced_api_and_site()
+        status = 'ok'
+    finally:
+        finish_run(run, status)
+
+def _generate_enhanced_api_and_site():
     
     # Ensure data directory exists
     os.makedirs('data', exist_ok=True)
@@ -64,11 +95,19 @@ def generate_enhanced_api_and_site():
             'is_weekend': datetime.now(IST).weekday() >= 5
         }
     
-    try:
-        with open('data/rate_history.json', 'r') as f:
-            history = json.load(f)
-    except:
-        history = []
+    with span('history_load'):
+        try:
+            store = HistoryStore(retention=None)
+            history = HistorySnapshot(store, last=HISTORY_API_ENTRIES)
+        except Exception as e:
+            print(f"⚠️ Could not read history store: {e}")
+            store = None
+            history = HistorySnapshot(None)
+    
+        running_stats = catch_up(RunningStats.load(), store, history)
+        rollups = catch_up(Rollups.load(), store, history)
+        change_model = catch_up(ChangeModel.load(), store, history)
+        series = load_rate_series(store, history)
     
     # Create docs directory
     os.makedirs('docs', exist_ok=True)
@@ -162,7 +201,9 @@ def generate_enhanced_api_and_site():
             'next_update_in_minutes': max(0, round(next_update_minutes, 1)),
             'update_frequency': get_current_update_frequency(now.hour),
             'last_update_was_scheduled': True,
-            'total_updates_today': count_todays_updates(history)
+            'total_updates_today': count_todays_updates(history),
+            # Advisory only: updates follow next_update_in_minutes, not the learned change rate
+            'change_forecast': change_model.change_forecast(now, max(0, next_update_minutes))
         },
         
         # Data validity information
@@ -184,17 +225,16 @@ def generate_enhanced_api_and_site():
     }
     
     # Save enhanced latest API
-    with open('docs/api/latest.json', 'w') as f:
-        json.dump(enhanced_latest, f, indent=2)
+    write_json('docs/api/latest.json', enhanced_latest)
     
     # Enhanced history API with timing metadata
     enhanced_history = {
-        'data': history,
+        'data': history.entries,
         'metadata': {
             'total_entries': len(history),
             'date_range': {
-                'oldest': history[0]['timestamp'] if history else None,
-                'newest': history[-1]['timestamp'] if history else None
+                'oldest': history.entries[0]['timestamp'] if history else None,
+                'newest': history.entries[-1]['timestamp'] if history else None
             },
             'api_generated_at': now.isoformat(),
             'data_points_last_24h': count_last_24h_entries(history),
@@ -202,50 +242,79 @@ def generate_enhanced_api_and_site():
         }
     }
     
-    with open('docs/api/history.json', 'w') as f:
-        json.dump(enhanced_history, f, indent=2)
+    write_json_streaming('docs/api/history.json', enhanced_history, 'data', history.entries)
     
-    # Enhanced stats API
-    if history:
-        rates = [entry['rate'] for entry in history if isinstance(entry.get('rate'), (int, float))]
-        if rates:
-            stats = {
-                'current': latest.get('rate'),
-                'statistics': {
-                    'highest': max(rates),
-                    'lowest': min(rates),
-                    'average': round(sum(rates) / len(rates), 2),
-                    'median': round(sorted(rates)[len(rates)//2], 2),
-                    'volatility': round(max(rates) - min(rates), 2)
-                },
-                'trends': {
-                    'last_24h_change': calculate_24h_change(history),
-                    'last_hour_change': calculate_hour_change(history),
-                    'daily_high': get_daily_high(history),
-                    'daily_low': get_daily_low(history)
-                },
-                'data_quality': {
-                    'total_data_points': len(rates),
-                    'data_completeness': round((len(rates) / len(history)) * 100, 1) if history else 0,
-                    'last_updated': latest.get('timestamp'),
-                    'data_age_minutes': round(fetch_age_minutes, 1)
-                },
-                'generated_at': now.isoformat()
-            }
-        else:
-            stats = {'error': 'No valid rate data', 'generated_at': now.isoformat()}
+    # Immutable per-day shards + manifest (only today's shard and the manifest change per run)
+    with span('history_shards'):
+        try:
+            manifest = publish_history_shards(store, history, ist_day_key(now.timestamp()))
+            print(f"🧱 History shards: {len(manifest['shards'])} day(s), {manifest['total_entries']} entries")
+        except Exception as e:
+            print(f"⚠️ History shard publishing failed: {e}")
+    
+    # Compact columnar export for bulk consumers, sharded by month (only the current month's shard changes)
+    with span('columnar_export'):
+        if store is not None:
+            try:
+                manifest = export_columnar(store, ist_day_key(now.timestamp()))
+                print(f"📦 Columnar history: {len(manifest['shards'])} month(s), {manifest['total_entries']} rows")
+            except Exception as e:
+                print(f"⚠️ Columnar export failed: {e}")
+    
+    # Enhanced stats API (constant time: read from the running aggregates)
+    summary = running_stats.summary()
+    if summary:
+        stats = {
+            'current': latest.get('rate'),
+            'statistics': summary,
+            'trends': {
+                'last_24h_change': calculate_24h_change(series),
+                'last_hour_change': calculate_hour_change(series),
+                'daily_high': get_daily_high(rollups),
+                'daily_low': get_daily_low(rollups)
+            },
+            'data_quality': {
+                'total_data_points': running_stats.count,
+                'data_completeness': round((running_stats.count / (running_stats.count + running_stats.invalid)) * 100, 1),
+                'tracked_since': datetime.fromtimestamp(running_stats.first_epoch, IST).isoformat(),
+                'last_updated': latest.get('timestamp'),
+                'data_age_minutes': round(fetch_age_minutes, 1)
+            },
+            'analytics': get_analytics(series, running_stats),
+            'generated_at': now.isoformat()
+        }
+    elif running_stats.invalid:
+        stats = {'error': 'No valid rate data', 'generated_at': now.isoformat()}
     else:
         stats = {'error': 'No historical data', 'generated_at': now.isoformat()}
     
-    with open('docs/api/stats.json', 'w') as f:
-        json.dump(stats, f, indent=2)
+    write_json('docs/api/stats.json', stats)
+    
+    # OHLC rollups: small per-interval endpoints instead of the full raw history
+    os.makedirs('docs/api/ohlc', exist_ok=True)
+    for interval in ROLLUP_INTERVALS:
+        write_json(f'docs/api/ohlc/{interval}.json', rollups.document(interval), compact=True)
+    
+    # Multi-city rates (city_pipeline.py), published as-is when the tracker collects them
+    if os.path.exists(CITY_RATES_FILE):
+        with open(CITY_RATES_FILE, 'r') as f:
+            write_json('docs/api/cities.json', json.load(f))
+    
+    # Per-stage timings of recent tracker and site runs (run_metrics.py)
+    write_json('docs/api/health.json', {**health_summary(), 'generated_at': now.isoformat()})
+    
+    # Success rate, latency per source / period, pattern hits and coverage gaps of recent fetches (scrape_attempts.py)
+    write_json('docs/api/scraper_health.json', {**scraper_health(), 'generated_at': now.isoformat()})
     
     # Generate enhanced website with timing information
-    generate_enhanced_website(enhanced_latest, enhanced_history, stats)
+    with span('website'):
+        generate_enhanced_website(enhanced_latest, enhanced_history, stats)
     
     print("✅ Enhanced API endpoints generated with comprehensive timing information!")
     print(f"📊 Data age: {format_human_readable_age(fetch_age_seconds)}")
     print(f"🔄 Next update in: {round(next_update_minutes, 1)} minutes")
+    print(f"🗄️ History I/O: {io_stats_summary()}")
+    print(f"💾 Outputs: {output_stats_summary()}")
 
 def format_human_readable_age(seconds):
     """Convert seconds to human readable format"""
@@ -286,10 +355,9 @@ def get_current_update_frequency(ist_hour):
         return "Every 3 hours (Off hours)"
 
 def count_todays_updates(history):
-    """Count how many updates happened today"""
+    """Count how many updates happened today (IST)"""
     try:
-        today = datetime.now(IST).strftime('%Y-%m-%d')
-        return len([entry for entry in history if entry.get('timestamp', '').startswith(today)])
+        return history.count_since(ist_day_start(datetime.now(IST)))
     except:
         return 0
 
@@ -297,15 +365,7 @@ def count_last_24h_entries(history):
     """Count entries from last 24 hours"""
     try:
         cutoff = datetime.now(IST) - timedelta(hours=24)
-        count = 0
-        for entry in history:
-            entry_timestamp = entry['timestamp']
-            entry_time = datetime.fromisoformat(entry_timestamp)
-            if entry_time.tzinfo is None:
-                entry_time = entry_time.replace(tzinfo=IST)
-            if entry_time >= cutoff:
-                count += 1
-        return count
+        return history.count_since(cutoff)
     except:
         return 0
 
@@ -315,433 +375,94 @@ def calculate_avg_interval(history):
         if len(history) < 2:
             return None
         
-        intervals = []
-        for i in range(1, len(history)):
-            timestamp1 = history[i-1]['timestamp']
-            timestamp2 = history[i]['timestamp']
-            time1 = datetime.fromisoformat(timestamp1)
-            time2 = datetime.fromisoformat(timestamp2)
-            if time1.tzinfo is None:
-                time1 = time1.replace(tzinfo=IST)
-            if time2.tzinfo is None:
-                time2 = time2.replace(tzinfo=IST)
-            interval_minutes = (time2 - time1).total_seconds() / 60
-            intervals.append(interval_minutes)
-        
-        return round(sum(intervals) / len(intervals), 1)
+        # The mean of consecutive gaps telescopes to (newest - oldest) / gaps
+        total_minutes = (history.epochs[-1] - history.epochs[0]) / 60
+        return round(total_minutes / (len(history) - 1), 1)
     except:
         return None
 
-def calculate_24h_change(history):
-    """Calculate 24 hour change"""
+def calculate_change_since(series, hours):
+    """Rate change between the newest sample and the last one at least `hours` old"""
     try:
-        if len(history) < 2:
-            return 0
-        
-        current_rate = history[-1]['rate']
-        cutoff = datetime.now(IST) - timedelta(hours=24)
-        
-        for entry in reversed(history[:-1]):
-            entry_timestamp = entry['timestamp']
-            entry_time = datetime.fromisoformat(entry_timestamp)
-            if entry_time.tzinfo is None:
-                entry_time = entry_time.replace(tzinfo=IST)
-            if entry_time <= cutoff:
-                return round(current_rate - entry['rate'], 2)
-        
-        return 0
+        return series.change_since(round(datetime.now(IST).timestamp() * 1_000_000), hours)
     except:
         return 0
 
-def calculate_hour_change(history):
+def calculate_24h_change(series):
+    """Calculate 24 hour change"""
+    return calculate_change_since(series, 24)
+
+def calculate_hour_change(series):
     """Calculate 1 hour change"""
+    return calculate_change_since(series, 1)
+
+def load_rate_series(store, history):
+    """The newest ANALYTICS_TAIL_ROWS as aligned epoch/rate columns (NumPy-backed when available)"""
     try:
-        if len(history) < 2:
-            return 0
-        
-        current_rate = history[-1]['rate']
-        cutoff = datetime.now(IST) - timedelta(hours=1)
-        
-        for entry in reversed(history[:-1]):
-            entry_timestamp = entry['timestamp']
-            entry_time = datetime.fromisoformat(entry_timestamp)
-            if entry_time.tzinfo is None:
-                entry_time = entry_time.replace(tzinfo=IST)
-            if entry_time <= cutoff:
-                return round(current_rate - entry['rate'], 2)
-        
-        return 0
-    except:
-        return 0
+        if store is not None and len(store):
+            return RateSeries.from_store(store, last=ANALYTICS_TAIL_ROWS)
+    except Exception as e:
+        print(f"⚠️ Could not read history columns, using the recent snapshot: {e}")
+    return RateSeries.from_snapshot(history)
 
-def get_daily_high(history):
-    """Get today's highest rate"""
+def get_analytics(series, running_stats):
+    """Std dev and tail percentiles of every sample (running histogram); moving averages and volatility of the tail"""
     try:
-        today = datetime.now(IST).strftime('%Y-%m-%d')
-        today_rates = [entry['rate'] for entry in history 
-                      if entry.get('timestamp', '').startswith(today) 
-                      and isinstance(entry.get('rate'), (int, float))]
-        return max(today_rates) if today_rates else None
-    except:
+        block = analytics_summary(series, distribution=running_stats)
+        print(f"🧮 Analytics ({BACKEND}) over the newest {len(series)} samples")
+        return block
+    except Exception as e:
+        print(f"⚠️ Analytics failed: {e}")
         return None
 
-def get_daily_low(history):
-    """Get today's lowest rate"""
+def catch_up(aggregate, store, history):
+    """Fold samples scraped since the last run into a persisted aggregate and save it"""
     try:
-        today = datetime.now(IST).strftime('%Y-%m-%d')
-        today_rates = [entry['rate'] for entry in history 
-                      if entry.get('timestamp', '').startswith(today) 
-                      and isinstance(entry.get('rate'), (int, float))]
-        return min(today_rates) if today_rates else None
-    except:
-        return None
+        if aggregate.last_epoch is None or (history and aggregate.last_epoch < history.epochs[0]):
+            # First run (or a gap longer than the snapshot): catch up from the store's columns
+            if store is not None and len(store):
+                epochs_us, rates, _ = store.read_columns()
+                added = aggregate.ingest([value / 1_000_000 for value in epochs_us], rates)
+                print(f"📊 Rebuilt {type(aggregate).__name__} from {added} stored samples")
+        else:
+            aggregate.ingest(history.epochs, [entry.get('rate') for entry in history.entries])
+        aggregate.save()
+    except Exception as e:
+        print(f"⚠️ {type(aggregate).__name__} update failed: {e}")
+    return aggregate
+
+def get_daily_high(rollups):
+    """Get today's highest rate"""
+    today = rollups['1d'].get(datetime.now(IST).timestamp())
+    return today['high'] if today else None
+
+def get_daily_low(rollups):
+    """Get today's lowest rate"""
+    today = rollups['1d'].get(datetime.now(IST).timestamp())
+    return today['low'] if today else None
 
 def generate_enhanced_website(latest_data, history_data, stats_data):
-    """Generate enhanced website with timing information"""
-    
-    current_rate = latest_data.get('rate', 'N/A')
+    """Render docs/index.html's dynamic fragment into the compiled site template (site_builder.py)"""
     data_age = latest_data.get('data_age', {})
     freshness = latest_data.get('freshness', {})
     update_info = latest_data.get('update_info', {})
+    confidence_label = freshness.get('confidence', 'Unknown').replace('_', ' ').title()
     
-    # Determine freshness color
-    freshness_colors = {
-        "very_fresh": "#00ff00",
-        "fresh": "#90EE90", 
-        "moderate": "#FFA500",
-        "stale": "#FF6B6B"
-    }
-    freshness_color = freshness_colors.get(freshness.get('status', 'moderate'), "#FFA500")
-    
-    html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Kerala 24K Gold Rate API with Real Fetch Time</title>
-    <meta name="description" content="Kerala 24K gold rate API with real data fetch timing. Current: ₹{current_rate}/gram">
-    <link rel="icon" href="data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>🥇</text></svg>">
-    
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        
-        body {{
-            font-family: 'Segoe UI', system-ui, -apple-system, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            color: white;
-            line-height: 1.6;
-        }}
-        
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        
-        .header {{
-            text-align: center;
-            margin-bottom: 40px;
-        }}
-        
-        .rate-card {{
-            background: rgba(255, 255, 255, 0.1);
-            backdrop-filter: blur(10px);
-            border-radius: 20px;
-            padding: 40px;
-            text-align: center;
-            margin-bottom: 30px;
-            box-shadow: 0 8px 32px rgba(31, 38, 135, 0.37);
-            border: 1px solid rgba(255, 255, 255, 0.18);
-        }}
-        
-        .current-rate {{
-            font-size: 4rem;
-            font-weight: bold;
-            color: #ffd700;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-            margin-bottom: 10px;
-        }}
-        
-        .rate-unit {{
-            font-size: 1.5rem;
-            opacity: 0.8;
-            margin-bottom: 20px;
-        }}
-        
-        .freshness-indicator {{
-            background: rgba(255, 255, 255, 0.15);
-            border-radius: 15px;
-            padding: 20px;
-            margin: 20px 0;
-            border-left: 5px solid {freshness_color};
-        }}
-        
-        .freshness-status {{
-            font-size: 1.2rem;
-            font-weight: bold;
-            color: {freshness_color};
-        }}
-        
-        .timing-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin: 30px 0;
-        }}
-        
-        .timing-item {{
-            background: rgba(255, 255, 255, 0.1);
-            padding: 15px;
-            border-radius: 10px;
-            text-align: center;
-        }}
-        
-        .timing-value {{
-            font-size: 1.5rem;
-            font-weight: bold;
-            color: #ffd700;
-        }}
-        
-        .timing-label {{
-            font-size: 0.9rem;
-            opacity: 0.8;
-            margin-top: 5px;
-        }}
-        
-        .api-section {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 20px;
-            margin: 40px 0;
-        }}
-        
-        .api-card {{
-            background: rgba(255, 255, 255, 0.1);
-            backdrop-filter: blur(10px);
-            border-radius: 15px;
-            padding: 25px;
-            border: 1px solid rgba(255, 255, 255, 0.18);
-        }}
-        
-        .endpoint {{
-            background: rgba(0, 0, 0, 0.3);
-            padding: 15px;
-            border-radius: 8px;
-            font-family: 'Courier New', monospace;
-            margin: 10px 0;
-            word-break: break-all;
-            position: relative;
-        }}
-        
-        .copy-btn {{
-            background: #3498db;
-            color: white;
-            border: none;
-            padding: 5px 10px;
-            border-radius: 3px;
-            cursor: pointer;
-            font-size: 12px;
-            margin-left: 10px;
-        }}
-        
-        .copy-btn:hover {{
-            background: #2980b9;
-        }}
-        
-        @media (max-width: 768px) {{
-            .current-rate {{ font-size: 2.5rem; }}
-            .timing-grid {{ grid-template-columns: 1fr; }}
-            .api-section {{ grid-template-columns: 1fr; }}
-            .container {{ padding: 10px; }}
-        }}
-        
-        .footer {{
-            text-align: center;
-            padding: 20px;
-            opacity: 0.7;
-            margin-top: 40px;
-        }}
-        
-        .footer a {{
-            color: #ffd700;
-            text-decoration: none;
-        }}
-        
-        .auto-refresh {{
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background: rgba(0, 0, 0, 0.7);
-            padding: 10px 15px;
-            border-radius: 20px;
-            font-size: 0.9rem;
-        }}
-    </style>
-</head>
-<body>
-    <div class="auto-refresh">
-        🔄 Auto-refresh: <span id="refresh-timer">60</span>s
-    </div>
-    
-    <div class="container">
-        <div class="header">
-            <h1>🥇 Kerala Gold Rate API</h1>
-            <p>Real-time tracking with actual fetch time information</p>
-        </div>
-        
-        <div class="rate-card">
-            <div class="current-rate">₹{current_rate}</div>
-            <div class="rate-unit">per gram (24K)</div>
-            
-            <div class="freshness-indicator">
-                <div class="freshness-status">
-                    {freshness.get('description', 'Unknown')} Data
-                </div>
-                <div>Last fetched: {data_age.get('human_readable', 'Unknown')}</div>
-                <div>Confidence: {freshness.get('confidence', 'Unknown').replace('_', ' ').title()}</div>
-            </div>
-            
-            <div class="timing-grid">
-                <div class="timing-item">
-                    <div class="timing-value">{data_age.get('minutes', 0):.1f}</div>
-                    <div class="timing-label">Minutes Since Fetch</div>
-                </div>
-                <div class="timing-item">
-                    <div class="timing-value">{update_info.get('next_update_in_minutes', 0):.1f}</div>
-                    <div class="timing-label">Next Update (min)</div>
-                </div>
-                <div class="timing-item">
-                    <div class="timing-value">{update_info.get('total_updates_today', 0)}</div>
-                    <div class="timing-label">Updates Today</div>
-                </div>
-                <div class="timing-item">
-                    <div class="timing-value">{freshness.get('confidence', 'Unknown').replace('_', ' ').title()}</div>
-                    <div class="timing-label">Data Confidence</div>
-                </div>
-            </div>
-        </div>
-        
-        <div class="api-section">
-            <div class="api-card">
-                <h3>📡 Enhanced API Endpoints</h3>
-                <p>All endpoints now include comprehensive timing information:</p>
-                
-                <h4>Latest Rate with Timing:</h4>
-                <div class="endpoint">
-                    GET ./api/latest.json
-                    <button class="copy-btn" onclick="copyEndpoint('api/latest.json')">Copy URL</button>
-                </div>
-                
-                <h4>Historical Data with Metadata:</h4>
-                <div class="endpoint">
-                    GET ./api/history.json
-                    <button class="copy-btn" onclick="copyEndpoint('api/history.json')">Copy URL</button>
-                </div>
-                
-                <h4>Statistics with Trends:</h4>
-                <div class="endpoint">
-                    GET ./api/stats.json
-                    <button class="copy-btn" onclick="copyEndpoint('api/stats.json')">Copy URL</button>
-                </div>
-            </div>
-            
-            <div class="api-card">
-                <h3>⏰ Timing Information Included</h3>
-                <p>Every API response now includes:</p>
-                
-                <ul style="margin: 15px 0; padding-left: 20px;">
-                    <li><strong>data_fetched_at</strong> - When data was actually scraped</li>
-                    <li><strong>data_age</strong> - How old the data is (seconds/minutes/hours)</li>
-                    <li><strong>freshness</strong> - Data quality assessment</li>
-                    <li><strong>next_update_in_minutes</strong> - When next update expected</li>
-                    <li><strong>update_frequency</strong> - Current update schedule</li>
-                    <li><strong>confidence</strong> - Data reliability score</li>
-                </ul>
-            </div>
-            
-            <div class="api-card">
-                <h3>📊 Current Schedule</h3>
-                <div id="schedule-info">
-                    <p><strong>Current Period:</strong> {update_info.get('update_frequency', 'Unknown')}</p>
-                    <p><strong>Next Update:</strong> ~{update_info.get('next_update_in_minutes', 0):.1f} minutes</p>
-                    <p><strong>Updates Today:</strong> {update_info.get('total_updates_today', 0)} times</p>
-                </div>
-            </div>
-            
-            <div class="api-card">
-                <h3>🔧 Sample Enhanced Response</h3>
-                <div class="endpoint">
-{{
-  "rate": {current_rate},
-  "data_fetched_at": "{latest_data.get('data_fetched_at', '')}",
-  "data_age": {{
-    "minutes": {data_age.get('minutes', 0):.1f},
-    "human_readable": "{data_age.get('human_readable', '')}"
-  }},
-  "freshness": {{
-    "status": "{freshness.get('status', '')}",
-    "confidence": "{freshness.get('confidence', '')}"
-  }},
-  "next_update_in_minutes": {update_info.get('next_update_in_minutes', 0):.1f}
-}}
-                </div>
-            </div>
-        </div>
-        
-        <div class="footer">
-            <p>🔥 Enhanced with real fetch timing | Data from GoodReturns.in</p>
-            <p>📈 Now you know exactly when data was last fetched!</p>
-            <p><a href="https://github.com/sibincbaby/gold-rate-tracker">⭐ View Source Code</a></p>
-        </div>
-    </div>
-    
-    <script>
-        // Auto-refresh countdown
-        let refreshTimer = 60;
-        const timerElement = document.getElementById('refresh-timer');
-        
-        setInterval(() => {{
-            refreshTimer--;
-            timerElement.textContent = refreshTimer;
-            
-            if (refreshTimer <= 0) {{
-                location.reload();
-            }}
-        }}, 1000);
-        
-        // Copy endpoint URL to clipboard
-        function copyEndpoint(endpoint) {{
-            const fullUrl = window.location.origin + window.location.pathname + endpoint;
-            navigator.clipboard.writeText(fullUrl).then(() => {{
-                event.target.textContent = 'Copied!';
-                setTimeout(() => event.target.textContent = 'Copy URL', 2000);
-            }}).catch(() => {{
-                prompt('Copy this URL:', fullUrl);
-            }});
-        }}
-        
-        // Update timing displays every minute
-        setInterval(() => {{
-            fetch('./api/latest.json')
-                .then(r => r.json())
-                .then(data => {{
-                    const ageMinutes = data.data_age?.minutes || 0;
-                    const nextUpdate = data.update_info?.next_update_in_minutes || 0;
-                    
-                    // Update displays if elements exist
-                    const timingItems = document.querySelectorAll('.timing-value');
-                    if (timingItems[0]) timingItems[0].textContent = ageMinutes.toFixed(1);
-                    if (timingItems[1]) timingItems[1].textContent = nextUpdate.toFixed(1);
-                }})
-                .catch(() => console.log('Failed to update timing'));
-        }}, 60000);
-    </script>
-</body>
-</html>'''
-    
-    with open('docs/index.html', 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    build_site({
+        'current_rate': latest_data.get('rate', 'N/A'),
+        'freshness_class': freshness.get('status', 'moderate'),
+        'freshness_description': freshness.get('description', 'Unknown'),
+        'age_human': data_age.get('human_readable', 'Unknown'),
+        'confidence_label': confidence_label,
+        'age_minutes': f"{data_age.get('minutes', 0):.1f}",
+        'next_update_minutes': f"{update_info.get('next_update_in_minutes', 0):.1f}",
+        'updates_today': update_info.get('total_updates_today', 0),
+        'update_frequency': update_info.get('update_frequency', 'Unknown'),
+        'fetched_at': latest_data.get('data_fetched_at', ''),
+        'age_human_raw': data_age.get('human_readable', ''),
+        'freshness_status': freshness.get('status', ''),
+        'confidence': freshness.get('confidence', '')
+    })
 
 from datetime import timedelta
 
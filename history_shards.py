@@ -0,0 +1,128 @@
+"""
+🧱 IMMUTABLE HISTORY SHARDS
+Publishes history as one content-hashed file per IST day plus a small manifest.
+
+  docs/api/history/manifest.json              shard list: day, file, range, count, sha256
+  docs/api/history/2026-10-17.3f9c0a1b2d4e.json
+
+A shard's name changes whenever its bytes change, so a closed day's file is
+immutable and can be cached forever. Each run only re-shards the newest day
+in the manifest and anything after it: normally today's shard and the
+manifest are the only files that change, and nothing is rewritten when no
+new rows arrived. Closed days are never rewritten, so they outlive store
+compaction. A re-sharded day's old file is listed under "superseded" and
+deleted one generation later, so a client holding the previous manifest can
+still fetch it.
+"""
+
+import hashlib
+import json
+import os
+from bisect import bisect_left
+
+from aggregates import ist_day_key
+from atomic_output import write_bytes, write_json
+
+SHARD_DIR = 'docs/api/history'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHARS = 12
+
+
+def load_manifest(shard_dir=SHARD_DIR):
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Shard manifest unreadable, re-sharding all history: {e}")
+        return {}
+
+
+def _rows_since(store, history, start_epoch):
+    """(epochs, entries) at or after start_epoch; the run's snapshot is used when it reaches back far enough"""
+    if start_epoch is not None and history and history.epochs[0] <= start_epoch:
+        index = history.index_after(start_epoch)
+        return history.epochs[index:], history.entries[index:]
+    if store is None or not len(store):
+        return history.epochs, history.entries
+
+    ts = store.read_column('ts')
+    index = 0 if start_epoch is None else bisect_left(ts, int(start_epoch * 1_000_000))
+    entries = store.read_entries(last=len(ts) - index)
+    return [value / 1_000_000 for value in ts[index:]], entries
+
+
+def _write_shard(shard_dir, day, entries, epochs):
+    """Write one day's shard under its content hash (untouched if that exact file exists)"""
+    body = json.dumps({'day': day, 'timezone': 'Asia/Kolkata', 'count': len(entries), 'data': entries},
+                      separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()
+    file_name = f"{day}.{digest[:HASH_CHARS]}.json"
+    write_bytes(os.path.join(shard_dir, file_name), body)
+    return {
+        'day': day,
+        'file': file_name,
+        'first': entries[0].get('timestamp'),
+        'last': entries[-1].get('timestamp'),
+        'first_epoch': int(epochs[0]),
+        'last_epoch': int(epochs[-1]),
+        'count': len(entries),
+        'bytes': len(body),
+        'sha256': digest
+    }
+
+
+def publish_history_shards(store, history, today_key, shard_dir=SHARD_DIR):
+    """Bring the per-day shards and manifest up to date; returns the manifest"""
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest = load_manifest(shard_dir)
+    shards = manifest.get('shards', []) if manifest.get('version') == MANIFEST_VERSION else []
+
+    # New rows can only land on the newest shard's day or later
+    resume_day = shards[-1]['day'] if shards else None
+    start_epoch = shards[-1]['first_epoch'] if shards else None
+    epochs, entries = _rows_since(store, history, start_epoch)
+
+    groups = {}
+    for epoch, entry in zip(epochs, entries):
+        groups.setdefault(ist_day_key(epoch), []).append((epoch, entry))
+
+    kept = [shard for shard in shards if resume_day is None or shard['day'] < resume_day]
+    reopened = shards[len(kept):]
+    if not groups:
+        # Nothing readable from the resume point (e.g. store unavailable): keep what was published
+        kept.extend(reopened)
+    for day in sorted(groups):
+        if resume_day is not None and day < resume_day:
+            continue
+        rows = groups[day]
+        kept.append(_write_shard(shard_dir, day, [entry for _, entry in rows], [epoch for epoch, _ in rows]))
+
+    # Keep this run's superseded files for one generation; delete the ones the previous run superseded
+    current = {shard['file'] for shard in kept}
+    superseded = sorted({shard['file'] for shard in reopened} - current)
+    if superseded:
+        for file_name in set(manifest.get('superseded', [])) - current - set(superseded):
+            try:
+                os.remove(os.path.join(shard_dir, file_name))
+            except OSError:
+                pass
+    else:
+        superseded = [name for name in manifest.get('superseded', []) if name not in current]
+
+    for shard in kept:
+        shard['final'] = shard['day'] < today_key
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'granularity': 'day',
+        'timezone': 'Asia/Kolkata',
+        'total_entries': sum(shard['count'] for shard in kept),
+        'shards': kept,
+        'superseded': superseded
+    }
+    write_json(os.path.join(shard_dir, MANIFEST_NAME), manifest, compact=True)
+    return manifest
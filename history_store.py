@@ -0,0 +1,431 @@
+"""
+🗄️ APPEND-ONLY HISTORY STORE
+Compact rate history shared by the tracker and the site generator.
+
+Layout (under data/history/<generation>/):
+  log.ndjson     one compact JSON entry per line, constant fields stripped
+  ts.i64         epoch microseconds per entry          (fixed width, little endian)
+  rate.f64       rate per gram per entry               (fixed width)
+  period.u8      market period code per entry          (fixed width)
+  logend.i64     byte offset where each log line ends  (fixed width)
+
+Appends touch each file once, so write cost does not grow with history size.
+The row count is the shortest column, which makes a crash mid-append harmless:
+the partial row is trimmed the next time the store is opened. Compaction writes
+a new generation and flips the CURRENT pointer atomically.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from atomic_output import fsync_dir
+
+IST = ZoneInfo("Asia/Kolkata")
+
+HISTORY_DIR = 'data/history'
+LEGACY_HISTORY_FILE = 'data/rate_history.json'
+DEFAULT_RETENTION = 500
+COMPACT_SLACK_FRACTION = 0.25  # Compact once the store holds 25% more rows than retention
+
+PERIOD_CODES = ('UNKNOWN', 'AKGSMA_MORNING_RUSH', 'ACTIVE_TRADING', 'EVENING_UPDATE', 'OFF_HOURS')
+PERIOD_INDEX = {name: code for code, name in enumerate(PERIOD_CODES)}
+
+# Fields that are identical on (almost) every entry; only stored when they differ
+DEFAULT_FIELDS = {
+    'currency': 'INR',
+    'unit': 'per gram',
+    'purity': '24K',
+    'location': 'Kerala',
+    'source': 'https://www.goodreturns.in/gold-rates/kerala.html',
+    'success': True
+}
+
+# Key order of entries as the tracker writes them
+ENTRY_FIELD_ORDER = ('rate', 'currency', 'unit', 'purity', 'location', 'timestamp', 'ist_time',
+                     'source', 'success', 'market_period', 'is_weekend')
+
+# Per-process read instrumentation, reported by io_stats_summary()
+IO_STATS = {'history_loads': 0, 'files_read': 0, 'bytes_read': 0, 'parse_seconds': 0.0}
+
+# name -> array typecode
+COLUMNS = {'ts': 'q', 'rate': 'd', 'period': 'B', 'logend': 'q'}
+COLUMN_FILES = {'ts': 'ts.i64', 'rate': 'rate.f64', 'period': 'period.u8', 'logend': 'logend.i64'}
+
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp, treating naive values as IST"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=IST)
+    return parsed
+
+
+def to_epoch_us(value):
+    """ISO timestamp -> integer epoch microseconds"""
+    parsed = parse_timestamp(value)
+    return int(parsed.timestamp()) * 1_000_000 + parsed.microsecond
+
+
+def pack_entry(entry):
+    """Strip constant fields before writing an entry to the log"""
+    packed = {k: v for k, v in entry.items() if DEFAULT_FIELDS.get(k, object()) != v}
+    if packed.get('ist_time') == packed.get('timestamp'):
+        packed.pop('ist_time', None)
+    return packed
+
+
+def unpack_entry(packed):
+    """Restore the full entry shape the rest of the code expects"""
+    entry = dict(DEFAULT_FIELDS)
+    entry.update(packed)
+    entry.setdefault('ist_time', entry.get('timestamp'))
+    ordered = {key: entry.pop(key) for key in ENTRY_FIELD_ORDER if key in entry}
+    ordered.update(entry)
+    return ordered
+
+
+def reset_io_stats():
+    """Zero the read counters (start of a run)"""
+    IO_STATS.update(history_loads=0, files_read=0, bytes_read=0, parse_seconds=0.0)
+
+
+def io_stats_summary():
+    """One-line summary of history reads made by this process"""
+    return (f"{IO_STATS['history_loads']} history load(s), {IO_STATS['files_read']} file read(s), "
+            f"{IO_STATS['bytes_read']:,} bytes, {IO_STATS['parse_seconds'] * 1000:.1f} ms parsing")
+
+
+def _read_range(file_path, start, length):
+    """Read `length` bytes at `start`, counting the read"""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(length)
+    IO_STATS['files_read'] += 1
+    IO_STATS['bytes_read'] += len(data)
+    return data
+
+
+def _encode_line(entry):
+    return (json.dumps(pack_entry(entry), ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def _column_values(entry, logend):
+    rate = entry.get('rate')
+    return {
+        'ts': to_epoch_us(entry['timestamp']),
+        'rate': float(rate) if isinstance(rate, (int, float)) else float('nan'),
+        'period': PERIOD_INDEX.get(entry.get('market_period'), 0),
+        'logend': logend
+    }
+
+
+class HistoryStore:
+    """Append-only rate history with fixed-width columns and periodic compaction"""
+
+    def __init__(self, root=HISTORY_DIR, retention=DEFAULT_RETENTION, legacy_file=LEGACY_HISTORY_FILE, read_only=False):
+        self.root = root
+        self.retention = retention
+        self.read_only = read_only  # No directories, repairs, migration or appends (dry runs, reports)
+        if not read_only:
+            os.makedirs(self.root, exist_ok=True)
+        self.generation = self._read_current()
+        if not read_only:
+            os.makedirs(self.path(), exist_ok=True)
+        self.count = self._repair()
+
+        if self.count == 0 and legacy_file and os.path.exists(legacy_file):
+            if read_only:
+                print(f"⚠️ {legacy_file} is not migrated in read-only mode; run once normally to import it")
+            else:
+                self._migrate_legacy(legacy_file)
+
+    # ------------------------------------------------------------------ layout
+
+    def path(self, name=None, generation=None):
+        gen_dir = os.path.join(self.root, f"gen-{self.generation if generation is None else generation:06d}")
+        return gen_dir if name is None else os.path.join(gen_dir, name)
+
+    def _read_current(self):
+        try:
+            with open(os.path.join(self.root, 'CURRENT'), 'r') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 1
+
+    def _write_current(self, generation):
+        pointer = os.path.join(self.root, 'CURRENT')
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(str(generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer + '.tmp', pointer)
+        fsync_dir(self.root)
+
+    def _repair(self):
+        """Trim any half-written row left by a crash; returns the consistent row count"""
+        sizes = {}
+        for name, typecode in COLUMNS.items():
+            file_path = self.path(COLUMN_FILES[name])
+            size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            sizes[name] = size // array(typecode).itemsize
+        count = min(sizes.values())
+        if self.read_only:
+            return count  # Reads stop at `count`, so a torn tail is simply ignored
+
+        for name, typecode in COLUMNS.items():
+            expected = count * array(typecode).itemsize
+            file_path = self.path(COLUMN_FILES[name])
+            if os.path.exists(file_path) and os.path.getsize(file_path) != expected:
+                os.truncate(file_path, expected)
+
+        log_end = self._logend_at(count - 1) if count else 0
+        log_path = self.path('log.ndjson')
+        if os.path.exists(log_path) and os.path.getsize(log_path) != log_end:
+            os.truncate(log_path, log_end)
+        return count
+
+    def _logend_at(self, row):
+        column = array('q')
+        column.frombytes(_read_range(self.path(COLUMN_FILES['logend']), row * column.itemsize, column.itemsize))
+        if sys.byteorder != 'little':
+            column.byteswap()
+        return column[0]
+
+    def _migrate_legacy(self, legacy_file):
+        """Import data/rate_history.json once, then set it aside"""
+        try:
+            with open(legacy_file, 'r') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not migrate {legacy_file}: {e}")
+            return
+        entries = [entry for entry in legacy if entry.get('timestamp')]
+        self._write_generation(self.generation, entries)
+        self.count = len(entries)
+        os.replace(legacy_file, legacy_file + '.migrated')
+        print(f"📦 Migrated {len(entries)} entries from {legacy_file} into {self.root}")
+
+    # ------------------------------------------------------------------ writes
+
+    def __len__(self):
+        return self.count
+
+    def append(self, entry):
+        """Append one entry in O(1): one log line plus one value per column"""
+        if self.read_only:
+            raise OSError(f"history store {self.root} is open read-only")
+        line = _encode_line(entry)
+        log_path = self.path('log.ndjson')
+        with open(log_path, 'ab') as f:
+            f.write(line)
+            logend = f.tell()
+
+        values = _column_values(entry, logend)
+        # ts is written last: a row only counts once every column has it
+        for name in ('rate', 'period', 'logend', 'ts'):
+            column = array(COLUMNS[name], [values[name]])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            with open(self.path(COLUMN_FILES[name]), 'ab') as f:
+                f.write(column.tobytes())
+        self.count += 1
+
+    def maybe_compact(self):
+        """Compact when the store has grown past retention plus slack (amortised O(1) per append)"""
+        if self.retention and self.count > self.retention * (1 + COMPACT_SLACK_FRACTION):
+            self.compact()
+            return True
+        return False
+
+    def compact(self, keep=None):
+        """Rewrite the newest `keep` rows into a fresh generation and switch to it"""
+        if self.read_only:
+            raise OSError(f"history store {self.root} is open read-only")
+        keep = keep or self.retention
+        entries = self.read_entries(last=keep)
+        old_generation = self.generation
+        new_generation = old_generation + 1
+
+        self._write_generation(new_generation, entries)
+        self._write_current(new_generation)
+        self.generation = new_generation
+        self.count = len(entries)
+        shutil.rmtree(self.path(generation=old_generation), ignore_errors=True)
+        print(f"🗜️ Compacted history to {self.count} entries (generation {new_generation})")
+
+    def _write_generation(self, generation, entries):
+        gen_dir = self.path(generation=generation)
+        shutil.rmtree(gen_dir, ignore_errors=True)
+        os.makedirs(gen_dir)
+
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        lines = []
+        logend = 0
+        for entry in entries:
+            line = _encode_line(entry)
+            lines.append(line)
+            logend += len(line)
+            for name, value in _column_values(entry, logend).items():
+                columns[name].append(value)
+
+        # Every file and the directory entry reach disk before _write_current() points CURRENT here
+        files = {'log.ndjson': b''.join(lines)}
+        for name, column in columns.items():
+            if sys.byteorder != 'little':
+                column.byteswap()
+            files[COLUMN_FILES[name]] = column.tobytes()
+        for file_name, data in files.items():
+            with open(os.path.join(gen_dir, file_name), 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        fsync_dir(gen_dir)
+        fsync_dir(self.root)
+
+    # ------------------------------------------------------------------ reads
+
+    def read_column(self, name, last=None):
+        """Load one fixed-width column (optionally only its newest `last` values)"""
+        column = array(COLUMNS[name])
+        start = 0 if last is None else max(0, self.count - last)
+        file_path = self.path(COLUMN_FILES[name])
+        if self.count and os.path.exists(file_path):
+            column.frombytes(_read_range(file_path, start * column.itemsize, (self.count - start) * column.itemsize))
+            if sys.byteorder != 'little':
+                column.byteswap()
+        return column
+
+    def read_columns(self, last=None):
+        """Return (epoch_us, rate, period_code) arrays for the newest `last` rows"""
+        return self.read_column('ts', last), self.read_column('rate', last), self.read_column('period', last)
+
+    def read_entries(self, last=None):
+        """Return full entry dicts, oldest first; `last` seeks straight to the tail of the log"""
+        IO_STATS['history_loads'] += 1
+        if not self.count:
+            return []
+        start_row = 0 if last is None else max(0, self.count - last)
+        start_byte = self._logend_at(start_row - 1) if start_row else 0
+        end_byte = self._logend_at(self.count - 1)
+
+        raw = _read_range(self.path('log.ndjson'), start_byte, end_byte - start_byte)
+        started = time.perf_counter()
+        entries = [unpack_entry(json.loads(line)) for line in raw.splitlines() if line]
+        IO_STATS['parse_seconds'] += time.perf_counter() - started
+        return entries
+
+    def latest(self):
+        """Newest entry, or None"""
+        entries = self.read_entries(last=1)
+        return entries[0] if entries else None
+
+
+class HistorySnapshot:
+    """
+    History loaded once per run, with a time index of epoch seconds.
+
+    Epochs come straight from the store's ts column, so no timestamp strings are
+    parsed. Entries are kept in time order, which turns every window query
+    ("last hour", "22-26h ago", "today in IST") into an O(log n) bisect.
+    New entries are buffered and written back in one flush().
+    """
+
+    def __init__(self, store, last=None):
+        self.store = store
+        self.entries = store.read_entries(last=last) if store is not None else []
+        epochs_us = store.read_column('ts', last=len(self.entries)) if self.entries else []
+        self.epochs = [value / 1_000_000 for value in epochs_us]
+        if len(self.epochs) != len(self.entries):
+            started = time.perf_counter()
+            self.epochs = [parse_timestamp(entry['timestamp']).timestamp() for entry in self.entries]
+            IO_STATS['parse_seconds'] += time.perf_counter() - started
+        if any(b < a for a, b in zip(self.epochs, self.epochs[1:])):
+            order = sorted(range(len(self.epochs)), key=self.epochs.__getitem__)
+            self.entries = [self.entries[i] for i in order]
+            self.epochs = [self.epochs[i] for i in order]
+        self.pending = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def latest(self):
+        """Newest entry (including unflushed ones), or None"""
+        return self.entries[-1] if self.entries else None
+
+    def time_at(self, index):
+        """Entry time as an IST datetime"""
+        return datetime.fromtimestamp(self.epochs[index], IST)
+
+    # ------------------------------------------------------------------ time index
+
+    def index_after(self, moment):
+        """Index of the first entry at or after `moment` (datetime or epoch seconds)"""
+        return bisect_left(self.epochs, _epoch(moment))
+
+    def index_through(self, moment):
+        """Index just past the last entry at or before `moment`"""
+        return bisect_right(self.epochs, _epoch(moment))
+
+    def since(self, moment):
+        """Entries at or after `moment`, oldest first"""
+        return self.entries[self.index_after(moment):]
+
+    def count_since(self, moment):
+        return len(self.entries) - self.index_after(moment)
+
+    def between(self, start, end):
+        """(lo, hi) index range of entries with start <= time <= end"""
+        return self.index_after(start), self.index_through(end)
+
+    def last_at_or_before(self, moment, before_index=None):
+        """Index of the newest entry at or before `moment` (optionally below `before_index`), or None"""
+        index = self.index_through(moment)
+        if before_index is not None:
+            index = min(index, before_index)
+        return index - 1 if index > 0 else None
+
+    def closest_to(self, target, start, end):
+        """Index of the entry within [start, end] nearest to `target`, or None"""
+        lo, hi = self.between(start, end)
+        if lo >= hi:
+            return None
+        target = _epoch(target)
+        pos = min(max(bisect_left(self.epochs, target, lo, hi), lo), hi - 1)
+        if pos > lo and abs(self.epochs[pos - 1] - target) <= abs(self.epochs[pos] - target):
+            pos -= 1
+        return pos
+
+    # ------------------------------------------------------------------ writes
+
+    def add(self, entry):
+        """Add an entry to the snapshot; it reaches the store on flush()"""
+        self.entries.append(entry)
+        self.epochs.append(parse_timestamp(entry['timestamp']).timestamp())
+        self.pending.append(entry)
+
+    def flush(self):
+        """Append buffered entries to the store, compacting if retention is exceeded"""
+        for entry in self.pending:
+            self.store.append(entry)
+        written = len(self.pending)
+        self.pending = []
+        if written:
+            self.store.maybe_compact()
+        return written
+
+
+def _epoch(moment):
+    return moment.timestamp() if isinstance(moment, datetime) else float(moment)
+
+
+def ist_day_start(moment):
+    """Midnight IST of the day containing `moment`"""
+    local = moment.astimezone(IST) if isinstance(moment, datetime) else datetime.fromtimestamp(moment, IST)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -0,0 +1,180 @@
+"""
+🧾 MESSAGE RENDERING
+Notification text as pure functions of the rate and the message settings.
+The tracker and every subscriber alert share them.
+
+  MessageConfig   the settings compiled once from message_config() in
+                  scrape_with_notifications.py. It is frozen and hashable and
+                  includes the text style (emoji or plain), so it is the
+                  "config + channel format" part of every cache key
+  fragments       gram_prices, gram_changes and selling_rates. Each is an LRU
+                  cache keyed by (config, rate, ...): the owner alert, each
+                  subscriber group and the initial message all reuse one
+                  string for the same rate
+  selling_matrix  the gram x fee table behind selling_rates (labels and fee
+                  fractions), built once per config
+  render_*        whole messages, assembled from fragments with a single join
+
+Every function returns exactly the text the tracker built inline before.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+RENDER_CACHE_SIZE = 512  # Fragments kept per kind (a few rates x subscriber gram lists)
+
+PERIOD_EMOJI = {"AKGSMA_MORNING_RUSH": "🌅", "EVENING_UPDATE": "🌆", "ACTIVE_TRADING": "📊", "OFF_HOURS": "🌙"}
+
+
+class MessageConfig(namedtuple('MessageConfig', 'title emoji period_context yesterday multi_gram gram_quantities '
+                                                'selling selling_gram_quantities fee_percentages')):
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, config):
+        """Compile a message_config() dict (lists become tuples so the config can be a cache key)"""
+        return cls(**{key: tuple(value) if isinstance(value, list) else value for key, value in config.items()})
+
+
+def _direction(config, change):
+    if config.emoji:
+        return "📈" if change > 0 else "📉" if change < 0 else "➡️"
+    return "UP" if change > 0 else "DOWN" if change < 0 else "STABLE"
+
+
+def _arrow(config, change):
+    if config.emoji:
+        return "⬆️" if change > 0 else "⬇️" if change < 0 else "➡️"
+    return "↑" if change > 0 else "↓" if change < 0 else "→"
+
+
+@lru_cache(maxsize=None)
+def selling_matrix(config):
+    """((gram label, grams, ((fee label, fee fraction), ...)), ...) for every selling quantity"""
+    return tuple((f"{grams}g: ", grams, tuple((f"{fee}%:₹", fee / 100) for fee in config.fee_percentages))
+                 for grams in config.selling_gram_quantities)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def gram_prices(config, rate, quantities=None):
+    """ "2g: ₹20,236 | 5g: ₹50,590 | ..." ("" when multi-gram display is off)"""
+    if not config.multi_gram:
+        return ""
+    return " | ".join(f"{grams}g: ₹{rate * grams:,.0f}" for grams in quantities or config.gram_quantities)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def gram_changes(config, current_rate, previous_rate, quantities=None):
+    """ "2g: ⬆️₹24 | 5g: ⬆️₹60 | ..." ("" when off or unchanged)"""
+    if not config.multi_gram or current_rate == previous_rate:
+        return ""
+    arrow = _arrow(config, current_rate - previous_rate)
+    return " | ".join(f"{grams}g: {arrow}₹{abs(current_rate * grams - previous_rate * grams):.0f}"
+                      for grams in quantities or config.gram_quantities)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def selling_rates(config, rate):
+    """One line per selling quantity with the net value after each fee ("" when off)"""
+    if not config.selling:
+        return ""
+    lines = []
+    for label, grams, fees in selling_matrix(config):
+        gross = rate * grams
+        lines.append(label + " ".join(f"{fee_label}{gross - gross * fraction:.0f}" for fee_label, fraction in fees))
+    return "\n".join(lines)
+
+
+def yesterday_section(config, current_rate, yesterday):
+    """ "\\n\\n📅 Since Yesterday ..." for a get_yesterday_rate() dict ("" without one)"""
+    if not (yesterday and config.yesterday):
+        return ""
+    rate = yesterday['rate']
+    change = current_rate - rate
+    change_percent = (change / rate) * 100 if rate > 0 else 0
+    return (f"\n\n📅 Since Yesterday (~{yesterday['hours_ago']:.0f}h ago):\n"
+            f"{_direction(config, change)} ₹{change:+.0f} ({change_percent:+.2f}%) from ₹{rate:.0f}/g")
+
+
+def render_alert(config, moment, current_rate, previous_rate, change, change_percent, notification_type, period,
+                 minutes_since, yesterday=None):
+    """The owner's alert (stability wording when the change is zero)"""
+    emoji = PERIOD_EMOJI.get(period, "📈") if config.emoji else ""
+    if abs(change) == 0:
+        parts = [f"""{emoji} {config.title}
+
+{_direction(config, change)} NO CHANGE for {minutes_since:.0f} minutes
+Current: ₹{current_rate:.0f}/g
+Type: {notification_type}
+Time: {moment.strftime('%I:%M %p IST')}"""]
+        if config.multi_gram:
+            parts.append(f"\n\n💰 Quick Prices:\n{gram_prices(config, current_rate)}")
+    else:
+        size = abs(change)
+        magnitude = "MAJOR" if size >= 50 else "SIGNIFICANT" if size >= 25 else "MODERATE" if size >= 10 else "MINOR"
+        parts = [f"""{emoji} {config.title}
+
+{_arrow(config, change)} {magnitude} CHANGE: ₹{change:+.0f} ({change_percent:+.2f}%)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+💰 Current Rate: ₹{current_rate:,.0f}/g
+
+⏱️ Gap: {minutes_since:.0f} min | 🕐 {moment.strftime('%I:%M %p')}"""]
+        if config.multi_gram:
+            parts.append(f"\n\n💰 Current Prices:\n{gram_prices(config, current_rate)}")
+            changes = gram_changes(config, current_rate, previous_rate)
+            if changes:
+                parts.append(f"\n\n💸 Price Changes:\n{changes}")
+
+    if config.selling:
+        parts.append(f"\n\n💸 Selling Value (After Fees):\n{selling_rates(config, current_rate)}")
+    parts.append(yesterday_section(config, current_rate, yesterday))
+    if config.period_context:
+        if abs(change) == 0:
+            parts.append(f"\n\n💡 Stability during {period.lower().replace('_', ' ')} noted.")
+        else:
+            parts.append(f"\n\n🎯 Period: {period.lower().replace('_', ' ')}")
+    return "".join(parts)
+
+
+def render_initial(config, moment, current_rate, period, yesterday=None):
+    """The setup message sent on the first scrape"""
+    parts = [f"""
+
+Current Rate: ₹{current_rate:.0f}/g
+Period: {period.replace('_', ' ').title()}
+Time: {moment.strftime('%d %b, %I:%M %p IST')}"""]
+    if config.multi_gram:
+        parts.append(f"\n\n💰 Quick Prices:\n{gram_prices(config, current_rate)}")
+    if config.selling:
+        parts.append(f"\n\n💸 Selling Value (After Fees):\n{selling_rates(config, current_rate)}")
+    parts.append(yesterday_section(config, current_rate, yesterday))
+    return "".join(parts)
+
+
+def render_subscriber_alert(config, moment, kind, current_rate, previous_rate, change, change_percent, period,
+                            quantities):
+    """Short alert for a subscriber, priced in their own gram quantities"""
+    if config.emoji:
+        label = "📊 Your Alert" if kind == 'main' else "📱 Your Micro Alert"
+    else:
+        label = "Your Alert" if kind == 'main' else "Your Micro Alert"
+    parts = [f"""{label} - {config.title}
+
+{_arrow(config, change)} ₹{change:+.0f} ({change_percent:+.2f}%)
+💰 Current Rate: ₹{current_rate:,.0f}/g
+🕐 {moment.strftime('%I:%M %p')} | {period.replace('_', ' ').title()}"""]
+    if config.multi_gram:
+        quantities = tuple(quantities)
+        parts.append(f"\n\n💰 Your Prices:\n{gram_prices(config, current_rate, quantities)}")
+        changes = gram_changes(config, current_rate, previous_rate, quantities)
+        if changes:
+            parts.append(f"\n{changes}")
+    return "".join(parts)
+
+
+def cache_info():
+    """Hits / misses of each fragment cache"""
+    return {name: function.cache_info()._asdict()
+            for name, function in (('gram_prices', gram_prices), ('gram_changes', gram_changes),
+                                   ('selling_rates', selling_rates))}
@@ -0,0 +1,234 @@
+"""
+📣 NOTIFICATION DISPATCHER
+Sends one message to every configured channel at once.
+
+Each channel has its own keep-alive session, so repeated alerts (and every
+alert in daemon mode) reuse open TLS connections. Channels run in parallel in
+a small thread pool, so a slow channel no longer delays the others. Each
+channel gets a hard deadline covering all of its attempts. Connection errors,
+timeouts, 429 and 5xx responses are retried with full-jitter exponential
+backoff, and a 429 Retry-After is honoured when it fits inside the deadline.
+Per-channel attempts, outcomes and latencies are kept in CHANNEL_METRICS.
+
+Base URLs come from the environment so the whole path can be pointed at a
+local stub server: TELEGRAM_API_BASE, PUSHOVER_API_BASE, NTFY_BASE_URL.
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from run_metrics import record
+
+CHANNEL_DEADLINE_SECONDS = 12.0   # Total time a channel may spend, retries included
+ATTEMPT_TIMEOUT_SECONDS = 5.0     # Connect/read timeout of a single attempt
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES_KEPT = 200
+DISPATCH_WORKERS = 8              # Concurrent sends (one per channel up to this many)
+
+TELEGRAM_API_BASE = os.environ.get('TELEGRAM_API_BASE', 'https://api.telegram.org')
+PUSHOVER_API_BASE = os.environ.get('PUSHOVER_API_BASE', 'https://api.pushover.net')
+NTFY_BASE_URL = os.environ.get('NTFY_BASE_URL', 'https://ntfy.sh')
+
+# channel name -> {'sent', 'failed', 'attempts', 'retries', 'latencies': [seconds of successful sends]}
+CHANNEL_METRICS = {}
+
+
+def pooled_session():
+    """Keep-alive session for one provider; subscriber channels of the same provider share one"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=DISPATCH_WORKERS, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class TelegramChannel:
+    name = 'telegram'
+
+    def __init__(self, token, chat_id, base_url=TELEGRAM_API_BASE, name=None, session=None):
+        self.url = f"{base_url}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.name = name or self.name
+        self.session = session or pooled_session()
+
+    def request(self, message, priority):
+        return self.url, {'data': {'chat_id': self.chat_id, 'text': message, 'parse_mode': 'HTML'}}
+
+
+class PushoverChannel:
+    name = 'pushover'
+    PRIORITY_MAP = {"low": -1, "normal": 0, "high": 1}
+
+    def __init__(self, token, user, title, base_url=PUSHOVER_API_BASE, name=None, session=None):
+        self.url = f"{base_url}/1/messages.json"
+        self.token = token
+        self.user = user
+        self.title = title
+        self.name = name or self.name
+        self.session = session or pooled_session()
+
+    def request(self, message, priority):
+        return self.url, {'data': {
+            'token': self.token,
+            'user': self.user,
+            'message': message,
+            'title': self.title,
+            'priority': self.PRIORITY_MAP.get(priority, 0)
+        }}
+
+
+class NtfyChannel:
+    name = 'ntfy'
+    PRIORITY_MAP = {"low": "min", "normal": "default", "high": "high"}
+
+    def __init__(self, topic, title, emoji_tags=True, base_url=NTFY_BASE_URL, name=None, session=None):
+        self.url = f"{base_url}/{topic}"
+        self.title = title
+        self.emoji_tags = emoji_tags
+        self.name = name or self.name
+        self.session = session or pooled_session()
+
+    def request(self, message, priority):
+        if self.emoji_tags:
+            tags = "gold,kerala,fire,money" if priority == "high" else "gold,kerala,chart_with_upwards_trend"
+        else:
+            tags = "gold,kerala"
+        headers = {
+            'Title': self.title,
+            'Priority': self.PRIORITY_MAP.get(priority, "default"),
+            'Tags': tags
+        }
+        return self.url, {'data': message.encode('utf-8'), 'headers': headers}
+
+
+def _metrics_for(name):
+    return CHANNEL_METRICS.setdefault(name, {'sent': 0, 'failed': 0, 'attempts': 0, 'retries': 0, 'latencies': []})
+
+
+def _retry_after_seconds(response):
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', '')))
+    except ValueError:
+        return None
+
+
+def send_with_retries(channel, message, priority, deadline_seconds=CHANNEL_DEADLINE_SECONDS):
+    """POST to one channel until it succeeds, fails permanently or runs out of time"""
+    url, kwargs = channel.request(message, priority)
+    metrics = _metrics_for(channel.name)
+    started = time.monotonic()
+    deadline = started + deadline_seconds
+    outcome = {'ok': False, 'status': None, 'attempts': 0, 'error': None, 'retry_after': None}
+
+    for attempt in range(MAX_ATTEMPTS):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            outcome['error'] = outcome['error'] or 'deadline exceeded'
+            break
+        outcome['attempts'] += 1
+        metrics['attempts'] += 1
+        retry_after = None
+        try:
+            response = channel.session.post(url, timeout=min(ATTEMPT_TIMEOUT_SECONDS, remaining), **kwargs)
+            outcome['status'] = response.status_code
+            if 200 <= response.status_code < 300:
+                outcome['ok'] = True
+                break
+            outcome['error'] = f"HTTP {response.status_code}"
+            if response.status_code not in RETRY_STATUSES:
+                break
+            if response.status_code == 429:
+                retry_after = _retry_after_seconds(response)
+                outcome['retry_after'] = retry_after
+        except requests.RequestException as e:
+            outcome['error'] = type(e).__name__
+
+        if attempt + 1 < MAX_ATTEMPTS:
+            delay = retry_after if retry_after is not None else random.uniform(0, BACKOFF_BASE_SECONDS * 2 ** attempt)
+            if time.monotonic() + delay >= deadline:
+                break
+            metrics['retries'] += 1
+            time.sleep(delay)
+
+    outcome['latency'] = time.monotonic() - started
+    if outcome['ok']:
+        metrics['sent'] += 1
+        metrics['latencies'] = (metrics['latencies'] + [outcome['latency']])[-LATENCY_SAMPLES_KEPT:]
+    else:
+        metrics['failed'] += 1
+    return outcome
+
+
+class NotificationDispatcher:
+    """Fan a message out to all channels concurrently; reusable for the life of the process"""
+
+    def __init__(self, channels, deadline_seconds=CHANNEL_DEADLINE_SECONDS):
+        self.channels = list(channels)
+        self.by_name = {channel.name: channel for channel in self.channels}
+        self.deadline_seconds = deadline_seconds
+        self.executor = ThreadPoolExecutor(max_workers=DISPATCH_WORKERS, thread_name_prefix='notify')
+
+    def add_channel(self, channel):
+        """Register an extra channel (e.g. a subscriber's); names are unique"""
+        if channel.name not in self.by_name:
+            self.channels.append(channel)
+            self.by_name[channel.name] = channel
+
+    def dispatch(self, message, priority="normal"):
+        """Send to every channel; returns {channel name: outcome} once all have finished or timed out"""
+        return self.send_each({channel.name: (message, priority) for channel in self.channels})
+
+    def send_each(self, batches, deadline_seconds=None):
+        """Send a different (message, priority) per channel name, concurrently"""
+        deadline_seconds = deadline_seconds or self.deadline_seconds
+        futures = {
+            self.executor.submit(send_with_retries, self.by_name[name], message, priority, deadline_seconds): name
+            for name, (message, priority) in batches.items() if name in self.by_name
+        }
+        # Sends beyond the worker count queue behind earlier ones, so allow for that many rounds
+        rounds = -(-len(futures) // DISPATCH_WORKERS) if futures else 1
+        done, _ = wait(futures, timeout=rounds * (deadline_seconds + ATTEMPT_TIMEOUT_SECONDS))
+        results = {}
+        for future, name in futures.items():
+            if future in done and future.exception() is None:
+                results[name] = future.result()
+                record(name.split('@', 1)[0], results[name]['latency'])  # Per provider, under the caller's span
+            else:
+                error = 'dispatch timeout' if future not in done else type(future.exception()).__name__
+                results[name] = {'ok': False, 'status': None, 'attempts': 0, 'error': error, 'retry_after': None,
+                                 'latency': None}
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        for session in {id(channel.session): channel.session for channel in self.channels}.values():
+            session.close()
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def metrics_summary():
+    """Per-channel success counts and latency percentiles"""
+    summary = {}
+    for name, metrics in CHANNEL_METRICS.items():
+        latencies = metrics['latencies']
+        summary[name] = {
+            'sent': metrics['sent'],
+            'failed': metrics['failed'],
+            'attempts': metrics['attempts'],
+            'retries': metrics['retries'],
+            'success_rate': round(metrics['sent'] / max(1, metrics['sent'] + metrics['failed']), 3),
+            'latency_p50_ms': round(_percentile(latencies, 0.5) * 1000) if latencies else None,
+            'latency_p95_ms': round(_percentile(latencies, 0.95) * 1000) if latencies else None
+        }
+    return summary
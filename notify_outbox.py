@@ -0,0 +1,301 @@
+"""
+📮 NOTIFICATION OUTBOX
+Durable per-channel queue between the alert logic and the notification APIs.
+
+  data/outbox/pending/<enqueue ns>-<channel>.json      one file per message per owner channel
+  data/outbox/state.json                               owner and provider rate-limit buckets, Retry-After
+  private/outbox/pending/<enqueue ns>-<channel>.json   the same for subscriber channels ('<provider>@<id>')
+  private/outbox/state.json                            subscriber channel buckets
+  private/outbox/dead/                                 messages given up on (kept for inspection)
+
+The owner's queue is committed with data/ so it survives between scheduled
+runs. Anything naming a subscriber, and every dead letter (which may quote
+provider errors), stays under the gitignored private/ directory.
+
+Alerts are written to disk before any network call, and a message file is only
+deleted once its channel accepted it. A crash, a 429 or a network blip
+therefore delays an alert but does not lose it: the next drain (this run, the
+next scheduled run or the next daemon cycle) picks it up.
+
+Draining respects a token bucket per channel and one per provider (a bot token
+or app key shared by every subscriber), and any Retry-After it was given.
+Everything due for a channel is coalesced into one message, up to the
+provider's size limit, so a burst (main alert + hourly report + error) is
+sent as one request per channel. A message longer than that limit is split
+into numbered parts when it is queued, so no single send can exceed it.
+"""
+
+import json
+import os
+import time
+
+from atomic_output import write_json
+
+OUTBOX_DIR = 'data/outbox'
+PRIVATE_OUTBOX_DIR = 'private/outbox'  # Gitignored: subscriber queues and dead letters
+DRAIN_DEADLINE_SECONDS = 25.0      # Longest a drain waits on rate limits before leaving the rest queued
+MAX_DELIVERY_ATTEMPTS = 8          # Failed drains before a message moves to dead/
+MAX_MESSAGE_AGE_HOURS = 24         # Stale alerts are not worth sending
+RETRY_BACKOFF_SECONDS = (30, 60, 120, 300, 600, 1800, 3600)
+COALESCE_SEPARATOR = "\n\n━━━━━━━━━━━━━━━━\n\n"
+PRIORITY_ORDER = {"low": 0, "normal": 1, "high": 2}
+SPLIT_MARK_RESERVE = 10            # Characters kept free for the "(i/n) " mark of a split message
+
+# provider -> per channel (messages per second, burst), the same across all of the provider's channels
+# (total_rate, total_burst) and the largest message it accepts
+PROVIDER_LIMITS = {
+    'telegram': {'rate': 1.0, 'burst': 1, 'total_rate': 25.0, 'total_burst': 25, 'max_chars': 4096},
+    'pushover': {'rate': 1.0, 'burst': 5, 'total_rate': 2.0, 'total_burst': 10, 'max_chars': 1024},
+    'ntfy': {'rate': 0.2, 'burst': 10, 'total_rate': 0.2, 'total_burst': 10, 'max_chars': 4096}
+}
+DEFAULT_LIMIT = {'rate': 1.0, 'burst': 1, 'total_rate': 1.0, 'total_burst': 1, 'max_chars': 4096}
+PROVIDER_KEY_PREFIX = 'provider:'  # State key of a provider-wide bucket (never a channel name)
+
+
+def _provider(name):
+    """Subscriber channels are named '<provider>@<subscriber id>'"""
+    return name.split('@', 1)[0]
+
+
+def _limit_for(name):
+    return PROVIDER_LIMITS.get(_provider(name), DEFAULT_LIMIT)
+
+
+def _is_private(name):
+    """Subscriber channels (and their files) belong under private/"""
+    return '@' in name
+
+
+def split_message(message, max_chars):
+    """Parts of at most max_chars, cut at line breaks where possible and numbered "(i/n)" if there are several"""
+    if len(message) <= max_chars:
+        return [message]
+    budget = max_chars - SPLIT_MARK_RESERVE
+    parts, rest = [], message
+    while len(rest) > budget:
+        cut = rest.rfind('\n', 0, budget + 1)
+        if cut <= budget // 2:  # No line break in the second half: cut mid-line
+            cut = budget
+        parts.append(rest[:cut].rstrip('\n'))
+        rest = rest[cut:].lstrip('\n')
+    if rest:
+        parts.append(rest)
+    return [f"({i}/{len(parts)}) {part}" for i, part in enumerate(parts, 1)]
+
+
+class NotificationOutbox:
+    """On-disk queue of messages per channel, drained through a NotificationDispatcher"""
+
+    def __init__(self, root=OUTBOX_DIR, private_root=PRIVATE_OUTBOX_DIR):
+        self.root = root
+        self.pending_dir = os.path.join(root, 'pending')
+        self.private_pending_dir = os.path.join(private_root, 'pending')
+        self.dead_dir = os.path.join(private_root, 'dead')
+        self.state_file = os.path.join(root, 'state.json')
+        self.private_state_file = os.path.join(private_root, 'state.json')
+        os.makedirs(self.pending_dir, exist_ok=True)
+        os.makedirs(self.private_pending_dir, exist_ok=True)
+        self._move_private_files(os.path.join(root, 'dead'))
+        self.state = self._load_state(self.state_file)
+        private_state = self._load_state(self.private_state_file)
+        if any(_is_private(name) for name in self.state):
+            private_state.update({name: bucket for name, bucket in self.state.items() if _is_private(name)})
+            self.state = {name: bucket for name, bucket in self.state.items() if not _is_private(name)}
+        self.state.update(private_state)
+
+    def _move_private_files(self, legacy_dead_dir):
+        """Older versions kept subscriber messages and dead letters in the committed outbox: move them to private/"""
+        moves = [(self.pending_dir, file_name, self.private_pending_dir)
+                 for file_name in os.listdir(self.pending_dir) if _is_private(file_name)]
+        if os.path.isdir(legacy_dead_dir):
+            moves += [(legacy_dead_dir, file_name, self.dead_dir) for file_name in os.listdir(legacy_dead_dir)]
+        for source_dir, file_name, target_dir in moves:
+            os.makedirs(target_dir, exist_ok=True)
+            os.replace(os.path.join(source_dir, file_name), os.path.join(target_dir, file_name))
+        if os.path.isdir(legacy_dead_dir) and not os.listdir(legacy_dead_dir):
+            os.rmdir(legacy_dead_dir)
+
+    def _load_state(self, path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        public = {name: bucket for name, bucket in self.state.items() if not _is_private(name)}
+        write_json(self.state_file, public, compact=True)
+        if len(public) < len(self.state):
+            write_json(self.private_state_file, {name: bucket for name, bucket in self.state.items()
+                                                 if _is_private(name)}, compact=True)
+
+    def _pending_path(self, file_name):
+        directory = self.private_pending_dir if _is_private(file_name) else self.pending_dir
+        return os.path.join(directory, file_name)
+
+    # ------------------------------------------------------------------ queue
+
+    def enqueue(self, message, priority, channel_names):
+        """Persist the message for each channel (split to the provider's size limit); returns the files written"""
+        now = time.time()
+        stamp = time.time_ns()
+        written = 0
+        for name in channel_names:
+            for index, part in enumerate(split_message(message, _limit_for(name)['max_chars'])):
+                record = {'channel': name, 'message': part, 'priority': priority,
+                          'created_at': now, 'attempts': 0, 'next_attempt_at': now}
+                write_json(self._pending_path(f"{stamp + index:020d}-{name}.json"), record, compact=True)
+                written += 1
+        return written
+
+    def pending(self):
+        """{channel: [(file name, record), ...]} oldest first"""
+        queued = {}
+        file_names = os.listdir(self.pending_dir) + os.listdir(self.private_pending_dir)
+        for file_name in sorted(file_names):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(self._pending_path(file_name), 'r') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue  # Half-written by a crash before the atomic rename; never visible in practice
+            queued.setdefault(record['channel'], []).append((file_name, record))
+        return queued
+
+    def pending_count(self):
+        return sum(1 for directory in (self.pending_dir, self.private_pending_dir)
+                   for name in os.listdir(directory) if name.endswith('.json'))
+
+    def _retire(self, file_name, record, reason):
+        os.makedirs(self.dead_dir, exist_ok=True)
+        record['dead_reason'] = reason
+        write_json(os.path.join(self.dead_dir, file_name), record, compact=True)
+        os.remove(self._pending_path(file_name))
+
+    # ------------------------------------------------------------------ rate limits
+
+    def _bucket(self, key, rate, burst, now):
+        bucket = self.state.setdefault(key, {'tokens': burst, 'updated_at': now, 'blocked_until': 0})
+        bucket['tokens'] = min(burst, bucket['tokens'] + (now - bucket['updated_at']) * rate)
+        bucket['updated_at'] = now
+        return bucket
+
+    def _buckets(self, name, now):
+        """[(bucket, rate)] a send to `name` draws from: the channel's own and its provider's"""
+        limit = _limit_for(name)
+        return [(self._bucket(name, limit['rate'], limit['burst'], now), limit['rate']),
+                (self._bucket(PROVIDER_KEY_PREFIX + _provider(name), limit['total_rate'], limit['total_burst'], now),
+                 limit['total_rate'])]
+
+    def _ready_at(self, name, now):
+        """Earliest time the channel may be sent to (both buckets hold a token and no Retry-After is pending)"""
+        ready = now
+        for bucket, rate in self._buckets(name, now):
+            ready = max(ready, bucket.get('blocked_until', 0))
+            if bucket['tokens'] < 1:
+                ready = max(ready, now + (1 - bucket['tokens']) / rate)
+        return ready
+
+    def _take(self, name, now):
+        for bucket, _ in self._buckets(name, now):
+            bucket['tokens'] -= 1
+
+    # ------------------------------------------------------------------ drain
+
+    def _coalesce(self, name, records):
+        """Join due messages up to the provider's size limit; returns (message, priority, files used)"""
+        max_chars = _limit_for(name)['max_chars']
+        parts, files, priority = [], [], "low"
+        for file_name, record in records:
+            header = f"📬 {len(parts) + 1} updates\n\n" if parts else ""
+            candidate = len(header) + len(COALESCE_SEPARATOR.join(parts + [record['message']]))
+            if parts and candidate > max_chars:
+                break
+            parts.append(record['message'][:max_chars])  # Queued before messages were split: never send over the limit
+            files.append(file_name)
+            if PRIORITY_ORDER.get(record['priority'], 1) > PRIORITY_ORDER[priority]:
+                priority = record['priority']
+        if len(parts) > 1:
+            parts[0] = f"📬 {len(parts)} updates\n\n" + parts[0]
+        return COALESCE_SEPARATOR.join(parts), priority, files
+
+    def drain(self, dispatcher, deadline_seconds=DRAIN_DEADLINE_SECONDS):
+        """Send what is due, waiting on rate limits until the deadline; returns per-channel results"""
+        configured = dispatcher.by_name
+        results = {}
+        end = time.monotonic() + deadline_seconds
+
+        while True:
+            now = time.time()
+            queued = self.pending()
+            batches, records_used, wake_at = {}, {}, None
+
+            for name, records in queued.items():
+                live = []
+                for file_name, record in records:
+                    if now - record['created_at'] > MAX_MESSAGE_AGE_HOURS * 3600:
+                        self._retire(file_name, record, 'expired')
+                    elif name in configured and record['next_attempt_at'] <= now:
+                        live.append((file_name, record))
+                    elif name in configured:
+                        wake_at = min(wake_at or record['next_attempt_at'], record['next_attempt_at'])
+                if not live:
+                    continue
+                ready = self._ready_at(name, now)
+                if ready > now:
+                    wake_at = min(wake_at or ready, ready)
+                    continue
+                message, priority, files = self._coalesce(name, live)
+                batches[name] = (message, priority)
+                records_used[name] = [(f, r) for f, r in live if f in set(files)]
+                self._take(name, now)
+
+            if batches:
+                remaining = end - time.monotonic()
+                outcomes = dispatcher.send_each(batches, deadline_seconds=max(1.0, min(dispatcher.deadline_seconds, remaining)))
+                for name, outcome in outcomes.items():
+                    self._settle(name, outcome, records_used[name])
+                    summary = results.setdefault(name, {'sent': 0, 'requests': 0, 'failed': 0, 'error': None})
+                    summary['requests'] += 1
+                    if outcome['ok']:
+                        summary['sent'] += len(records_used[name])
+                    else:
+                        summary['failed'] += 1
+                        summary['error'] = outcome['error']
+                self._save_state()
+                continue
+
+            self._save_state()
+            if wake_at is None:
+                break
+            sleep_for = wake_at - time.time()
+            if time.monotonic() + sleep_for > end:
+                break
+            time.sleep(max(0.0, sleep_for))
+
+        return results
+
+    def _settle(self, name, outcome, records):
+        """Delete delivered files; push failed ones back with backoff (or to dead/)"""
+        if outcome['ok']:
+            for file_name, _ in records:
+                os.remove(self._pending_path(file_name))
+            return
+
+        now = time.time()
+        if outcome.get('retry_after') is not None:
+            self.state[name]['blocked_until'] = now + outcome['retry_after']
+            if outcome['status'] == 429:  # May be the provider-wide limit: hold every channel sharing the token
+                provider = self.state[PROVIDER_KEY_PREFIX + _provider(name)]
+                provider['blocked_until'] = max(provider.get('blocked_until', 0), now + outcome['retry_after'])
+        permanent = outcome['status'] is not None and 400 <= outcome['status'] < 500 and outcome['status'] not in (408, 429)
+        for file_name, record in records:
+            record['attempts'] += 1
+            record['last_error'] = outcome['error']
+            if permanent or record['attempts'] >= MAX_DELIVERY_ATTEMPTS:
+                self._retire(file_name, record, outcome['error'])
+                continue
+            backoff = RETRY_BACKOFF_SECONDS[min(record['attempts'], len(RETRY_BACKOFF_SECONDS)) - 1]
+            record['next_attempt_at'] = max(now + backoff, self.state[name].get('blocked_until', 0))
+            write_json(self._pending_path(file_name), record, compact=True)
@@ -0,0 +1,235 @@
+"""
+🔎 24K RATE EXTRACTOR
+Single-pass, precompiled extraction of the Kerala 24K rate from raw page HTML.
+
+Every "24K" / "24 Karat" label in the page body is visited once, left to right.
+The price is looked for only inside a bounded window after each label, so the
+cost is linear in page size no matter how hostile the markup is.
+
+The same pass finds 22K, 18K and silver rates (METAL_LABELS); extract_rates()
+returns several of them from one page. extract_city_table() reads a page
+that lists many cities (one table row each) in one linear pass over its rows.
+"""
+
+import html
+import re
+
+# How far after a 24K label the price may appear (covers table cells and spans)
+PRICE_WINDOW_CHARS = 400
+# Longest text PRICE_RE can match from its rupee marker: marker, 6 tags/spaces, digits. A price that
+# starts inside the window is read to its end even when its digits run past PRICE_WINDOW_CHARS
+MAX_PRICE_CHARS = 8 + 6 * 82 + 16
+
+# Rupee sign as rendered by a browser or as served in static HTML
+RUPEE_MARKERS = ('₹', '&#8377;', '&#x20b9;', '&#x20B9;')
+
+# "24K Gold /g" summary block (inline tags allowed between the words), else any 24K label.
+# The shared literal "24" prefix lets the regex engine skip ahead with a fast substring search.
+SUMMARY_LABEL = r'K\s+Gold\s*(?:<[^<>]{0,80}>\s*){0,3}/\s*g'
+GENERIC_LABEL = r'K\b|Karat|Carat'
+
+
+def _label_re(prefix, summary, generic):
+    return re.compile(f'{prefix}\\s*(?:(?P<summary>{summary})|(?P<label>{generic}))', re.IGNORECASE)
+
+
+LABEL_RE = _label_re('24', SUMMARY_LABEL, GENERIC_LABEL)
+PRICE_RE = re.compile(
+    r'(?:₹|&#8377;|&#x20b9;)(?:\s|&nbsp;|<[^<>]{0,80}>){0,6}(\d[\d,]{0,12}(?:\.\d{1,2})?)',
+    re.IGNORECASE
+)
+BODY_RE = re.compile(r'<body\b', re.IGNORECASE)
+
+# Pattern names reported alongside each hit, best first
+PATTERN_NAMES = ('summary_24k_gold_per_gram', 'label_24k')
+
+# metal -> (label regex, pattern names); "Silver /g" summary block, else "Silver Rate/Price"
+METAL_LABELS = {
+    '24K': (LABEL_RE, PATTERN_NAMES),
+    '22K': (_label_re('22', SUMMARY_LABEL, GENERIC_LABEL), ('summary_22k_gold_per_gram', 'label_22k')),
+    '18K': (_label_re('18', SUMMARY_LABEL, GENERIC_LABEL), ('summary_18k_gold_per_gram', 'label_18k')),
+    'silver': (_label_re('Silver', r'(?:<[^<>]{0,80}>\s*){0,3}/\s*g\b', r'(?:Rate|Price)\b'),
+               ('summary_silver_per_gram', 'label_silver'))
+}
+GOLD_PURITIES = ('24K', '22K', '18K')
+
+
+def extract_24k_rate(page_source):
+    """Return the 24K rate per gram found in the page, or None"""
+    return extract_24k_rate_detailed(page_source)['rate']
+
+
+def extract_24k_rate_detailed(page_source):
+    """Extract the 24K rate and report how it was found (see extract_rate_detailed)"""
+    return extract_rate_detailed(page_source, '24K')
+
+
+def extract_rates(page_source, metals=GOLD_PURITIES):
+    """{metal: rate or None} for each metal in METAL_LABELS asked for"""
+    return {metal: extract_rate_detailed(page_source, metal)['rate'] for metal in metals}
+
+
+def extract_rate_detailed(page_source, metal='24K'):
+    """
+    Extract one metal's rate per gram and report how it was found.
+
+    Returns a dict with the rate, the pattern name that matched, its offset in
+    the page, and the work done (labels visited, characters handed to the price
+    regex) so callers can log or benchmark extraction cost.
+    """
+    result = {
+        'rate': None,
+        'pattern': None,
+        'offset': None,
+        'labels_checked': 0,
+        'window_chars': 0,
+        'page_chars': len(page_source) if page_source else 0
+    }
+    if not page_source:
+        return result
+
+    # Skip <head>: titles and meta descriptions mention 24K prices out of context
+    body = BODY_RE.search(page_source)
+    start = body.start() if body else 0
+
+    rupees = _RupeeCursor(page_source)
+    next_rupee = rupees.next_at(start)
+    fallback = None
+
+    label_re, pattern_names = METAL_LABELS[metal]
+    for match in label_re.finditer(page_source, start):
+        if next_rupee < 0:
+            break
+        result['labels_checked'] += 1
+        label_end = match.end()
+
+        if next_rupee < label_end:
+            next_rupee = rupees.next_at(label_end)
+            if next_rupee < 0:
+                break
+
+        window_end = label_end + PRICE_WINDOW_CHARS
+        if next_rupee >= window_end:
+            continue
+
+        result['window_chars'] += window_end - next_rupee
+        # window_end only bounds where the rupee marker may start, never where the digits stop
+        price_end = window_end + MAX_PRICE_CHARS
+        price = PRICE_RE.match(page_source, next_rupee, price_end)
+        if not price:
+            price = PRICE_RE.search(page_source, next_rupee + 1, price_end)
+        if not price or price.start() >= window_end:
+            continue
+
+        rate = float(price.group(1).replace(',', ''))
+        if rate <= 0:
+            continue
+
+        if match.lastgroup == 'summary':
+            result.update(rate=rate, pattern=pattern_names[0], offset=price.start(1))
+            return result
+        if fallback is None:
+            fallback = (rate, price.start(1))
+
+    if fallback is not None:
+        result.update(rate=fallback[0], pattern=pattern_names[1], offset=fallback[1])
+    return result
+
+
+class _RupeeCursor:
+    """Forward-only search for the next rupee marker; each marker is scanned at most once"""
+
+    __slots__ = ('page_source', 'positions')
+
+    def __init__(self, page_source):
+        self.page_source = page_source
+        self.positions = {marker: -2 for marker in RUPEE_MARKERS}
+
+    def next_at(self, pos):
+        """Index of the first rupee marker at or after pos, or -1"""
+        best = -1
+        for marker, found in self.positions.items():
+            if found == -1:
+                continue
+            if found < pos:
+                found = self.page_source.find(marker, pos)
+                self.positions[marker] = found
+                if found == -1:
+                    continue
+            if best == -1 or found < best:
+                best = found
+        return best
+
+
+# City tables: rows are the text between consecutive <tr> tags (capped, so a missing </td> cannot go quadratic)
+ROW_START_RE = re.compile(r'<tr\b', re.IGNORECASE)
+CELL_RE = re.compile(r'<t[dh]\b[^>]*>(.*?)(?=</t[dh]\s*>|<t[dh]\b|$)', re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r'<[^>]*>')
+MAX_ROW_CHARS = 4000
+HEADER_METALS = {
+    '24K': re.compile(r'\b24\s*(?:K|Carat|Karat|ct)\b', re.IGNORECASE),
+    '22K': re.compile(r'\b22\s*(?:K|Carat|Karat|ct)\b', re.IGNORECASE),
+    '18K': re.compile(r'\b18\s*(?:K|Carat|Karat|ct)\b', re.IGNORECASE),
+    'silver': re.compile(r'\bsilver\b', re.IGNORECASE)
+}
+# Unit in a header cell -> grams it prices (a column without one is taken as per gram)
+HEADER_UNIT_RE = re.compile(r'\b(\d+)\s*(g|gm|gms|gram|grams|kg)\b', re.IGNORECASE)
+CELL_NUMBER_RE = re.compile(r'\d[\d,]*(?:\.\d{1,2})?')
+
+
+def _cell_texts(row):
+    return [' '.join(html.unescape(TAG_RE.sub(' ', cell)).split()) for cell in CELL_RE.findall(row)]
+
+
+def _header_columns(cells, metals):
+    """{column: (metal, grams)} for a header row (first column per metal); empty if it is not a header"""
+    columns = {}
+    for index, text in enumerate(cells[1:], start=1):
+        metal = next((metal for metal in metals if HEADER_METALS[metal].search(text)), None)
+        unit = HEADER_UNIT_RE.search(text)
+        if metal is None and len(metals) == 1 and unit:
+            metal = metals[0]  # e.g. "10 gram" columns on a silver-only table
+        if metal is None or any(taken == metal for taken, _ in columns.values()):
+            continue
+        grams = int(unit.group(1)) * (1000 if unit.group(2).lower() == 'kg' else 1) if unit else 1
+        columns[index] = (metal, grams or 1)
+    return columns
+
+
+def _slug(text):
+    return re.sub(r'[^a-z]', '', text.lower())
+
+
+def extract_city_table(page_source, cities, metals=GOLD_PURITIES):
+    """
+    {city: {metal: rate per gram or None}} for each city slug in `cities`, read
+    from a table with one row per city and a header row naming the metals (and
+    optionally units such as "10 gram" or "1 Kg"). A city matches a row whose
+    first cell is, or ends with, its name. Cities not in the table are left out.
+    """
+    wanted = {_slug(city): city for city in cities}
+    found = {}
+    columns = {}
+    if not page_source:
+        return found
+    starts = [match.start() for match in ROW_START_RE.finditer(page_source)] + [len(page_source)]
+    for start, end in zip(starts, starts[1:]):
+        cells = _cell_texts(page_source[start:min(end, start + MAX_ROW_CHARS)])
+        if len(cells) < 2:
+            continue
+        header = _header_columns(cells, metals)
+        if header:
+            columns = header
+            continue
+        name = _slug(cells[0])
+        city = wanted.get(name) or next((city for slug, city in wanted.items() if slug and name.endswith(slug)), None)
+        if city is None or city in found or not columns:
+            continue
+        rates = dict.fromkeys(metals)
+        for index, (metal, grams) in columns.items():
+            number = CELL_NUMBER_RE.search(cells[index]) if index < len(cells) else None
+            if number:
+                rate = float(number.group().replace(',', '')) / grams
+                rates[metal] = round(rate, 2) if rate > 0 else None
+        found[city] = rates
+    return found
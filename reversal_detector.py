@@ -0,0 +1,200 @@
+"""
+🔄 TREND REVERSAL DETECTOR
+Streaming reversal detection: one O(1) state update per sample, persisted
+between runs so a scrape never rescans history.
+
+Two rules:
+
+  consecutive   `window` moves in one direction, then a move the other way
+                (window=2 is the original "up, up, down" check)
+  zigzag        a swing reverses once the rate retraces from its high (or low)
+                by at least `min_rupees` or `min_percent` of that extreme
+
+Unchanged rates are not moves: they neither extend nor break a run, and they
+never count as "down".
+
+State lives in data/history/reversal_state.json together with the rule it
+was built for. If the rule or its parameters change, the state is rebuilt
+from whatever samples the caller feeds next. The same class replays archived
+history for backtesting:
+
+Usage: python reversal_detector.py [--rule consecutive|zigzag] [--window 2] [--rupees 10] [--percent 0.1]
+"""
+
+import argparse
+import json
+import math
+import os
+from bisect import bisect_right
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from atomic_output import write_json
+
+IST = ZoneInfo("Asia/Kolkata")
+
+REVERSAL_STATE_FILE = 'data/history/reversal_state.json'
+RULES = ('consecutive', 'zigzag')
+
+
+class ReversalDetector:
+    """Direction state machine fed one sample at a time; update() returns a reversal event or None"""
+
+    def __init__(self, rule='consecutive', window=2, min_rupees=None, min_percent=None, state=None):
+        if rule not in RULES:
+            raise ValueError(f"unknown reversal rule: {rule!r}")
+        if rule == 'zigzag' and min_rupees is None and min_percent is None:
+            raise ValueError("the zigzag rule needs min_rupees and/or min_percent")
+        self.config = {'rule': rule, 'window': max(1, int(window)), 'min_rupees': min_rupees, 'min_percent': min_percent}
+        state = state or {}
+        self.last_epoch = state.get('last_epoch')
+        self.last_rate = state.get('last_rate')
+        self.direction = state.get('direction')          # 'up' / 'down' / None (no trend yet)
+        self.run_length = state.get('run_length', 0)     # consecutive: moves in the current direction
+        self.extreme = state.get('extreme')              # zigzag: swing high (up) or low (down)
+        self.extreme_epoch = state.get('extreme_epoch')
+        self.reversals = state.get('reversals', 0)
+
+    @classmethod
+    def load(cls, path=REVERSAL_STATE_FILE, **config):
+        """Persisted state for this configuration (fresh state if absent, unreadable or built for another rule)"""
+        detector = cls(**config)
+        if not os.path.exists(path):
+            return detector
+        try:
+            with open(path, 'r') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Reversal state unreadable, starting over: {e}")
+            return detector
+        if state.get('config') != detector.config:
+            print("🔄 Reversal rule changed - rebuilding detector state")
+            return detector
+        return cls(**config, state=state)
+
+    def to_dict(self):
+        return {
+            'config': self.config,
+            'last_epoch': self.last_epoch,
+            'last_rate': self.last_rate,
+            'direction': self.direction,
+            'run_length': self.run_length,
+            'extreme': self.extreme,
+            'extreme_epoch': self.extreme_epoch,
+            'reversals': self.reversals
+        }
+
+    def save(self, path=REVERSAL_STATE_FILE):
+        write_json(path, self.to_dict(), compact=True)
+
+    # ------------------------------------------------------------------ streaming
+
+    def _threshold(self, extreme):
+        """Retracement needed to reverse a swing at `extreme` (the smaller of the configured limits)"""
+        limits = []
+        if self.config['min_rupees'] is not None:
+            limits.append(self.config['min_rupees'])
+        if self.config['min_percent'] is not None:
+            limits.append(abs(extreme) * self.config['min_percent'] / 100)
+        return min(limits)
+
+    def _event(self, epoch, rate, previous_direction, pivot, pivot_epoch):
+        self.reversals += 1
+        return {
+            'from': previous_direction,
+            'to': self.direction,
+            'label': f"{previous_direction} → {self.direction}",
+            'epoch': epoch,
+            'rate': rate,
+            'pivot': pivot,
+            'pivot_epoch': pivot_epoch,
+            'retracement': round(abs(rate - pivot), 2) if pivot is not None else None
+        }
+
+    def _update_consecutive(self, epoch, rate, previous_rate):
+        if rate == previous_rate:
+            return None
+        move = 'up' if rate > previous_rate else 'down'
+        if move == self.direction:
+            self.run_length += 1
+            return None
+        previous_direction, run_length = self.direction, self.run_length
+        self.direction, self.run_length = move, 1
+        if previous_direction is not None and run_length >= self.config['window']:
+            return self._event(epoch, rate, previous_direction, previous_rate, self.last_epoch)
+        return None
+
+    def _update_zigzag(self, epoch, rate):
+        if self.extreme is None:
+            self.extreme, self.extreme_epoch = rate, epoch
+            return None
+        if self.direction is None:
+            # No swing yet: the first move of at least one threshold sets the direction
+            if abs(rate - self.extreme) >= self._threshold(self.extreme):
+                self.direction = 'up' if rate > self.extreme else 'down'
+                self.extreme, self.extreme_epoch = rate, epoch
+            return None
+        extends = rate > self.extreme if self.direction == 'up' else rate < self.extreme
+        if extends:
+            self.extreme, self.extreme_epoch = rate, epoch
+            return None
+        if abs(self.extreme - rate) >= self._threshold(self.extreme):
+            previous_direction, pivot, pivot_epoch = self.direction, self.extreme, self.extreme_epoch
+            self.direction = 'down' if previous_direction == 'up' else 'up'
+            self.extreme, self.extreme_epoch = rate, epoch
+            return self._event(epoch, rate, previous_direction, pivot, pivot_epoch)
+        return None
+
+    def update(self, epoch, rate):
+        """Feed one sample (epoch seconds, rate); returns the reversal it confirms, if any"""
+        if not isinstance(rate, (int, float)) or math.isnan(rate):
+            return None
+        if self.last_epoch is not None and epoch <= self.last_epoch:
+            return None  # Already seen (catch-up overlaps with live samples)
+        previous_rate = self.last_rate
+        event = None
+        if self.config['rule'] == 'consecutive':
+            if previous_rate is not None:
+                event = self._update_consecutive(epoch, rate, previous_rate)
+        else:
+            event = self._update_zigzag(epoch, rate)
+        self.last_epoch, self.last_rate = epoch, rate
+        return event
+
+    def ingest(self, epochs, rates):
+        """Feed samples newer than the last one seen (bisect to the start); returns their reversal events"""
+        start = 0 if self.last_epoch is None else bisect_right(epochs, self.last_epoch)
+        events = []
+        for i in range(start, len(epochs)):
+            event = self.update(epochs[i], rates[i])
+            if event:
+                events.append(event)
+        return events
+
+
+def replay(epochs, rates, **config):
+    """Run a fresh detector over archived samples; returns every reversal event"""
+    return ReversalDetector(**config).ingest(epochs, rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the reversal detector over the stored history")
+    parser.add_argument('--rule', choices=RULES, default='consecutive')
+    parser.add_argument('--window', type=int, default=2, help='consecutive: moves that make a trend')
+    parser.add_argument('--rupees', type=float, help='zigzag: retracement in rupees')
+    parser.add_argument('--percent', type=float, help='zigzag: retracement in percent of the swing extreme')
+    args = parser.parse_args()
+
+    from history_store import HistoryStore
+    epochs_us, rates, _ = HistoryStore(retention=None).read_columns()
+    events = replay([value / 1_000_000 for value in epochs_us], rates, rule=args.rule, window=args.window,
+                    min_rupees=args.rupees, min_percent=args.percent)
+    for event in events:
+        moment = datetime.fromtimestamp(event['epoch'], IST).strftime('%d %b %Y %I:%M %p')
+        print(f"🔄 {moment}  {event['label']:<10} ₹{event['rate']:,.0f} (pivot ₹{event['pivot']:,.0f}, "
+              f"retraced ₹{event['retracement']:,.0f})")
+    print(f"📊 {len(events)} reversal(s) in {len(rates)} samples")
+
+
+if __name__ == "__main__":
+    main()
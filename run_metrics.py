@@ -0,0 +1,173 @@
+"""
+⏱️ RUN METRICS
+Nested timing spans for one run of the tracker or the site generator. Each
+finished run becomes one line of data/metrics.ndjson:
+
+  {"kind": "scrape", "started_at": "...", "status": "ok", "total_ms": 812.4,
+   "spans": {"fetch_http": 640.2, "fetch_http/extract": 1.3, "notify/ntfy": 95.0, ...},
+   "fields": {"engine": "http", "rate": 9742.0}}
+
+Span names are slash-joined paths of the spans open around them. A name used
+twice in one run accumulates. health_summary() turns the most recent runs into
+p50/p95 per stage (docs/api/health.json).
+
+Outside a run, span() returns a shared no-op context manager, so instrumented
+code costs one global lookup when metrics are off. Spans are opened from the
+thread that started the run; pre-measured timings from worker threads are
+added with record().
+"""
+
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from atomic_output import append_ndjson, read_ndjson
+
+IST = ZoneInfo("Asia/Kolkata")
+
+METRICS_FILE = 'data/metrics.ndjson'
+HEALTH_RUNS = 200                  # Recent runs summarized per stage
+METRICS_MAX_BYTES = 2_000_000      # Past this size the file is cut back to the newest METRICS_KEEP_RUNS lines
+METRICS_KEEP_RUNS = 2000
+
+_current = None  # RunMetrics being recorded, if any
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('run', 'name', 'started')
+
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        self.run.stack.append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        path = '/'.join(self.run.stack)
+        self.run.stack.pop()
+        self.run.add(path, elapsed)
+        return False
+
+
+class RunMetrics:
+    """Spans and fields of the run in progress"""
+
+    def __init__(self, kind, path=METRICS_FILE):
+        self.kind = kind
+        self.path = path
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(IST).isoformat()
+        self.stack = []
+        self.spans = {}
+        self.fields = {}
+
+    def add(self, path, seconds):
+        self.spans[path] = self.spans.get(path, 0.0) + seconds * 1000
+
+    def to_dict(self, status):
+        return {
+            'kind': self.kind,
+            'started_at': self.started_at,
+            'status': status,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'spans': {path: round(ms, 1) for path, ms in self.spans.items()},
+            'fields': self.fields
+        }
+
+
+def start_run(kind, path=METRICS_FILE):
+    """Begin recording a run; returns None (and records nothing new) when one is already in progress"""
+    global _current
+    if _current is not None:
+        return None
+    _current = RunMetrics(kind, path)
+    return _current
+
+
+def span(name):
+    """Context manager timing `name` inside the current run (a no-op when no run is recording)"""
+    run = _current
+    if run is None:
+        return _NULL_SPAN
+    return _Span(run, name)
+
+
+def record(name, seconds):
+    """Add a timing measured elsewhere (e.g. a notification sent on a worker thread) under the open spans"""
+    run = _current
+    if run is not None and seconds is not None:
+        run.add('/'.join(run.stack + [name]), seconds)
+
+
+def annotate(**fields):
+    """Attach values (engine used, rate, counts) to the current run"""
+    if _current is not None:
+        _current.fields.update(fields)
+
+
+def finish_run(run, status='ok'):
+    """Append `run` as one NDJSON line (trimming old lines once the file is large); returns the line's dict"""
+    global _current
+    if run is None or run is not _current:
+        return None
+    _current = None
+    line = run.to_dict(status)
+    try:
+        append_ndjson(run.path, [line], METRICS_MAX_BYTES, METRICS_KEEP_RUNS)
+    except OSError as e:
+        print(f"⚠️ Could not write run metrics: {e}")
+    return line
+
+
+def load_runs(path=METRICS_FILE, last=HEALTH_RUNS):
+    """The newest `last` runs (unreadable lines skipped)"""
+    return read_ndjson(path, last)
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def health_summary(path=METRICS_FILE, last=HEALTH_RUNS):
+    """p50/p95/max per run kind and per stage over the newest runs"""
+    runs = load_runs(path, last)
+    kinds = {}
+    for run in runs:
+        summary = kinds.setdefault(run['kind'], {'runs': 0, 'failed': 0, 'totals': [], 'stages': {}, 'last': None})
+        summary['runs'] += 1
+        summary['failed'] += run['status'] != 'ok'
+        summary['totals'].append(run['total_ms'])
+        summary['last'] = {key: run[key] for key in ('started_at', 'status', 'total_ms')}
+        for stage, ms in run['spans'].items():
+            summary['stages'].setdefault(stage, []).append(ms)
+
+    report = {}
+    for kind, summary in kinds.items():
+        report[kind] = {
+            'runs': summary['runs'],
+            'failed': summary['failed'],
+            'last_run': summary['last'],
+            'total_ms': {'p50': _percentile(summary['totals'], 0.5), 'p95': _percentile(summary['totals'], 0.95)},
+            'stages': {stage: {'runs': len(values), 'p50_ms': _percentile(values, 0.5),
+                               'p95_ms': _percentile(values, 0.95), 'max_ms': max(values)}
+                       for stage, values in sorted(summary['stages'].items())}
+        }
+    return {'runs_considered': len(runs), 'kinds': report}
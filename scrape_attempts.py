@@ -0,0 +1,213 @@
+"""
+🩺 SCRAPE ATTEMPTS
+Every page fetch the tracker makes, successful or not, as one line of
+data/scrape_attempts.ndjson:
+
+  {"ts": 1760771700, "job": "kerala", "source": "www.goodreturns.in", "engine": "http",
+   "period": "ACTIVE_TRADING", "ok": true, "status": 200, "ms": 412.5, "bytes": 183204,
+   "pattern": "summary_24k_gold_per_gram", "rate": 10118.0}
+
+`job` is "kerala" for the tracker's own page and "city" for city_pipeline.py
+pages (which also carry "kind" and the number of "cities" the page covers).
+`engine` is http, http-304 or selenium; `ms` is the fetch (or page load)
+time, not the whole run. Keys without a value are left out.
+
+scraper_health() turns the last ATTEMPTS_WINDOW_DAYS into success rates,
+latency percentiles per source and per period, the extraction pattern hit
+distribution, HTTP status counts and gaps in Kerala coverage
+(docs/api/scraper_health.json).
+"""
+
+import json
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+from atomic_output import append_ndjson, read_ndjson, write_text
+
+IST = ZoneInfo("Asia/Kolkata")
+
+ATTEMPTS_FILE = 'data/scrape_attempts.ndjson'
+ATTEMPTS_WINDOW_DAYS = 7          # Attempts summarized by scraper_health()
+ATTEMPTS_TRIM_SLACK_DAYS = 1      # Lines are cut back to the window once the oldest is this far past it (about one rewrite a day)
+
+# Expected gap between Kerala scrapes per market period (the scheduled workflow's cadence)
+EXPECTED_INTERVAL_MINUTES = {
+    "AKGSMA_MORNING_RUSH": 15,
+    "EVENING_UPDATE": 15,
+    "ACTIVE_TRADING": 30,
+    "OFF_HOURS": 180
+}
+GAP_TOLERANCE = 2.0               # A gap is reported once no rate arrived for this many expected intervals
+MAX_GAPS_REPORTED = 20
+
+
+def attempt(url, engine, ok, period, seconds=None, status=None, size=None, pattern=None, rate=None, error=None,
+            job='kerala', **extra):
+    """One attempt record (keys without a value dropped)"""
+    record = {
+        'ts': int(time.time()),
+        'job': job,
+        'source': urlsplit(url).netloc,
+        'engine': engine,
+        'period': period,
+        'ok': bool(ok),
+        'status': status,
+        'ms': round(seconds * 1000, 1) if seconds is not None else None,
+        'bytes': size,
+        'pattern': pattern,
+        'rate': rate,
+        'error': error[:200] if error else None,
+        **extra
+    }
+    return {key: value for key, value in record.items() if value is not None}
+
+
+def describe_attempt(record):
+    """Short human summary, e.g. "http 403 in 0.41s, 12,345 bytes: no 24K pattern matched" """
+    text = record['engine']
+    if 'status' in record:
+        text += f" {record['status']}"
+    if 'ms' in record:
+        text += f" in {record['ms'] / 1000:.2f}s"
+    if 'bytes' in record:
+        text += f", {record['bytes']:,} bytes"
+    if not record['ok']:
+        text += f": {record.get('error', 'failed')}"
+    return text
+
+
+def _record_ts(line):
+    try:
+        return json.loads(line).get('ts', 0)
+    except (ValueError, AttributeError):
+        return 0
+
+
+def log_attempts(records, path=ATTEMPTS_FILE, now=None):
+    """Append this run's attempts, dropping lines older than the window (however many attempts a day brings)"""
+    if not records:
+        return
+    try:
+        append_ndjson(path, records)
+        since = (now or time.time()) - ATTEMPTS_WINDOW_DAYS * 86400
+        with open(path, 'r') as f:
+            if _record_ts(f.readline()) >= since - ATTEMPTS_TRIM_SLACK_DAYS * 86400:
+                return
+            f.seek(0)
+            kept = [line for line in f if _record_ts(line) >= since]
+        write_text(path, ''.join(kept))
+    except OSError as e:
+        print(f"⚠️ Could not write scrape attempts: {e}")
+
+
+def load_attempts(path=ATTEMPTS_FILE, window_days=ATTEMPTS_WINDOW_DAYS, now=None):
+    """Attempts from the last `window_days`, oldest first"""
+    since = (now or time.time()) - window_days * 86400
+    return [record for record in read_ndjson(path) if record.get('ts', 0) >= since]
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, IST).isoformat()
+
+
+def _group_summary(records):
+    latencies = [record['ms'] for record in records if 'ms' in record]
+    ok = sum(record['ok'] for record in records)
+    summary = {
+        'attempts': len(records),
+        'succeeded': ok,
+        'success_rate': round(ok / len(records), 4),
+        'latency_p50_ms': _percentile(latencies, 0.5) if latencies else None,
+        'latency_p95_ms': _percentile(latencies, 0.95) if latencies else None,
+        'latency_max_ms': max(latencies) if latencies else None
+    }
+    engines, statuses = {}, {}
+    for record in records:
+        engines[record['engine']] = engines.get(record['engine'], 0) + 1
+        status = str(record.get('status', 'none'))
+        statuses[status] = statuses.get(status, 0) + 1
+    summary['engines'] = engines
+    summary['status_codes'] = statuses
+    return summary
+
+
+def coverage_gaps(records, now=None, intervals=None):
+    """Stretches with no Kerala rate longer than GAP_TOLERANCE expected intervals, newest first (one pass)"""
+    intervals = intervals or EXPECTED_INTERVAL_MINUTES
+    gaps = []
+    previous, failed = None, 0
+
+    def close(end):
+        expected = intervals.get(previous.get('period'), max(intervals.values())) * 60
+        if end - previous['ts'] > expected * GAP_TOLERANCE:
+            gaps.append({'from': _iso(previous['ts']), 'to': _iso(end), 'minutes': round((end - previous['ts']) / 60),
+                         'period': previous.get('period'), 'expected_minutes': expected // 60,
+                         'failed_attempts': failed})
+
+    for record in records:
+        if record['job'] != 'kerala':
+            continue
+        if not record['ok']:
+            failed += 1
+            continue
+        if previous is not None:
+            close(record['ts'])
+        previous, failed = record, 0
+    if previous is not None:
+        close(int(now or time.time()))
+    return gaps[::-1]
+
+
+def scraper_health(path=ATTEMPTS_FILE, window_days=ATTEMPTS_WINDOW_DAYS, now=None):
+    """Success rate, latency per source / period, pattern hits and coverage gaps over recent attempts"""
+    now = now or time.time()
+    records = load_attempts(path, window_days, now)
+    report = {'window_days': window_days, 'attempts': len(records)}
+    if not records:
+        return report
+
+    groups = {'by_job': {}, 'by_source': {}, 'by_period': {}}
+    patterns = {}
+    for record in records:
+        groups['by_job'].setdefault(record['job'], []).append(record)
+        groups['by_source'].setdefault(record['source'], []).append(record)
+        if record['job'] == 'kerala':
+            groups['by_period'].setdefault(record.get('period', 'UNKNOWN'), []).append(record)
+            if record['engine'] != 'http-304' and 'bytes' in record:  # Only pages actually received are extracted
+                pattern = record.get('pattern', 'no_match')
+                patterns[pattern] = patterns.get(pattern, 0) + 1
+
+    kerala = groups['by_job'].get('kerala', [])
+    failures = 0
+    for record in reversed(kerala):
+        if record['ok']:
+            break
+        failures += 1
+    last_success = next((record for record in reversed(kerala) if record['ok']), None)
+    gaps = coverage_gaps(records, now)
+
+    report.update({
+        'success_rate': round(sum(record['ok'] for record in records) / len(records), 4),
+        'first_attempt': _iso(records[0]['ts']),
+        'last_attempt': _iso(records[-1]['ts']),
+        'last_success': _iso(last_success['ts']) if last_success else None,
+        'consecutive_failures': failures,
+        **{name: {key: _group_summary(members) for key, members in sorted(group.items())}
+           for name, group in groups.items()},
+        'patterns': dict(sorted(patterns.items(), key=lambda item: -item[1])),
+        'page_bytes_p50': _percentile([record['bytes'] for record in kerala if 'bytes' in record], 0.5)
+        if any('bytes' in record for record in kerala) else None,
+        'coverage_gaps': {
+            'count': len(gaps),
+            'missing_minutes': sum(gap['minutes'] for gap in gaps),
+            'recent': gaps[:MAX_GAPS_REPORTED]
+        }
+    })
+    return report
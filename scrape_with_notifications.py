@@ -32,6 +32,9 @@ ENABLE_RAPID_ALERTS = True       # Set False to disable rapid movement alerts
 # 📈 TREND REVERSAL DETECTION
 TREND_REVERSAL_THRESHOLD = 5     # ₹5 minimum for trend reversal alerts
 ENABLE_TREND_ALERTS = True       # Set False to disable trend reversal alerts
+TREND_REVERSAL_RULE = "consecutive"  # "consecutive" (a run of moves, then one back) or "zigzag" (retracement)
+TREND_ZIGZAG_RUPEES = 10         # zigzag: reversal once the rate retraces ₹10 from its swing high/low
+TREND_ZIGZAG_PERCENT = None      # zigzag: ...or this % of the swing high/low (None = rupees only)
 
 # ⏸️ STABILITY ALERTS (No change notifications)
 STABILITY_ALERT_MINUTES = 45     # Alert if no change for 45+ minutes during active periods
@@ -40,6 +43,8 @@ ENABLE_STABILITY_ALERTS = True   # Set False to disable stability alerts
 # 📊 HOURLY REPORTS
 ENABLE_HOURLY_REPORTS = True     # Set False to disable hourly trend reports
 HOURLY_REPORT_PERIODS = ["AKGSMA_MORNING_RUSH", "ACTIVE_TRADING", "EVENING_UPDATE"]
+HOURLY_REPORT_INTERVAL_MINUTES = 60  # Minimum gap between reports (runs land at adaptive times, not on the hour)
+HOURLY_REPORT_FILE = 'data/last_hourly.txt'
 
 # 🚨 PRIORITY LEVELS (when to send high priority vs normal)
 HIGH_PRIORITY_RUPEES = 25        # ₹25+ = High priority notification
@@ -59,19 +64,36 @@ EVENING_START_HOUR = 18          # Evening updates start at 6 PM IST
 EVENING_END_HOUR = 19            # Evening updates end at 7 PM IST
 
 # 📊 DATA RETENTION
-HISTORY_ENTRIES_TO_KEEP = 500    # Number of historical entries to keep
-ANALYSIS_ENTRIES_FOR_TREND = 3   # Number of entries to check for trend reversal
+HISTORY_ENTRIES_TO_KEEP = 500    # Recent entries loaded for analysis
+HISTORY_STORE_RETENTION = 100000 # Entries kept in the append-only store (years of scrapes)
+ANALYSIS_ENTRIES_FOR_TREND = 3   # Entries before the current rate in a consecutive check (3 = two moves, then one back)
 
 # 🌐 SCRAPING SETTINGS
 SCRAPING_DELAY_MIN = 1.5         # Minimum delay between requests (seconds)
 SCRAPING_DELAY_MAX = 3.0         # Maximum delay between requests (seconds)
 PAGE_LOAD_DELAY_MIN = 2.0        # Minimum page load wait time
 PAGE_LOAD_DELAY_MAX = 3.0        # Maximum page load wait time
+FETCH_ENGINE = "http"            # "http" (plain requests, no browser) or "selenium"
+ENABLE_SELENIUM_FALLBACK = True  # Use Chrome when the static HTML has no 24K rate
+ENABLE_RUN_METRICS = True        # Time each stage into data/metrics.ndjson (p50/p95 in docs/api/health.json)
+ENABLE_ATTEMPTS_LOG = True       # Log every page fetch into data/scrape_attempts.ndjson (docs/api/scraper_health.json)
+ENABLE_CITY_RATES = False        # Also fetch 24K/22K/18K + silver for every city from each source's rate table (city_pipeline.py)
+
+# 🔁 DAEMON MODE (python scrape_with_notifications.py --daemon)
+DAEMON_INTERVAL_MINUTES = {      # Scrape interval per market period (same cadence as the scheduled workflow)
+    "AKGSMA_MORNING_RUSH": 15,
+    "EVENING_UPDATE": 15,
+    "ACTIVE_TRADING": 30,
+    "OFF_HOURS": 180
+}
+DAEMON_PUBLISH_SITE = True       # Regenerate docs/ (API + website) after every successful scrape
+DAEMON_ADAPTIVE_SCHEDULE = True  # Poll by learned change frequency per weekday/hour once enough history exists
 
 # 🏷️ NOTIFICATION CUSTOMIZATION
 NOTIFICATION_TITLE = "Kerala 24K Gold Tracker"
 ENABLE_EMOJI_IN_MESSAGES = True
 INCLUDE_PERIOD_CONTEXT = True
+DEBUG_MESSAGE_PREVIEW = False  # Print every outgoing message in full before it is queued
 
 # 📅 DAILY COMPARISON FEATURE
 ENABLE_YESTERDAY_COMPARISON = True  # Show change from yesterday's rate in notifications
@@ -91,28 +113,107 @@ WEEKEND_THRESHOLD_RUPEES = 30
 WEEKEND_THRESHOLD_PERCENT = 0.3
 ENABLE_WEEKEND_REDUCED_SENSITIVITY = True
 
+# 👥 SUBSCRIBERS
+ENABLE_SUBSCRIBER_ALERTS = True  # Per-user thresholds and channels from $SUBSCRIPTIONS_JSON or private/subscriptions.json (see subscriptions.py)
+
 # ================================================================================================
 # 🚀 TRACKER CODE STARTS HERE
 # ================================================================================================
 
 import json
 import os
-import requests
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 import time
-import re
+
+# Only light, always-needed modules load here. Selenium, requests (fetch_engine,
+# notify_dispatch, city_pipeline) and NumPy (analytics) are imported by the
+# methods that use them, so a run that never opens Chrome, sends nothing or
+# skips analytics never pays for them (python -X importtime scrape_with_notifications.py).
+from rate_extractor import extract_24k_rate_detailed
+from history_store import HistoryStore, HistorySnapshot, io_stats_summary
+from atomic_output import write_json, write_text
+from notify_outbox import NotificationOutbox
+from subscriptions import AlertEngine, SubscriptionStore, file_stamp
+from reversal_detector import ReversalDetector
+from run_metrics import annotate, finish_run, span, start_run
+from scrape_attempts import attempt, describe_attempt, log_attempts
+from message_render import (MessageConfig, gram_changes, gram_prices, render_alert, render_initial,
+                            render_subscriber_alert, selling_rates)
+from alert_rules import RuleConfig, RuleState, Sample, detector_settings, evaluate, market_period, thresholds_for
 
 # Define IST timezone after imports
 IST = ZoneInfo("Asia/Kolkata")
 
+def alert_config():
+    """The alert settings above as one dict (compiled into alert_rules.RuleConfig; backtest.py sweeps it)"""
+    return {
+        'thresholds': {
+            'AKGSMA_MORNING_RUSH': {'rupees': AKGSMA_THRESHOLD_RUPEES, 'percent': AKGSMA_THRESHOLD_PERCENT},
+            'ACTIVE_TRADING': {'rupees': TRADING_THRESHOLD_RUPEES, 'percent': TRADING_THRESHOLD_PERCENT},
+            'EVENING_UPDATE': {'rupees': EVENING_THRESHOLD_RUPEES, 'percent': EVENING_THRESHOLD_PERCENT},
+            'OFF_HOURS': {'rupees': OFFHOURS_THRESHOLD_RUPEES, 'percent': OFFHOURS_THRESHOLD_PERCENT}
+        },
+        'micro_rupees': MICRO_ALERT_RUPEES,
+        'enable_micro': ENABLE_MICRO_ALERTS,
+        'rapid_rupees': RAPID_MOVEMENT_THRESHOLD,
+        'rapid_window_minutes': RAPID_MOVEMENT_WINDOW_MINUTES,
+        'enable_rapid': ENABLE_RAPID_ALERTS,
+        'trend_rupees': TREND_REVERSAL_THRESHOLD,
+        'enable_trend': ENABLE_TREND_ALERTS,
+        'trend_rule': TREND_REVERSAL_RULE,
+        'trend_window': ANALYSIS_ENTRIES_FOR_TREND - 1,
+        'trend_zigzag_rupees': TREND_ZIGZAG_RUPEES if TREND_REVERSAL_RULE == "zigzag" else None,
+        'trend_zigzag_percent': TREND_ZIGZAG_PERCENT if TREND_REVERSAL_RULE == "zigzag" else None,
+        'stability_minutes': STABILITY_ALERT_MINUTES,
+        'enable_stability': ENABLE_STABILITY_ALERTS,
+        'high_priority_rupees': HIGH_PRIORITY_RUPEES,
+        'high_priority_percent': HIGH_PRIORITY_PERCENT,
+        'weekend_reduced_sensitivity': ENABLE_WEEKEND_REDUCED_SENSITIVITY,
+        'weekend_multiplier': WEEKEND_THRESHOLD_RUPEES / TRADING_THRESHOLD_RUPEES,
+        'period_hours': {
+            'AKGSMA_MORNING_RUSH': (AKGSMA_START_HOUR, AKGSMA_END_HOUR),
+            'ACTIVE_TRADING': (TRADING_START_HOUR, TRADING_END_HOUR),
+            'EVENING_UPDATE': (EVENING_START_HOUR, EVENING_END_HOUR)
+        }
+    }
+
+def message_config():
+    """The message settings above as one dict (compiled into message_render.MessageConfig)"""
+    return {
+        'title': NOTIFICATION_TITLE,
+        'emoji': ENABLE_EMOJI_IN_MESSAGES,
+        'period_context': INCLUDE_PERIOD_CONTEXT,
+        'yesterday': ENABLE_YESTERDAY_COMPARISON,
+        'multi_gram': ENABLE_MULTI_GRAM_DISPLAY,
+        'gram_quantities': GRAM_QUANTITIES,
+        'selling': ENABLE_SELLING_RATE_DISPLAY,
+        'selling_gram_quantities': SELLING_GRAM_QUANTITIES,
+        'fee_percentages': SELLING_FEE_PERCENTAGES
+    }
+
 class ConfigurableKeralaGoldTracker:
-    def __init__(self):
+    def __init__(self, dry_run=False):
         self.url = "https://www.goodreturns.in/gold-rates/kerala.html"
-        self.setup_driver()
+        self.dry_run = dry_run  # Fetch over HTTP and evaluate alerts, but no browser, no writes and no sending
+        self.driver = None  # Chrome is only started if the HTTP path needs a fallback
+        self.fetch_engine_used = None
+        self.last_extraction = None
+        self.attempts = []  # scrape_attempts records of the current scrape
+        self.history_store = HistoryStore(retention=HISTORY_STORE_RETENTION, read_only=dry_run)
+        self.history = None  # HistorySnapshot, loaded once on first use
+        self.http_engine = None  # HttpFetchEngine, created on first use and kept warm
+        self.dispatcher = None  # NotificationDispatcher, created on first alert and kept warm
+        # Durable queue in data/outbox (subscribers: private/outbox), drained at the end of each scrape; none in dry runs
+        self.outbox = NotificationOutbox() if not dry_run else None
+        self.alert_engine = None  # AlertEngine over the subscriber source, rebuilt when it changes
+        self.alert_engine_stamp = None
+        self.subscriber_sessions = {}  # One pooled session per provider, shared by all subscriber channels
+        self.reversal_detector = None  # Streaming trend state, persisted in data/history/reversal_state.json
+        self.keep_driver = False  # Daemon mode keeps Chrome open between scrapes
+        self.alert_config = alert_config()  # Thresholds and rule switches as one dict (see alert_rules.py)
+        self.rule_config = RuleConfig.from_dict(self.alert_config)
+        self.message_config = MessageConfig.from_dict(message_config())  # Cache key of every rendered fragment
         
         # Notification settings from environment
         self.telegram_token = os.environ.get('TELEGRAM_BOT_TOKEN')
@@ -120,11 +221,14 @@ class ConfigurableKeralaGoldTracker:
         self.pushover_token = os.environ.get('PUSHOVER_TOKEN')
         self.pushover_user = os.environ.get('PUSHOVER_USER')
         self.ntfy_topic = os.environ.get('NTFY_TOPIC')
+        # Outbox names of the env-configured channels, known without building the dispatcher
+        self.owner_channels = [name for name, configured in (
+            ('telegram', self.telegram_token and self.telegram_chat_id),
+            ('pushover', self.pushover_token and self.pushover_user),
+            ('ntfy', self.ntfy_topic)) if configured]
         
         # Calculate current time and period
-        self.ist_time = datetime.now(IST)
-        self.current_period = self.get_current_period()
-        self.is_weekend = self.ist_time.weekday() >= 5
+        self.refresh_clock()
         
         print(f"🔧 Configured Tracker Initialized")
         print(f"⏰ IST Time: {self.ist_time.strftime('%d %b %Y, %I:%M %p')}")
@@ -133,6 +237,10 @@ class ConfigurableKeralaGoldTracker:
     
     def setup_driver(self):
         """Setup Chrome driver with configured delays"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from fetch_engine import USER_AGENTS
+        
         chrome_options = Options()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("--no-sandbox")
@@ -145,76 +253,77 @@ class ConfigurableKeralaGoldTracker:
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
         import random
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        ]
-        chrome_options.add_argument(f"--user-agent={random.choice(user_agents)}")
+        chrome_options.add_argument(f"--user-agent={random.choice(USER_AGENTS)}")
         
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        with span('driver_setup'):
+            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    
+    def refresh_clock(self):
+        """Set the run's IST time, market period and weekend flag (each daemon cycle calls this)"""
+        self.ist_time = datetime.now(IST)
+        self.current_period = self.get_current_period()
+        self.is_weekend = self.ist_time.weekday() >= 5
+    
+    def close(self):
+        """Release the browser and persist HTTP validators (end of a run or daemon shutdown)"""
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+        if self.http_engine is not None and not self.dry_run:
+            self.http_engine.save_cache()
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+            self.dispatcher = None
+            self.subscriber_sessions = {}
     
     def get_current_period(self):
         """Determine current market period using configured hours"""
-        hour = self.ist_time.hour
-        
-        if AKGSMA_START_HOUR <= hour < AKGSMA_END_HOUR:
-            return "AKGSMA_MORNING_RUSH"
-        elif TRADING_START_HOUR <= hour < TRADING_END_HOUR:
-            return "ACTIVE_TRADING"
-        elif EVENING_START_HOUR <= hour < EVENING_END_HOUR:
-            return "EVENING_UPDATE"
-        else:
-            return "OFF_HOURS"
+        return self.period_for(self.ist_time)
+    
+    def period_for(self, moment):
+        """Market period of any IST datetime"""
+        return market_period(moment.hour, self.alert_config)
     
     def get_thresholds_for_period(self, period):
         """Get notification thresholds based on current period and configuration"""
-        
-        # Apply weekend adjustments if enabled
-        weekend_multiplier = 1.0
-        if self.is_weekend and ENABLE_WEEKEND_REDUCED_SENSITIVITY:
-            weekend_multiplier = WEEKEND_THRESHOLD_RUPEES / TRADING_THRESHOLD_RUPEES
-        
-        if period == "AKGSMA_MORNING_RUSH":
-            return {
-                'rupees': AKGSMA_THRESHOLD_RUPEES * weekend_multiplier,
-                'percent': AKGSMA_THRESHOLD_PERCENT * weekend_multiplier,
-                'micro_rupees': MICRO_ALERT_RUPEES if ENABLE_MICRO_ALERTS else 999
-            }
-        elif period == "EVENING_UPDATE":
-            return {
-                'rupees': EVENING_THRESHOLD_RUPEES * weekend_multiplier,
-                'percent': EVENING_THRESHOLD_PERCENT * weekend_multiplier,
-                'micro_rupees': MICRO_ALERT_RUPEES if ENABLE_MICRO_ALERTS else 999
-            }
-        elif period == "ACTIVE_TRADING":
-            return {
-                'rupees': TRADING_THRESHOLD_RUPEES * weekend_multiplier,
-                'percent': TRADING_THRESHOLD_PERCENT * weekend_multiplier,
-                'micro_rupees': 999
-            }
-        else:  # OFF_HOURS
-            return {
-                'rupees': OFFHOURS_THRESHOLD_RUPEES * weekend_multiplier,
-                'percent': OFFHOURS_THRESHOLD_PERCENT * weekend_multiplier,
-                'micro_rupees': 999
-            }
+        return thresholds_for(period, self.is_weekend, self.alert_config)
+    
+    def subscriber_defaults(self):
+        """The configured thresholds, as the defaults every subscriber starts from"""
+        return {
+            'thresholds': {
+                'AKGSMA_MORNING_RUSH': {'rupees': AKGSMA_THRESHOLD_RUPEES, 'percent': AKGSMA_THRESHOLD_PERCENT},
+                'ACTIVE_TRADING': {'rupees': TRADING_THRESHOLD_RUPEES, 'percent': TRADING_THRESHOLD_PERCENT},
+                'EVENING_UPDATE': {'rupees': EVENING_THRESHOLD_RUPEES, 'percent': EVENING_THRESHOLD_PERCENT},
+                'OFF_HOURS': {'rupees': OFFHOURS_THRESHOLD_RUPEES, 'percent': OFFHOURS_THRESHOLD_PERCENT}
+            },
+            'micro_rupees': MICRO_ALERT_RUPEES if ENABLE_MICRO_ALERTS else None,
+            'high_priority': {'rupees': HIGH_PRIORITY_RUPEES, 'percent': HIGH_PRIORITY_PERCENT},
+            'gram_quantities': GRAM_QUANTITIES,
+            'weekend_reduced_sensitivity': ENABLE_WEEKEND_REDUCED_SENSITIVITY,
+            'weekend_multiplier': WEEKEND_THRESHOLD_RUPEES / TRADING_THRESHOLD_RUPEES
+        }
     
     def scrape_rate(self):
         """Main scraping function with configured delays"""
+        run = start_run('scrape') if ENABLE_RUN_METRICS and not self.dry_run else None
+        status = 'failed'
+        self.attempts = []
         try:
             print(f"🔍 Kerala Gold Tracker - Period: {self.current_period}")
             print(f"⚙️ Using thresholds: {self.get_thresholds_for_period(self.current_period)}")
             
-            # Use configured delays
-            import random
-            time.sleep(random.uniform(SCRAPING_DELAY_MIN, SCRAPING_DELAY_MAX))
+            rate = None
+            if FETCH_ENGINE == "http":
+                rate = self.fetch_rate_http()
             
-            self.driver.get(self.url)
-            time.sleep(random.uniform(PAGE_LOAD_DELAY_MIN, PAGE_LOAD_DELAY_MAX))
-            
-            rate = self.extract_24k_rate()
+            if rate is None and self.dry_run:
+                print("🧪 Dry run: no Selenium fallback")
+            elif rate is None and (FETCH_ENGINE == "selenium" or ENABLE_SELENIUM_FALLBACK):
+                if FETCH_ENGINE == "http":
+                    print("🔁 No 24K rate in static HTML - falling back to Selenium")
+                rate = self.fetch_rate_selenium()
             
             if rate:
                 current_data = {
@@ -232,66 +341,139 @@ class ConfigurableKeralaGoldTracker:
                 }
                 
                 # Apply configured notification logic
-                self.check_and_notify_configured(current_data)
+                with span('alerts'):
+                    self.check_and_notify_configured(current_data)
+                
+                if self.dry_run:
+                    print("🧪 Dry run: history not saved")
+                else:
+                    with span('history_save'):
+                        self.save_data(current_data)
                 
-                self.save_data(current_data)
+                if ENABLE_CITY_RATES and not self.dry_run:
+                    self.scrape_city_rates()
                 
                 print(f"✅ Rate: ₹{rate} - {self.current_period}")
+                status = 'ok'
                 return current_data
             else:
-                self.send_error_notification(f"Failed during {self.current_period}")
+                tried = '; '.join(describe_attempt(record) for record in self.attempts)
+                self.send_error_notification(f"Failed during {self.current_period}" + (f" ({tried})" if tried else ""))
                 return None
                 
         except Exception as e:
             self.send_error_notification(f"Error ({self.current_period}): {str(e)}")
             return None
         finally:
-            self.driver.quit()
+            with span('notify'):
+                self.flush_notifications()
+            if self.driver is not None and not self.keep_driver:
+                self.driver.quit()
+                self.driver = None
+            print(f"🗄️ History I/O this run: {io_stats_summary()}")
+            if ENABLE_ATTEMPTS_LOG and not self.dry_run:
+                log_attempts(self.attempts)
+            annotate(engine=self.fetch_engine_used, period=self.current_period)
+            finish_run(run, status)
+    
+    def note_attempt(self, engine, rate, seconds=None, status=None, size=None, error=None):
+        """Record one fetch of self.url for data/scrape_attempts.ndjson"""
+        extraction = self.last_extraction if engine != "http-304" else None
+        if rate is None and error is None:
+            error = "no 24K pattern matched"
+        self.attempts.append(attempt(self.url, engine, rate is not None, self.current_period, seconds=seconds,
+                                     status=status, size=size, rate=rate,
+                                     pattern=extraction['pattern'] if extraction else None, error=error))
     
-    def extract_24k_rate(self):
-        """Extract 24K rate from page"""
+    def fetch_rate_http(self):
+        """Fetch the page without a browser, reusing the cached rate on a 304"""
+        started = time.perf_counter()
         try:
+            if self.http_engine is None:
+                from fetch_engine import HttpFetchEngine
+                self.http_engine = HttpFetchEngine()
+            engine = self.http_engine
+            with span('fetch_http'):
+                result = engine.fetch(self.url)
+            
+            if result['not_modified']:
+                self.fetch_engine_used = "http-304"
+                print(f"✅ Page unchanged since last run: ₹{result['cached_rate']}")
+                self.note_attempt("http-304", result['cached_rate'], result['elapsed_seconds'], result['status_code'],
+                                  result['bytes'])
+                return result['cached_rate']
+            
+            rate = self.extract_24k_rate(result['html'])
+            self.note_attempt("http", rate, result['elapsed_seconds'], result['status_code'], result['bytes'])
+            if rate:
+                engine.remember(result, rate)
+                if not self.dry_run:
+                    engine.save_cache()
+                self.fetch_engine_used = "http"
+            return rate
+        
+        except Exception as e:
+            print(f"❌ HTTP fetch error: {e}")
+            response = getattr(e, 'response', None)  # requests' HTTPError carries the 4xx/5xx response
+            self.last_extraction = None
+            self.note_attempt("http", None, time.perf_counter() - started,
+                              getattr(response, 'status_code', None), error=str(e) or type(e).__name__)
+            return None
+    
+    def fetch_rate_selenium(self):
+        """Render the page in headless Chrome with configured delays"""
+        import random
+        
+        if self.driver is None:
+            self.setup_driver()
+        
+        # Use configured delays
+        time.sleep(random.uniform(SCRAPING_DELAY_MIN, SCRAPING_DELAY_MAX))
+        
+        started = time.perf_counter()
+        try:
+            with span('page_load'):
+                self.driver.get(self.url)
+                loaded = time.perf_counter() - started
+                time.sleep(random.uniform(PAGE_LOAD_DELAY_MIN, PAGE_LOAD_DELAY_MAX))
             page_source = self.driver.page_source
-            
-            # Try multiple patterns for Kerala 24K gold
-            patterns = [
-                r'24K\s+Gold\s*/g.*?₹\s*([\d,]+)',
-                r'Kerala.*?24K.*?₹\s*([\d,]+)',
-                r'24K.*?₹\s*([\d,]+)',
-                r'24\s*Karat.*?₹\s*([\d,]+)',
-                r'24k.*?₹\s*([\d,]+)'
-            ]
-            
-            for i, pattern in enumerate(patterns, 1):
-                match = re.search(pattern, page_source, re.IGNORECASE | re.DOTALL)
-                if match:
-                    rate = float(match.group(1).replace(',', ''))
-                    print(f"✅ Found via pattern {i}: ₹{rate}")
-                    return rate
-            
-            # Element-based extraction as fallback
-            elements_24k = self.driver.find_elements(By.XPATH, "//*[contains(translate(text(), 'k', 'K'), '24K')]")
-            
-            for element in elements_24k:
-                text = element.text
-                if '₹' in text:
-                    match = re.search(r'₹\s*([\d,]+)', text)
-                    if match:
-                        rate = float(match.group(1).replace(',', ''))
-                        print(f"✅ Found in element: ₹{rate}")
-                        return rate
-                
-                try:
-                    parent = element.find_element(By.XPATH, "..")
-                    parent_text = parent.text
-                    if '₹' in parent_text and '24K' in parent_text:
-                        match = re.search(r'₹\s*([\d,]+)', parent_text)
-                        if match:
-                            rate = float(match.group(1).replace(',', ''))
-                            print(f"✅ Found in parent: ₹{rate}")
-                            return rate
-                except:
-                    pass
+        except Exception as e:
+            self.last_extraction = None
+            self.note_attempt("selenium", None, time.perf_counter() - started, error=str(e) or type(e).__name__)
+            raise
+        
+        rate = self.extract_24k_rate(page_source)
+        self.note_attempt("selenium", rate, loaded, size=len(page_source.encode('utf-8')))
+        if rate:
+            self.fetch_engine_used = "selenium"
+        return rate
+    
+    def scrape_city_rates(self):
+        """Fetch every source's city rate pages into data/city_rates.json (never fails the Kerala scrape)"""
+        try:
+            from city_pipeline import run_city_pipeline
+            with span('city_rates'):
+                results = run_city_pipeline(timestamp=self.ist_time.isoformat())
+            for result in results:
+                self.attempts.append(attempt(
+                    result['url'], "http-304" if result['status'] == 'not_modified' else "http",
+                    result['status'] in ('ok', 'not_modified'), self.current_period,
+                    seconds=result['elapsed_seconds'], status=result['status_code'], size=result['bytes'],
+                    error=result['error'] or (None if result['status'] != 'no_rate' else "no rate matched"),
+                    job='city', kind=result['kind'], cities=len(result['cities'])))
+        except Exception as e:
+            print(f"⚠️ City rates error: {e}")
+    
+    def extract_24k_rate(self, page_source):
+        """Extract 24K rate from page HTML (single bounded pass, no WebDriver calls)"""
+        self.last_extraction = None
+        try:
+            with span('extract'):
+                self.last_extraction = extract_24k_rate_detailed(page_source)
+            rate = self.last_extraction['rate']
+            if rate:
+                print(f"✅ Found via {self.last_extraction['pattern']}: ₹{rate}")
+                return rate
             
         except Exception as e:
             print(f"❌ Extraction error: {e}")
@@ -301,10 +483,7 @@ class ConfigurableKeralaGoldTracker:
     def check_and_notify_configured(self, current_data):
         """Notification logic using configured thresholds"""
         try:
-            previous_data = None
-            if os.path.exists('data/latest_rate.json'):
-                with open('data/latest_rate.json', 'r') as f:
-                    previous_data = json.load(f)
+            previous_data = self.get_history().latest()
             
             current_rate = current_data['rate']
             current_period = current_data['market_period']
@@ -320,72 +499,50 @@ class ConfigurableKeralaGoldTracker:
                     previous_time = datetime.fromisoformat(previous_timestamp)
                     if previous_time.tzinfo is None:
                         previous_time = previous_time.replace(tzinfo=IST)
-                    time_diff = self.ist_time - previous_time
                 else:
-                    time_diff = timedelta(0)
-                minutes_since_last = time_diff.total_seconds() / 60
-                
-                # Get configured thresholds for current period
-                thresholds = self.get_thresholds_for_period(current_period)
-                
-                should_notify = False
-                priority = "normal"
-                notification_type = ""
-                
-                # Main threshold check
-                if abs(change) >= thresholds['rupees'] or abs(change_percent) >= thresholds['percent']:
-                    should_notify = True
-                    priority = "high" if (abs(change) >= HIGH_PRIORITY_RUPEES or abs(change_percent) >= HIGH_PRIORITY_PERCENT) else "normal"
-                    notification_type = f"📊 Main Alert ({current_period.replace('_', ' ').title()})"
-                    print(f"📊 Main alert: ₹{change:.0f} (threshold: ₹{thresholds['rupees']:.0f})")
-                
-                # Micro alerts
-                elif ENABLE_MICRO_ALERTS and abs(change) >= thresholds['micro_rupees']:
-                    should_notify = True
-                    priority = "low"
-                    notification_type = "📱 Micro Alert"
-                    print(f"📱 Micro alert: ₹{change:.0f}")
+                    previous_time = self.ist_time
                 
-                # Rapid movement detection
-                elif ENABLE_RAPID_ALERTS and minutes_since_last <= RAPID_MOVEMENT_WINDOW_MINUTES and abs(change) >= RAPID_MOVEMENT_THRESHOLD:
-                    should_notify = True
-                    priority = "high"
-                    notification_type = "⚡ Rapid Movement"
-                    print(f"⚡ Rapid movement: ₹{change:.0f} in {minutes_since_last:.0f} min")
+                # Every sample goes through the reversal detector, whichever alert ends up firing
+                direction_change = self.detect_direction_change(current_rate) if ENABLE_TREND_ALERTS else None
                 
-                # Trend reversal detection
-                elif ENABLE_TREND_ALERTS:
-                    direction_change = self.detect_direction_change(current_rate)
-                    if direction_change and abs(change) >= TREND_REVERSAL_THRESHOLD:
-                        should_notify = True
-                        priority = "normal"
-                        notification_type = f"🔄 Trend Reversal ({direction_change})"
-                        print(f"🔄 Trend reversal: {direction_change}")
+                state = RuleState(previous_time.timestamp(), previous_rate, direction_change)
+                alerts = evaluate(Sample.at(self.ist_time, current_rate), state, self.rule_config)
                 
-                # Stability alerts
-                elif ENABLE_STABILITY_ALERTS and change == 0 and minutes_since_last >= STABILITY_ALERT_MINUTES:
-                    if current_period in ["AKGSMA_MORNING_RUSH", "EVENING_UPDATE"]:
-                        should_notify = True
-                        priority = "low"
-                        notification_type = "⏸️ Rate Stability"
-                        print(f"⏸️ Stability: No change for {minutes_since_last:.0f} minutes")
-                
-                else:
+                if not alerts:
+                    thresholds = self.get_thresholds_for_period(current_period)
                     print(f"🔕 No alert: ₹{change:.2f} ({change_percent:.3f}%) - Threshold: ₹{thresholds['rupees']:.0f}")
                 
-                # Send notification if criteria met
-                if should_notify:
+                for alert in alerts:
+                    if alert.kind == 'main':
+                        notification_type = f"📊 Main Alert ({alert.period.replace('_', ' ').title()})"
+                        print(f"📊 Main alert: ₹{alert.change:.0f} (threshold: ₹{alert.threshold:.0f})")
+                    elif alert.kind == 'micro':
+                        notification_type = "📱 Micro Alert"
+                        print(f"📱 Micro alert: ₹{alert.change:.0f}")
+                    elif alert.kind == 'rapid':
+                        notification_type = "⚡ Rapid Movement"
+                        print(f"⚡ Rapid movement: ₹{alert.change:.0f} in {alert.minutes_since:.0f} min")
+                    elif alert.kind == 'trend':
+                        notification_type = f"🔄 Trend Reversal ({alert.reversal})"
+                        print(f"🔄 Trend reversal: {alert.reversal}")
+                    else:
+                        notification_type = "⏸️ Rate Stability"
+                        print(f"⏸️ Stability: No change for {alert.minutes_since:.0f} minutes")
+                    
                     # Get yesterday's rate for comparison
                     yesterday_data = self.get_yesterday_rate()
                     
                     self.send_configured_alert(
-                        current_rate, previous_rate, change, change_percent, 
-                        priority, notification_type, current_period, minutes_since_last,
+                        current_rate, previous_rate, alert.change, alert.change_percent,
+                        alert.priority, notification_type, alert.period, alert.minutes_since,
                         yesterday_data
                     )
                 
+                if ENABLE_SUBSCRIBER_ALERTS:
+                    self.notify_subscribers(current_rate, previous_rate, change, change_percent, current_period)
+                
                 # Hourly reports
-                if ENABLE_HOURLY_REPORTS and self.should_send_hourly_update():
+                if ENABLE_HOURLY_REPORTS and not self.dry_run and self.should_send_hourly_update():
                     self.send_hourly_trend_update()
                     
             else:
@@ -396,27 +553,53 @@ class ConfigurableKeralaGoldTracker:
             print(f"Configured notification error: {e}")
     
     def detect_direction_change(self, current_rate):
-        """Detect trend reversals using configured parameters"""
+        """Feed the current rate to the streaming reversal detector; returns e.g. "up → down" on a reversal"""
         try:
-            if os.path.exists('data/rate_history.json'):
-                with open('data/rate_history.json', 'r') as f:
-                    history = json.load(f)
-                
-                if len(history) >= ANALYSIS_ENTRIES_FOR_TREND:
-                    recent_rates = [entry['rate'] for entry in history[-ANALYSIS_ENTRIES_FOR_TREND:]]
-                    recent_rates.append(current_rate)
-                    
-                    if len(recent_rates) >= 3:
-                        trend_1 = "up" if recent_rates[1] > recent_rates[0] else "down"
-                        trend_2 = "up" if recent_rates[2] > recent_rates[1] else "down"
-                        trend_3 = "up" if recent_rates[3] > recent_rates[2] else "down"
-                        
-                        if trend_1 == trend_2 and trend_2 != trend_3:
-                            return f"{trend_2} → {trend_3}"
-        except:
-            pass
+            detector = self.get_reversal_detector()
+            event = detector.update(self.ist_time.timestamp(), current_rate)
+            if not self.dry_run:
+                detector.save()
+            return event['label'] if event else None
+        except Exception as e:
+            print(f"⚠️ Reversal detector error: {e}")
+            return None
+    
+    def get_reversal_detector(self):
+        """Persisted detector, caught up with any samples it has not seen (normally none)"""
+        if self.reversal_detector is None:
+            self.reversal_detector = ReversalDetector.load(**detector_settings(self.alert_config))
+            history = self.get_history()
+            self.reversal_detector.ingest(history.epochs, [entry.get('rate') for entry in history.entries])
+        return self.reversal_detector
+    
+    def analyze(self):
+        """Report from stored history only: no fetch, no browser, nothing written or sent"""
+        from analytics import RateSeries, analytics_summary
         
-        return None
+        history = self.get_history()
+        latest = history.latest()
+        if not latest:
+            print("📂 No history to analyze yet")
+            return None
+        
+        report = {
+            'rate': latest.get('rate'),
+            'timestamp': latest.get('timestamp'),
+            'period': self.current_period,
+            'last_hour': self.get_last_hour_trend(),
+            'yesterday': self.get_yesterday_rate(),
+            'analytics': analytics_summary(RateSeries.from_snapshot(history))
+        }
+        print(f"📈 Analysis of {len(history.entries)} recent entries:")
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return report
+    
+    def get_history(self):
+        """Recent history, read and parsed once per run and shared by every analysis"""
+        if self.history is None:
+            with span('history_load'):
+                self.history = HistorySnapshot(self.history_store, last=HISTORY_ENTRIES_TO_KEEP)
+        return self.history
     
     def should_send_hourly_update(self):
         """Check if should send hourly update based on configuration"""
@@ -426,143 +609,41 @@ class ConfigurableKeralaGoldTracker:
         if self.current_period not in HOURLY_REPORT_PERIODS:
             return False
         
-        if self.ist_time.minute <= 5:
-            try:
-                os.makedirs('data', exist_ok=True)
-                hour_key = self.ist_time.strftime('%Y-%m-%d-%H')
-                
-                with open('data/last_hourly.txt', 'r') as f:
-                    last_hourly = f.read().strip()
-                    if last_hourly == hour_key:
-                        return False
-            except:
-                pass
-            
-            with open('data/last_hourly.txt', 'w') as f:
-                f.write(hour_key)
-            
-            return True
-        
-        return False
+        # Gate on the last report actually sent, not the wall-clock minute: adaptive gaps rarely land at :00-:05
+        try:
+            with open(HOURLY_REPORT_FILE, 'r') as f:
+                last_hourly = f.read().strip()
+            if len(last_hourly) == 13:  # Legacy '%Y-%m-%d-%H' key
+                last_sent = datetime.strptime(last_hourly, '%Y-%m-%d-%H').replace(tzinfo=IST)
+            else:
+                last_sent = datetime.fromisoformat(last_hourly)
+            if self.ist_time - last_sent < timedelta(minutes=HOURLY_REPORT_INTERVAL_MINUTES):
+                return False
+        except (OSError, ValueError):
+            pass
+
+        write_text(HOURLY_REPORT_FILE, self.ist_time.isoformat())
+        return True
     
     def send_configured_alert(self, current_rate, previous_rate, change, change_percent, priority, notification_type, period, minutes_since, yesterday_data=None):
         """Send alert using configured message format"""
-        
-        if ENABLE_EMOJI_IN_MESSAGES:
-            direction = "📈" if change > 0 else "📉" if change < 0 else "➡️"
-            period_emoji = {"AKGSMA_MORNING_RUSH": "🌅", "EVENING_UPDATE": "🌆", "ACTIVE_TRADING": "📊", "OFF_HOURS": "🌙"}
-            emoji = period_emoji.get(period, "📈")
-        else:
-            direction = "UP" if change > 0 else "DOWN" if change < 0 else "STABLE"
-            emoji = ""
-        
-        if abs(change) == 0:
-            message = f"""{emoji} {NOTIFICATION_TITLE}
-
-{direction} NO CHANGE for {minutes_since:.0f} minutes
-Current: ₹{current_rate:.0f}/g
-Type: {notification_type}
-Time: {self.ist_time.strftime('%I:%M %p IST')}"""
-            
-            # Add multi-gram prices
-            if ENABLE_MULTI_GRAM_DISPLAY:
-                multi_gram = self.format_multi_gram_prices(current_rate)
-                message += f"\n\n💰 Quick Prices:\n{multi_gram}"
-            
-            # Add selling rates
-            if ENABLE_SELLING_RATE_DISPLAY:
-                selling_rates = self.format_selling_rates(current_rate)
-                message += f"\n\n💸 Selling Value (After Fees):\n{selling_rates}"
-            
-            # Add yesterday comparison even for stability alerts
-            if yesterday_data and ENABLE_YESTERDAY_COMPARISON:
-                yesterday_rate = yesterday_data['rate']
-                yesterday_change = current_rate - yesterday_rate
-                yesterday_change_percent = (yesterday_change / yesterday_rate) * 100 if yesterday_rate > 0 else 0
-                hours_ago = yesterday_data['hours_ago']
-                
-                if ENABLE_EMOJI_IN_MESSAGES:
-                    daily_direction = "📈" if yesterday_change > 0 else "📉" if yesterday_change < 0 else "➡️"
-                else:
-                    daily_direction = "UP" if yesterday_change > 0 else "DOWN" if yesterday_change < 0 else "STABLE"
-                
-                message += f"\n\n📅 Since Yesterday (~{hours_ago:.0f}h ago):\n{daily_direction} ₹{yesterday_change:+.0f} ({yesterday_change_percent:+.2f}%) from ₹{yesterday_rate:.0f}/g"
-            
-            if INCLUDE_PERIOD_CONTEXT:
-                message += f"\n\n💡 Stability during {period.lower().replace('_', ' ')} noted."
-        else:
-            if abs(change) >= 50:
-                magnitude = "MAJOR"
-            elif abs(change) >= 25:
-                magnitude = "SIGNIFICANT"
-            elif abs(change) >= 10:
-                magnitude = "MODERATE"
-            else:
-                magnitude = "MINOR"
-            
-            # Determine arrow/emoji for change direction
-            if ENABLE_EMOJI_IN_MESSAGES:
-                change_arrow = "⬆️" if change > 0 else "⬇️" if change < 0 else "➡️"
-            else:
-                change_arrow = "↑" if change > 0 else "↓" if change < 0 else "→"
-
-            message = f"""{emoji} {NOTIFICATION_TITLE}
-
-{change_arrow} {magnitude} CHANGE: ₹{change:+.0f} ({change_percent:+.2f}%)
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-💰 Current Rate: ₹{current_rate:,.0f}/g
-
-⏱️ Gap: {minutes_since:.0f} min | 🕐 {self.ist_time.strftime('%I:%M %p')}"""
-
-            # Add multi-gram prices and changes
-            if ENABLE_MULTI_GRAM_DISPLAY:
-                multi_gram = self.format_multi_gram_prices(current_rate)
-                message += f"\n\n💰 Current Prices:\n{multi_gram}"
-
-                multi_gram_change = self.format_multi_gram_change(current_rate, previous_rate)
-                if multi_gram_change:
-                    message += f"\n\n💸 Price Changes:\n{multi_gram_change}"
-
-            # Add selling rates
-            if ENABLE_SELLING_RATE_DISPLAY:
-                selling_rates = self.format_selling_rates(current_rate)
-                message += f"\n\n💸 Selling Value (After Fees):\n{selling_rates}"
-            
-            # Add yesterday comparison
-            if yesterday_data and ENABLE_YESTERDAY_COMPARISON:
-                yesterday_rate = yesterday_data['rate']
-                yesterday_change = current_rate - yesterday_rate
-                yesterday_change_percent = (yesterday_change / yesterday_rate) * 100 if yesterday_rate > 0 else 0
-                hours_ago = yesterday_data['hours_ago']
-                
-                if ENABLE_EMOJI_IN_MESSAGES:
-                    daily_direction = "📈" if yesterday_change > 0 else "📉" if yesterday_change < 0 else "➡️"
-                else:
-                    daily_direction = "UP" if yesterday_change > 0 else "DOWN" if yesterday_change < 0 else "STABLE"
-                
-                message += f"\n\n📅 Since Yesterday (~{hours_ago:.0f}h ago):\n{daily_direction} ₹{yesterday_change:+.0f} ({yesterday_change_percent:+.2f}%) from ₹{yesterday_rate:.0f}/g"
-            
-            if INCLUDE_PERIOD_CONTEXT:
-                message += f"\n\n🎯 Period: {period.lower().replace('_', ' ')}"
-        
+        message = render_alert(self.message_config, self.ist_time, current_rate, previous_rate, change, change_percent,
+                               notification_type, period, minutes_since, yesterday_data)
         self.send_notifications(message, priority)
     
     def send_hourly_trend_update(self):
         """Send hourly trend report if enabled"""
         try:
-            hourly_data = self.get_last_hour_data()
+            hourly = self.get_last_hour_trend()
             
-            if hourly_data and len(hourly_data) >= 2:
-                rates = [entry['rate'] for entry in hourly_data]
+            if hourly and hourly['count'] >= 2:
+                hourly_high = hourly['high']
+                hourly_low = hourly['low']
+                hourly_volatility = hourly['range']
                 
-                hourly_high = max(rates)
-                hourly_low = min(rates)
-                hourly_volatility = hourly_high - hourly_low
-                
-                opening_rate = rates[0]
-                current_rate = rates[-1]
-                hourly_change = current_rate - opening_rate
+                opening_rate = hourly['opening']
+                current_rate = hourly['current']
+                hourly_change = hourly['change']
                 
                 if hourly_change > 10:
                     trend = "📈 BULLISH" if ENABLE_EMOJI_IN_MESSAGES else "BULLISH"
@@ -585,95 +666,34 @@ Hourly Performance:
 • Change: ₹{hourly_change:+.0f} ({(hourly_change/opening_rate)*100:+.2f}%)
 • Volatility: ₹{hourly_volatility:.0f}
 
-Activity: {len(hourly_data)} updates this hour
+Activity: {hourly['count']} updates this hour
 Period: {self.current_period.replace('_', ' ').title()}"""
                 
                 self.send_notifications(message, priority="low")
         except Exception as e:
             print(f"Hourly update error: {e}")
     
-    def get_last_hour_data(self):
-        """Get data from last hour"""
+    def get_last_hour_trend(self):
+        """Opening/current/high/low/change over the last hour (analytics.RateSeries window)"""
         try:
-            if os.path.exists('data/rate_history.json'):
-                with open('data/rate_history.json', 'r') as f:
-                    history = json.load(f)
-                
-                one_hour_ago = self.ist_time - timedelta(hours=1)
-                recent_data = []
-                
-                for entry in reversed(history):
-                    entry_timestamp = entry['timestamp']
-                    entry_time = datetime.fromisoformat(entry_timestamp)
-                    if entry_time.tzinfo is None:
-                        entry_time = entry_time.replace(tzinfo=IST)
-                    if entry_time >= one_hour_ago:
-                        recent_data.append(entry)
-                
-                return list(reversed(recent_data))
-        except:
-            pass
-        
-        return []
+            from analytics import RateSeries
+            one_hour_ago = self.ist_time - timedelta(hours=1)
+            return RateSeries.from_snapshot(self.get_history()).trend(round(one_hour_ago.timestamp() * 1_000_000))
+        except Exception as e:
+            print(f"⚠️ Hourly trend error: {e}")
+            return None
     
-    def format_multi_gram_prices(self, rate_per_gram):
+    def format_multi_gram_prices(self, rate_per_gram, quantities=None):
         """Format prices for multiple gram quantities"""
-        if not ENABLE_MULTI_GRAM_DISPLAY:
-            return ""
+        return gram_prices(self.message_config, rate_per_gram, tuple(quantities) if quantities else None)
 
-        prices = []
-        for grams in GRAM_QUANTITIES:
-            total_price = rate_per_gram * grams
-            prices.append(f"{grams}g: ₹{total_price:,.0f}")
-
-        return " | ".join(prices)
-
-    def format_multi_gram_change(self, current_rate, previous_rate):
+    def format_multi_gram_change(self, current_rate, previous_rate, quantities=None):
         """Format price changes for multiple gram quantities"""
-        if not ENABLE_MULTI_GRAM_DISPLAY or current_rate == previous_rate:
-            return ""
-
-        # Determine arrow based on direction
-        if ENABLE_EMOJI_IN_MESSAGES:
-            arrow = "⬆️" if current_rate > previous_rate else "⬇️"
-        else:
-            arrow = "↑" if current_rate > previous_rate else "↓"
-
-        changes = []
-        for grams in GRAM_QUANTITIES:
-            current_price = current_rate * grams
-            previous_price = previous_rate * grams
-            change = current_price - previous_price
-            changes.append(f"{grams}g: {arrow}₹{abs(change):.0f}")
-
-        return " | ".join(changes)
+        return gram_changes(self.message_config, current_rate, previous_rate, tuple(quantities) if quantities else None)
     
     def format_selling_rates(self, rate_per_gram):
         """Format selling rates after jewellery fees"""
-        if not ENABLE_SELLING_RATE_DISPLAY:
-            return ""
-
-        lines = []
-
-        for grams in SELLING_GRAM_QUANTITIES:
-            gross_value = rate_per_gram * grams
-
-            # Calculate net amounts for each fee percentage
-            net_values = []
-            for fee_percent in SELLING_FEE_PERCENTAGES:
-                fee_amount = gross_value * (fee_percent / 100)
-                net_amount = gross_value - fee_amount
-                # Use compact format with space separator instead of pipe
-                net_values.append(f"{fee_percent}%:₹{net_amount:.0f}")
-
-            # Format line for this gram quantity - use space separator
-            line = f"{grams}g: " + " ".join(net_values)
-            lines.append(line)
-
-        result = "\n".join(lines)
-        print(f"DEBUG: Selling rates section length: {len(result)} chars")
-        print(f"DEBUG: Selling rates content:\n{result}")
-        return result
+        return selling_rates(self.message_config, rate_per_gram)
     
     def get_yesterday_rate(self):
         """Get rate from approximately 24 hours ago (yesterday)"""
@@ -681,11 +701,7 @@ Period: {self.current_period.replace('_', ' ').title()}"""
             if not ENABLE_YESTERDAY_COMPARISON:
                 return None
             
-            if not os.path.exists('data/rate_history.json'):
-                return None
-            
-            with open('data/rate_history.json', 'r') as f:
-                history = json.load(f)
+            history = self.get_history()
             
             if len(history) < 2:
                 return None
@@ -694,35 +710,12 @@ Period: {self.current_period.replace('_', ' ').title()}"""
             target_time_min = self.ist_time - timedelta(hours=26)
             target_time_max = self.ist_time - timedelta(hours=YESTERDAY_COMPARISON_WINDOW_HOURS)
             
-            # Find the closest rate to 24 hours ago
-            closest_entry = None
-            closest_diff = None
-            
-            for entry in history:
-                try:
-                    entry_timestamp = entry.get('timestamp', '')
-                    if not entry_timestamp:
-                        continue
-                    
-                    entry_time = datetime.fromisoformat(entry_timestamp)
-                    if entry_time.tzinfo is None:
-                        entry_time = entry_time.replace(tzinfo=IST)
-                    
-                    # Check if entry is within the yesterday window
-                    if target_time_min <= entry_time <= target_time_max:
-                        time_diff = abs((entry_time - (self.ist_time - timedelta(hours=24))).total_seconds())
-                        
-                        if closest_diff is None or time_diff < closest_diff:
-                            closest_diff = time_diff
-                            closest_entry = entry
-                
-                except Exception as e:
-                    continue
+            # Find the closest rate to 24 hours ago (binary search on the time index)
+            closest = history.closest_to(self.ist_time - timedelta(hours=24), target_time_min, target_time_max)
             
-            if closest_entry:
-                entry_time = datetime.fromisoformat(closest_entry['timestamp'])
-                if entry_time.tzinfo is None:
-                    entry_time = entry_time.replace(tzinfo=IST)
+            if closest is not None:
+                closest_entry = history.entries[closest]
+                entry_time = history.time_at(closest)
                 
                 hours_ago = (self.ist_time - entry_time).total_seconds() / 3600
                 
@@ -740,42 +733,8 @@ Period: {self.current_period.replace('_', ' ').title()}"""
     
     def send_initial_notification(self, current_rate, period):
         """Send initial setup notification with current configuration"""
-        emoji = "🚀 " if ENABLE_EMOJI_IN_MESSAGES else ""
-        
-        message = ""f"""
-
-Current Rate: ₹{current_rate:.0f}/g
-Period: {period.replace('_', ' ').title()}
-Time: {self.ist_time.strftime('%d %b, %I:%M %p IST')}"""
-        
-        # Add multi-gram prices
-        if ENABLE_MULTI_GRAM_DISPLAY:
-            multi_gram = self.format_multi_gram_prices(current_rate)
-            message += f"\n\n💰 Quick Prices:\n{multi_gram}"
-        
-        # Add selling rates
-        if ENABLE_SELLING_RATE_DISPLAY:
-            selling_rates = self.format_selling_rates(current_rate)
-            message += f"\n\n💸 Selling Value (After Fees):\n{selling_rates}"
-        
-        # Add yesterday comparison if available
-        if ENABLE_YESTERDAY_COMPARISON:
-            yesterday_data = self.get_yesterday_rate()
-            if yesterday_data:
-                yesterday_rate = yesterday_data['rate']
-                yesterday_change = current_rate - yesterday_rate
-                yesterday_change_percent = (yesterday_change / yesterday_rate) * 100 if yesterday_rate > 0 else 0
-                hours_ago = yesterday_data['hours_ago']
-                
-                if ENABLE_EMOJI_IN_MESSAGES:
-                    daily_direction = "📈" if yesterday_change > 0 else "📉" if yesterday_change < 0 else "➡️"
-                else:
-                    daily_direction = "UP" if yesterday_change > 0 else "DOWN" if yesterday_change < 0 else "STABLE"
-                
-                message += f"\n\n📅 Since Yesterday (~{hours_ago:.0f}h ago):\n{daily_direction} ₹{yesterday_change:+.0f} ({yesterday_change_percent:+.2f}%) from ₹{yesterday_rate:.0f}/g"
-        
-        message += f""""""
-        
+        yesterday_data = self.get_yesterday_rate() if ENABLE_YESTERDAY_COMPARISON else None
+        message = render_initial(self.message_config, self.ist_time, current_rate, period, yesterday_data)
         self.send_notifications(message, priority="normal")
     
     def send_error_notification(self, error_msg):
@@ -795,112 +754,136 @@ Will retry on next scheduled run."""
         self.send_notifications(message, priority="high")
     
     def send_notifications(self, message, priority="normal"):
-        """Send notifications via configured channels"""
-
-        print(f"DEBUG: Total message length: {len(message)} characters")
-        print(f"DEBUG: Full message preview:\n{message}\n{'='*60}")
+        """Queue a notification for every configured channel; flush_notifications() delivers it"""
 
-        if self.telegram_token and self.telegram_chat_id:
-            self.send_telegram(message)
+        if DEBUG_MESSAGE_PREVIEW:
+            print(f"DEBUG: Total message length: {len(message)} characters")
+            print(f"DEBUG: Full message preview:\n{message}\n{'='*60}")
 
-        if self.pushover_token and self.pushover_user:
-            self.send_pushover(message, priority)
+        if self.dry_run:
+            print(f"🧪 Dry run: {priority} alert not sent")
+            return
 
-        if self.ntfy_topic:
-            self.send_ntfy(message, priority)
+        if self.owner_channels:  # Only queued here; the dispatcher is built when flush_notifications() sends
+            self.outbox.enqueue(message, priority, self.owner_channels)
 
         print(f"📱 Alert ({priority}): {message[:80]}...")
     
-    def send_telegram(self, message):
-        """Send Telegram notification"""
+    def flush_notifications(self):
+        """Deliver everything queued in the outbox (this run's alerts plus anything left by earlier runs)"""
         try:
-            url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-            data = {
-                'chat_id': self.telegram_chat_id,
-                'text': message,
-                'parse_mode': 'HTML'
-            }
-            
-            response = requests.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                print("✅ Telegram sent")
-            else:
-                print(f"❌ Telegram failed: {response.status_code}")
-                
+            if self.dry_run or not self.outbox.pending_count():
+                return
+            dispatcher = self.get_dispatcher()
+            # Subscriber channels too, so messages queued by this or an earlier run can be drained
+            engine = self.get_alert_engine() if ENABLE_SUBSCRIBER_ALERTS else None
+            for subscriber in (engine.subscribers.values() if engine else ()):
+                self.register_subscriber_channels(dispatcher, subscriber)
+            if not dispatcher.channels:
+                return
+            for name, result in self.outbox.drain(dispatcher).items():
+                if result['failed']:
+                    print(f"❌ {name.title()} failed: {result['error']} (queued for retry)")
+                else:
+                    print(f"✅ {name.title()} sent {result['sent']} message(s) in {result['requests']} request(s)")
+            left = self.outbox.pending_count()
+            if left:
+                print(f"📮 {left} notification(s) still queued in the outbox")
         except Exception as e:
-            print(f"❌ Telegram error: {e}")
+            print(f"❌ Notification outbox error: {e}")
     
-    def send_pushover(self, message, priority):
-        """Send Pushover notification"""
-        try:
-            priority_map = {"low": -1, "normal": 0, "high": 1}
-            
-            url = "https://api.pushover.net/1/messages.json"
-            data = {
-                'token': self.pushover_token,
-                'user': self.pushover_user,
-                'message': message,
-                'title': NOTIFICATION_TITLE,
-                'priority': priority_map.get(priority, 0)
-            }
-            
-            response = requests.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                print("✅ Pushover sent")
-            else:
-                print(f"❌ Pushover failed: {response.status_code}")
-                
-        except Exception as e:
-            print(f"❌ Pushover error: {e}")
+    def get_dispatcher(self):
+        """Notification dispatcher for the configured channels (created once, connections kept alive)"""
+        if self.dispatcher is None:
+            from notify_dispatch import NotificationDispatcher, TelegramChannel, PushoverChannel, NtfyChannel
+            channels = []
+            if self.telegram_token and self.telegram_chat_id:
+                channels.append(TelegramChannel(self.telegram_token, self.telegram_chat_id))
+            if self.pushover_token and self.pushover_user:
+                channels.append(PushoverChannel(self.pushover_token, self.pushover_user, NOTIFICATION_TITLE))
+            if self.ntfy_topic:
+                channels.append(NtfyChannel(self.ntfy_topic, NOTIFICATION_TITLE, emoji_tags=ENABLE_EMOJI_IN_MESSAGES))
+            self.dispatcher = NotificationDispatcher(channels)
+        return self.dispatcher
+    
+    def get_alert_engine(self):
+        """AlertEngine over the subscription store (reloaded only when the file changes)"""
+        stamp = file_stamp(migrate=not self.dry_run)
+        if stamp is None:
+            return None
+        if self.alert_engine is None or stamp != self.alert_engine_stamp:
+            store = SubscriptionStore.load(migrate=not self.dry_run)
+            self.alert_engine = AlertEngine(store.subscribers.values(), self.subscriber_defaults())
+            self.alert_engine_stamp = stamp
+        return self.alert_engine
     
-    def send_ntfy(self, message, priority):
-        """Send ntfy.sh notification"""
+    def subscriber_channels(self, subscriber):
+        """Outbox names ('<provider>@<id>') of a subscriber's deliverable channels (no channel is built)"""
+        tokens = {'telegram': self.telegram_token, 'pushover': self.pushover_token, 'ntfy': True}
+        return [f"{kind}@{subscriber['id']}" for kind in subscriber['channels'] if tokens.get(kind)]
+
+    def register_subscriber_channels(self, dispatcher, subscriber):
+        """Add a subscriber's channels to the dispatcher (skipping ones already there)"""
+        from notify_dispatch import TelegramChannel, PushoverChannel, NtfyChannel, pooled_session
+        sessions = self.subscriber_sessions
+        for kind, target in subscriber['channels'].items():
+            name = f"{kind}@{subscriber['id']}"
+            if name not in dispatcher.by_name:
+                if kind == 'telegram' and self.telegram_token:
+                    channel = TelegramChannel(self.telegram_token, target, name=name,
+                                              session=sessions.setdefault(kind, pooled_session()))
+                elif kind == 'pushover' and self.pushover_token:
+                    channel = PushoverChannel(self.pushover_token, target, NOTIFICATION_TITLE, name=name,
+                                              session=sessions.setdefault(kind, pooled_session()))
+                elif kind == 'ntfy':
+                    channel = NtfyChannel(target, NOTIFICATION_TITLE, emoji_tags=ENABLE_EMOJI_IN_MESSAGES, name=name,
+                                          session=sessions.setdefault(kind, pooled_session()))
+                else:
+                    continue  # No bot/app token for this provider
+                dispatcher.add_channel(channel)
+    
+    def notify_subscribers(self, current_rate, previous_rate, change, change_percent, period):
+        """Queue an alert for every subscriber whose own thresholds this change reaches"""
         try:
-            url = f"https://ntfy.sh/{self.ntfy_topic}"
-            
-            priority_map = {"low": "min", "normal": "default", "high": "high"}
-            
-            if ENABLE_EMOJI_IN_MESSAGES:
-                tags = "gold,kerala,fire,money" if priority == "high" else "gold,kerala,chart_with_upwards_trend"
-            else:
-                tags = "gold,kerala"
-            
-            headers = {
-                'Title': NOTIFICATION_TITLE,
-                'Priority': priority_map.get(priority, "default"),
-                'Tags': tags
-            }
-            
-            response = requests.post(url, data=message, headers=headers, timeout=10)
-            if response.status_code == 200:
-                print("✅ ntfy sent")
-            else:
-                print(f"❌ ntfy failed: {response.status_code}")
-                
+            engine = self.get_alert_engine()
+            if not engine:
+                return
+            alerts = engine.evaluate(change, change_percent, period, self.is_weekend)
+            if self.dry_run:
+                print(f"🧪 Dry run: {len(alerts)} of {len(engine)} subscribers would be alerted")
+                return
+            messages = {}  # Subscribers with the same alert kind and gram list get the same text
+            queued = 0
+            for alert in alerts:
+                names = self.subscriber_channels(alert['subscriber'])
+                if not names:
+                    continue
+                quantities = alert['subscriber']['gram_quantities']
+                key = (alert['kind'], tuple(quantities))
+                if key not in messages:
+                    messages[key] = self.format_subscriber_alert(alert['kind'], current_rate, previous_rate, change,
+                                                                 change_percent, period, quantities)
+                queued += self.outbox.enqueue(messages[key], alert['priority'], names)
+            print(f"👥 Subscribers: {len(alerts)} of {len(engine)} alerted, {queued} message(s) queued")
         except Exception as e:
-            print(f"❌ ntfy error: {e}")
+            print(f"❌ Subscriber alert error: {e}")
+    
+    def format_subscriber_alert(self, kind, current_rate, previous_rate, change, change_percent, period, quantities):
+        """Short alert for a subscriber, priced in their own gram quantities"""
+        return render_subscriber_alert(self.message_config, self.ist_time, kind, current_rate, previous_rate, change,
+                                       change_percent, period, quantities)
     
     def save_data(self, data):
         """Save data with configured retention settings"""
         os.makedirs('data', exist_ok=True)
         
         # Save latest
-        with open('data/latest_rate.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        # Save to history with configured retention
-        history_file = 'data/rate_history.json'
-        history = []
-        
-        if os.path.exists(history_file):
-            with open('data/rate_history.json', 'r') as f:
-                history = json.load(f)
+        write_json('data/latest_rate.json', data)
         
-        history.append(data)
-        history = history[-HISTORY_ENTRIES_TO_KEEP:]
-        
-        with open('data/rate_history.json', 'w') as f:
-            json.dump(history, f, indent=2)
+        # Add to the in-memory snapshot and write it back once (O(1) append to the store)
+        history = self.get_history()
+        history.add(data)
+        history.flush()
         
         # Save configuration summary for reference
         config_summary = {
@@ -929,8 +912,7 @@ Will retry on next scheduled run."""
             'is_weekend': data['is_weekend']
         }
         
-        with open('data/config_summary.json', 'w') as f:
-            json.dump(config_summary, f, indent=2)
+        write_json('data/config_summary.json', config_summary)
 
 if __name__ == "__main__":
     print("🔧 Starting Configurable Kerala Gold Tracker...")
@@ -947,11 +929,35 @@ if __name__ == "__main__":
     print(f"• Hourly Reports: {'✅ Enabled' if ENABLE_HOURLY_REPORTS else '❌ Disabled'}")
     print(f"• Yesterday Comparison: {'✅ Enabled' if ENABLE_YESTERDAY_COMPARISON else '❌ Disabled'}")
     print(f"• Multi-Gram Display: {'✅ Enabled' if ENABLE_MULTI_GRAM_DISPLAY else '❌ Disabled'} ({', '.join([f'{g}g' for g in GRAM_QUANTITIES])})")
+    print(f"• Fetch Engine: {FETCH_ENGINE}{' (Selenium fallback)' if FETCH_ENGINE == 'http' and ENABLE_SELENIUM_FALLBACK else ''}")
+    print(f"• City Rates: {'✅ Enabled' if ENABLE_CITY_RATES else '❌ Disabled'}")
     print(f"• Selling Calculator: {'✅ Enabled' if ENABLE_SELLING_RATE_DISPLAY else '❌ Disabled'} ({', '.join([f'{f}%' for f in SELLING_FEE_PERCENTAGES])} fees)")
     print("=" * 60)
     
-    tracker = ConfigurableKeralaGoldTracker()
+    import argparse  # Only the command line needs it, not importers (tracker_daemon, benchmarks)
+    parser = argparse.ArgumentParser(description="Kerala 24K gold rate tracker")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Stay running and scrape on the period schedule (stop with SIGTERM / Ctrl+C)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Fetch over HTTP and show which alerts would fire; no browser, nothing saved or sent")
+    parser.add_argument('--analyze-only', action='store_true',
+                        help="Report on stored history without fetching anything")
+    args = parser.parse_args()
+    
+    tracker = ConfigurableKeralaGoldTracker(dry_run=args.dry_run or args.analyze_only)
+    
+    if args.analyze_only:
+        raise SystemExit(0 if tracker.analyze() else 1)
+    
+    if args.daemon:
+        from tracker_daemon import TrackerDaemon
+        boundary_hours = (AKGSMA_START_HOUR, TRADING_START_HOUR, EVENING_START_HOUR, EVENING_END_HOUR)
+        TrackerDaemon(tracker, DAEMON_INTERVAL_MINUTES, boundary_hours, publish_site=DAEMON_PUBLISH_SITE,
+                      adaptive=DAEMON_ADAPTIVE_SCHEDULE).run()
+        raise SystemExit(0)
+    
     result = tracker.scrape_rate()
+    tracker.close()
     
     if result:
         print(f"✅ Success: ₹{result['rate']} - {result['market_period']}")
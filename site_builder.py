@@ -0,0 +1,144 @@
+"""
+🏗️ SITE BUILDER
+docs/index.html from the template in site_template/, split into a static
+shell and a small dynamic fragment:
+
+  site_template/style.css, app.js   published as docs/assets/style.<sha>.css and
+                                    app.<sha>.js. The name changes whenever the
+                                    bytes do, so they can be cached forever, and
+                                    each is written once. The set they replace
+                                    stays for one more generation (listed in
+                                    docs/assets/manifest.json), so a cached old
+                                    index.html still loads its CSS and JS
+  site_template/index.html          the page, with {{name}} placeholders for the
+                                    values that change between runs (rate, data
+                                    age, schedule) and for the asset names
+
+The template is compiled once into alternating literal chunks and field names.
+The compiled page and asset hashes are cached per process and recompiled only
+when a template file's stamp changes. So a run (and every daemon cycle) costs
+a few stat() calls, one join over the fragment values and an unchanged-skip
+write of index.html.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+
+from atomic_output import write_bytes, write_json, write_text
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'site_template')
+SITE_DIR = 'docs'
+ASSET_SUBDIR = 'assets'
+PAGE_TEMPLATE = 'index.html'
+ASSETS = ('style.css', 'app.js')
+ASSET_MANIFEST = 'manifest.json'  # {"current": [...], "previous": [...]}: asset files still referenced
+HASH_CHARS = 12
+
+FIELD_RE = re.compile(r'\{\{(\w+)\}\}')
+
+_compiled = {}  # template dir -> (stamp, CompiledSite)
+_published = {}  # site dir -> asset file names its manifest lists as current
+
+
+class CompiledTemplate:
+    """A page template split once into literal chunks and field names"""
+
+    def __init__(self, text):
+        parts = FIELD_RE.split(text)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, values):
+        """Fill every field from `values` (HTML-escaped)"""
+        out = [self.literals[0]]
+        for name, literal in zip(self.fields, self.literals[1:]):
+            out.append(html.escape(str(values[name]), quote=False))
+            out.append(literal)
+        return ''.join(out)
+
+
+class CompiledSite:
+    """The compiled page plus each asset's bytes and content-hashed file name"""
+
+    def __init__(self, template_dir):
+        with open(os.path.join(template_dir, PAGE_TEMPLATE), 'r', encoding='utf-8') as f:
+            self.page = CompiledTemplate(f.read())
+        self.assets = {}
+        for name in ASSETS:
+            with open(os.path.join(template_dir, name), 'rb') as f:
+                body = f.read()
+            stem, extension = os.path.splitext(name)
+            hashed = f"{stem}.{hashlib.sha256(body).hexdigest()[:HASH_CHARS]}{extension}"
+            self.assets[name] = (f"{ASSET_SUBDIR}/{hashed}", body)
+
+    def links(self):
+        """{'stylesheet': 'assets/style.<sha>.css', 'script': 'assets/app.<sha>.js'}"""
+        return {'stylesheet': self.assets['style.css'][0], 'script': self.assets['app.js'][0]}
+
+
+def _stamp(template_dir):
+    stamp = []
+    for name in (PAGE_TEMPLATE,) + ASSETS:
+        info = os.stat(os.path.join(template_dir, name))
+        stamp.append((info.st_mtime_ns, info.st_size))
+    return tuple(stamp)
+
+
+def compiled_site(template_dir=TEMPLATE_DIR):
+    """The CompiledSite for `template_dir`, recompiled only after a template file changes"""
+    stamp = _stamp(template_dir)
+    cached = _compiled.get(template_dir)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, CompiledSite(template_dir))
+        _compiled[template_dir] = cached
+    return cached[1]
+
+
+def _load_asset_manifest(asset_dir):
+    try:
+        with open(os.path.join(asset_dir, ASSET_MANIFEST), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def publish_assets(site, site_dir=SITE_DIR):
+    """Write any hashed asset not yet on disk and retire the generation before the last; returns how many were written"""
+    asset_dir = os.path.join(site_dir, ASSET_SUBDIR)
+    current = sorted(os.path.basename(path) for path, _ in site.assets.values())
+    written = 0
+    for path, body in site.assets.values():
+        target = os.path.join(site_dir, path)
+        if not os.path.exists(target):
+            written += write_bytes(target, body)
+    if _published.get(site_dir) == current:
+        return written
+
+    manifest = _load_asset_manifest(asset_dir)
+    if manifest.get('current') != current:
+        if 'current' in manifest:
+            previous = [name for name in manifest['current'] if name not in current]
+            retired = set(manifest.get('previous', [])) - set(current) - set(previous)
+        else:  # No manifest yet: whatever is on disk is the previous generation
+            previous = sorted(name for name in os.listdir(asset_dir) if name != ASSET_MANIFEST and name not in current)
+            retired = set()
+        for file_name in retired:
+            try:
+                os.remove(os.path.join(asset_dir, file_name))
+            except OSError:
+                pass
+        write_json(os.path.join(asset_dir, ASSET_MANIFEST), {'current': current, 'previous': previous})
+    _published[site_dir] = current
+    return written
+
+
+def build_site(values, site_dir=SITE_DIR, template_dir=TEMPLATE_DIR):
+    """Publish the assets and render index.html from the page's dynamic values; returns the page HTML"""
+    site = compiled_site(template_dir)
+    publish_assets(site, site_dir)
+    page = site.page.render({**values, **site.links()})
+    write_text(os.path.join(site_dir, 'index.html'), page)
+    return page
@@ -0,0 +1,39 @@
+// Auto-refresh countdown
+let refreshTimer = 60;
+const timerElement = document.getElementById('refresh-timer');
+
+setInterval(() => {
+    refreshTimer--;
+    timerElement.textContent = refreshTimer;
+
+    if (refreshTimer <= 0) {
+        location.reload();
+    }
+}, 1000);
+
+// Copy endpoint URL to clipboard
+function copyEndpoint(endpoint) {
+    const fullUrl = window.location.origin + window.location.pathname + endpoint;
+    navigator.clipboard.writeText(fullUrl).then(() => {
+        event.target.textContent = 'Copied!';
+        setTimeout(() => event.target.textContent = 'Copy URL', 2000);
+    }).catch(() => {
+        prompt('Copy this URL:', fullUrl);
+    });
+}
+
+// Update timing displays every minute
+setInterval(() => {
+    fetch('./api/latest.json')
+        .then(r => r.json())
+        .then(data => {
+            const ageMinutes = data.data_age?.minutes || 0;
+            const nextUpdate = data.update_info?.next_update_in_minutes || 0;
+
+            // Update displays if elements exist
+            const timingItems = document.querySelectorAll('.timing-value');
+            if (timingItems[0]) timingItems[0].textContent = ageMinutes.toFixed(1);
+            if (timingItems[1]) timingItems[1].textContent = nextUpdate.toFixed(1);
+        })
+        .catch(() => console.log('Failed to update timing'));
+}, 60000);
@@ -0,0 +1,291 @@
+"""
+👥 SUBSCRIPTIONS
+Per-user alert thresholds, gram quantities and channels, plus the engine that
+decides which subscribers a new sample alerts.
+
+  private/subscriptions.json   {"version": 1, "subscribers": [{...}, ...]}
+
+Subscribers are personal data (chat ids, user keys, topics), so they never
+live in the committed tree: private/ is gitignored, and the scheduled workflow
+passes the same document in the SUBSCRIPTIONS_JSON secret instead. When that
+variable is set it takes precedence over the file.
+
+A subscriber only lists what differs from the tracker's defaults:
+
+  {"id": "anu", "channels": {"telegram": "123456789", "ntfy": "anu-gold"},
+   "thresholds": {"ACTIVE_TRADING": {"rupees": 8, "percent": null}},
+   "micro_rupees": 3, "gram_quantities": [1, 8]}
+
+Channels are a Telegram chat id, a Pushover user key or an ntfy topic. The
+bot token and Pushover app token are the tracker's own.
+
+For each (period, weekend) pair the engine keeps three threshold indexes:
+rupee, percent and micro. Each index holds subscriber ids sorted by trigger
+level. A change of ₹c fires exactly the prefix of levels <= c, so one bisect
+per index finds everyone who fires. Evaluating a sample costs
+O(log n + fired) instead of one threshold check per subscriber. The main and
+micro rules match the tracker's own: a main alert when the rupee or percent
+threshold is reached, otherwise a low-priority micro alert in AKGSMA/evening
+hours. Rapid-movement, trend and stability alerts depend on the history, not
+on per-user levels, so they stay with the tracker's own channels.
+
+Usage: python subscriptions.py list | add ID [--telegram CHAT] [--ntfy TOPIC] [--pushover USER] | remove ID
+"""
+
+import argparse
+import json
+import os
+import re
+from bisect import bisect_right
+
+from atomic_output import write_json
+
+SUBSCRIPTIONS_FILE = 'private/subscriptions.json'
+SUBSCRIPTIONS_ENV = 'SUBSCRIPTIONS_JSON'            # Whole document from a secret (read-only)
+LEGACY_SUBSCRIPTIONS_FILE = 'data/subscriptions.json'  # Moved to SUBSCRIPTIONS_FILE on first use
+SUBSCRIPTIONS_VERSION = 1
+PERIODS = ('AKGSMA_MORNING_RUSH', 'ACTIVE_TRADING', 'EVENING_UPDATE', 'OFF_HOURS')
+MICRO_PERIODS = ('AKGSMA_MORNING_RUSH', 'EVENING_UPDATE')
+CHANNEL_KINDS = ('telegram', 'pushover', 'ntfy')
+SUBSCRIBER_ID_PATTERN = re.compile(r'[A-Za-z0-9_.-]{1,64}')  # Used in outbox file names
+
+
+def _env_document(path):
+    """$SUBSCRIPTIONS_JSON, when set and `path` is the default file"""
+    if path != SUBSCRIPTIONS_FILE:
+        return None
+    return os.environ.get(SUBSCRIPTIONS_ENV) or None
+
+
+def _move_legacy_file(path):
+    """data/subscriptions.json predates private/: move it out of the published tree"""
+    if path != SUBSCRIPTIONS_FILE or os.path.exists(path) or not os.path.exists(LEGACY_SUBSCRIPTIONS_FILE):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(LEGACY_SUBSCRIPTIONS_FILE, path)
+    print(f"🔒 Moved {LEGACY_SUBSCRIPTIONS_FILE} to {path} (gitignored)")
+
+
+def _source_path(path, migrate):
+    """The file to read: `path`, or the legacy file left in place when migrating is not allowed"""
+    if migrate:
+        _move_legacy_file(path)
+    elif path == SUBSCRIPTIONS_FILE and not os.path.exists(path) and os.path.exists(LEGACY_SUBSCRIPTIONS_FILE):
+        return LEGACY_SUBSCRIPTIONS_FILE
+    return path
+
+
+def file_stamp(path=SUBSCRIPTIONS_FILE, migrate=True):
+    """Stamp of the subscriber source (None if there is none), to notice edits in daemon mode"""
+    document = _env_document(path)
+    if document:
+        return hash(document)
+    path = _source_path(path, migrate)
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class SubscriptionStore:
+    """Subscribers by id, loaded from and saved to private/subscriptions.json"""
+
+    def __init__(self, subscribers=None, path=SUBSCRIPTIONS_FILE):
+        self.path = path
+        self.subscribers = {subscriber['id']: subscriber for subscriber in subscribers or []}
+
+    @classmethod
+    def load(cls, path=SUBSCRIPTIONS_FILE, use_env=True, migrate=True):
+        """Subscribers from $SUBSCRIPTIONS_JSON (if use_env and set) or the file; invalid entries are skipped"""
+        store = cls(path=path)
+        try:
+            document = _env_document(path) if use_env else None
+            if document:
+                subscribers = json.loads(document).get('subscribers', [])
+            else:
+                source = _source_path(path, migrate)
+                if not os.path.exists(source):
+                    return store
+                with open(source, 'r') as f:
+                    subscribers = json.load(f).get('subscribers', [])
+        except Exception as e:
+            print(f"⚠️ Subscriptions unreadable, ignoring them: {e}")
+            return store
+        for subscriber in subscribers:
+            try:
+                store.add(subscriber)
+            except (ValueError, TypeError, AttributeError) as e:
+                print(f"⚠️ Skipping subscriber entry: {e}")
+        return store
+
+    def save(self):
+        document = {
+            'version': SUBSCRIPTIONS_VERSION,
+            'subscribers': [self.subscribers[key] for key in sorted(self.subscribers)]
+        }
+        write_json(self.path, document)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def get(self, subscriber_id):
+        return self.subscribers.get(subscriber_id)
+
+    def add(self, subscriber):
+        """Insert or replace a subscriber; raises ValueError on an invalid record"""
+        if not isinstance(subscriber.get('id'), str) or not SUBSCRIBER_ID_PATTERN.fullmatch(subscriber['id']):
+            raise ValueError(f"invalid subscriber id: {subscriber.get('id')!r}")
+        channels = subscriber.get('channels') or {}
+        unknown = set(channels) - set(CHANNEL_KINDS)
+        if unknown:
+            raise ValueError(f"unknown channel(s): {', '.join(sorted(unknown))}")
+        if not any(channels.values()):
+            raise ValueError("a subscriber needs at least one channel")
+        self.subscribers[subscriber['id']] = subscriber
+        return subscriber
+
+    def remove(self, subscriber_id):
+        return self.subscribers.pop(subscriber_id, None) is not None
+
+
+def resolve(subscriber, defaults):
+    """Effective settings of one subscriber: their overrides on top of the tracker defaults"""
+    thresholds = {}
+    for period in PERIODS:
+        merged = dict(defaults['thresholds'][period])
+        merged.update((subscriber.get('thresholds') or {}).get(period, {}))
+        thresholds[period] = merged
+    high_priority = dict(defaults['high_priority'])
+    high_priority.update(subscriber.get('high_priority') or {})
+    return {
+        'id': subscriber['id'],
+        'channels': {kind: target for kind, target in (subscriber.get('channels') or {}).items() if target},
+        'thresholds': thresholds,
+        'micro_rupees': subscriber.get('micro_rupees', defaults['micro_rupees']),
+        'high_priority': high_priority,
+        'gram_quantities': subscriber.get('gram_quantities') or defaults['gram_quantities'],
+        'weekend_reduced_sensitivity': subscriber.get('weekend_reduced_sensitivity',
+                                                      defaults['weekend_reduced_sensitivity'])
+    }
+
+
+class ThresholdIndex:
+    """Subscriber ids sorted by trigger level; a value fires every level at or below it"""
+
+    __slots__ = ('levels', 'ids')
+
+    def __init__(self, pairs):
+        ordered = sorted(pairs)
+        self.levels = [level for level, _ in ordered]
+        self.ids = [subscriber_id for _, subscriber_id in ordered]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def firing(self, value):
+        return self.ids[:bisect_right(self.levels, value)]
+
+
+class AlertEngine:
+    """Which subscribers does a change alert, and at what priority"""
+
+    def __init__(self, subscribers, defaults):
+        self.subscribers = {
+            subscriber['id']: resolve(subscriber, defaults)
+            for subscriber in subscribers if subscriber.get('enabled', True)
+        }
+        self.weekend_multiplier = defaults['weekend_multiplier']
+        # (period, weekend) -> (rupee, percent, micro) indexes and 'high' -> (rupee, percent), built on first use
+        self.indexes = {}
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def _indexes(self, period, weekend):
+        key = (period, weekend)
+        if key not in self.indexes:
+            rupees, percents, micros = [], [], []
+            for subscriber_id, subscriber in self.subscribers.items():
+                scale = self.weekend_multiplier if weekend and subscriber['weekend_reduced_sensitivity'] else 1.0
+                levels = subscriber['thresholds'][period]
+                if levels.get('rupees') is not None:
+                    rupees.append((levels['rupees'] * scale, subscriber_id))
+                if levels.get('percent') is not None:
+                    percents.append((levels['percent'] * scale, subscriber_id))
+                if period in MICRO_PERIODS and subscriber['micro_rupees'] is not None:
+                    micros.append((subscriber['micro_rupees'], subscriber_id))
+            self.indexes[key] = (ThresholdIndex(rupees), ThresholdIndex(percents), ThresholdIndex(micros))
+        return self.indexes[key]
+
+    def _high_priority_indexes(self):
+        if 'high' not in self.indexes:
+            high = [subscriber['high_priority'] for subscriber in self.subscribers.values()]
+            self.indexes['high'] = tuple(
+                ThresholdIndex((levels[unit], subscriber_id)
+                               for subscriber_id, levels in zip(self.subscribers, high) if levels.get(unit) is not None)
+                for unit in ('rupees', 'percent')
+            )
+        return self.indexes['high']
+
+    def evaluate(self, change, change_percent, period, weekend=False):
+        """[{'subscriber', 'kind': 'main' | 'micro', 'priority'}] for every subscriber this change alerts"""
+        rupee_index, percent_index, micro_index = self._indexes(period, weekend)
+        high_rupee_index, high_percent_index = self._high_priority_indexes()
+        change, change_percent = abs(change), abs(change_percent)
+
+        main = rupee_index.firing(change)
+        seen = set(main)
+        main += [subscriber_id for subscriber_id in percent_index.firing(change_percent) if subscriber_id not in seen]
+        seen.update(main)
+        high = set(high_rupee_index.firing(change))
+        high.update(high_percent_index.firing(change_percent))
+
+        subscribers = self.subscribers
+        alerts = [{'subscriber': subscribers[subscriber_id], 'kind': 'main',
+                   'priority': 'high' if subscriber_id in high else 'normal'} for subscriber_id in main]
+        alerts += [{'subscriber': subscribers[subscriber_id], 'kind': 'micro', 'priority': 'low'}
+                   for subscriber_id in micro_index.firing(change) if subscriber_id not in seen]
+        return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage alert subscribers in " + SUBSCRIPTIONS_FILE)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list')
+    add = commands.add_parser('add', help='add or replace a subscriber (other settings: edit the JSON)')
+    add.add_argument('id')
+    for kind in CHANNEL_KINDS:
+        add.add_argument(f'--{kind}')
+    add.add_argument('--grams', type=float, nargs='+', help='gram quantities shown in their alerts')
+    remove = commands.add_parser('remove')
+    remove.add_argument('id')
+    args = parser.parse_args()
+
+    store = SubscriptionStore.load(use_env=False)  # The CLI edits the file; the secret is maintained by hand
+    if args.command == 'list':
+        for subscriber in store.subscribers.values():
+            channels = ', '.join(f"{kind}={target}" for kind, target in subscriber['channels'].items())
+            state = '' if subscriber.get('enabled', True) else ' (disabled)'
+            print(f"👤 {subscriber['id']}{state}: {channels}")
+        print(f"👥 {len(store)} subscriber(s)")
+        return
+    if args.command == 'add':
+        subscriber = dict(store.get(args.id) or {'id': args.id})
+        subscriber['channels'] = dict(subscriber.get('channels') or {})
+        subscriber['channels'].update({kind: getattr(args, kind) for kind in CHANNEL_KINDS if getattr(args, kind)})
+        if args.grams:
+            subscriber['gram_quantities'] = [int(g) if g.is_integer() else g for g in args.grams]
+        try:
+            store.add(subscriber)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"✅ Saved subscriber {args.id}")
+    else:
+        if not store.remove(args.id):
+            parser.error(f"no subscriber {args.id!r}")
+        print(f"🗑️ Removed subscriber {args.id}")
+    store.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+🔁 TRACKER DAEMON
+Keeps one tracker alive and scrapes on the market-period schedule.
+
+A scheduled run pays interpreter start-up, imports, history load and (on
+fallback) Chrome start-up every time. The daemon pays them once. It keeps the
+pooled HTTP session and validators, the history snapshot, the notification
+connections and, when it has been needed, the browser. Scrapes are aligned to
+the period's interval (for example :00/:15/:30/:45 during AKGSMA hours), and
+the first scrape of a period falls exactly on its start hour. With
+adaptive=True the learned schedule in adaptive_schedule.py takes over once it
+has seen enough history. SIGTERM or Ctrl+C stops the daemon after the current
+scrape finishes.
+"""
+
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from adaptive_schedule import ChangeModel
+from history_store import reset_io_stats
+
+IST = ZoneInfo("Asia/Kolkata")
+
+
+def next_run_after(now, period_for, interval_minutes, boundary_hours):
+    """Next aligned slot for the period `now` is in, pulled forward to the next period boundary"""
+    interval = interval_minutes[period_for(now)]
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed_minutes = (now - midnight).total_seconds() / 60
+    candidate = midnight + timedelta(minutes=(int(elapsed_minutes // interval) + 1) * interval)
+
+    for hour in sorted(boundary_hours):
+        boundary = midnight + timedelta(hours=hour)
+        if now < boundary < candidate:
+            return boundary
+    return candidate
+
+
+class TrackerDaemon:
+    """Run tracker.scrape_rate() on schedule until stopped"""
+
+    def __init__(self, tracker, interval_minutes, boundary_hours, publish_site=True, adaptive=False):
+        self.tracker = tracker
+        self.interval_minutes = interval_minutes
+        self.boundary_hours = boundary_hours
+        self.publish_site = publish_site
+        self.adaptive = adaptive
+        self.stop_event = threading.Event()
+        self.cycles = 0
+        self.failures = 0
+
+    def _handle_signal(self, signum, frame):
+        print(f"\n🛑 Received {signal.Signals(signum).name} - stopping after the current cycle")
+        self.stop_event.set()
+
+    def run_cycle(self):
+        """One scrape (plus site publish), never raising"""
+        self.cycles += 1
+        started = time.perf_counter()
+        reset_io_stats()
+        try:
+            self.tracker.refresh_clock()
+            result = self.tracker.scrape_rate()
+            if result is None:
+                self.failures += 1
+            elif self.publish_site:
+                from generate_api_site import generate_enhanced_api_and_site
+                generate_enhanced_api_and_site()
+        except Exception as e:
+            self.failures += 1
+            print(f"❌ Daemon cycle error: {e}")
+            traceback.print_exc()
+        print(f"⏱️ Cycle {self.cycles} took {time.perf_counter() - started:.2f}s")
+
+    def next_run(self, now):
+        """Learned schedule once it has enough history, otherwise the fixed period cadence"""
+        if self.adaptive:
+            try:
+                model = ChangeModel.load()
+                history = self.tracker.get_history()
+                model.ingest(history.epochs, [entry.get('rate') for entry in history.entries])
+                model.save()
+                if model.is_trained():
+                    return model.next_poll(now)
+            except Exception as e:
+                print(f"⚠️ Adaptive schedule unavailable, using fixed cadence: {e}")
+        return next_run_after(now, self.tracker.period_for, self.interval_minutes, self.boundary_hours)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        self.tracker.keep_driver = True
+        print(f"🔁 Daemon started (intervals: {self.interval_minutes})")
+
+        try:
+            while not self.stop_event.is_set():
+                self.run_cycle()
+                if self.stop_event.is_set():
+                    break
+                next_run = self.next_run(datetime.now(IST))
+                wait_seconds = max(0.0, (next_run - datetime.now(IST)).total_seconds())
+                print(f"💤 Next scrape at {next_run.strftime('%I:%M %p')} IST "
+                      f"({self.tracker.period_for(next_run)}, in {wait_seconds / 60:.1f} min)")
+                self.stop_event.wait(wait_seconds)
+        finally:
+            self.tracker.close()
+            print(f"👋 Daemon stopped after {self.cycles} cycle(s), {self.failures} failed")